@@ -1,20 +1,42 @@
 from flask import Flask, request, send_file, render_template, jsonify
 import os
-import zipfile
+import io
 import json
+import zipfile
 import re
 from werkzeug.utils import secure_filename
 import tempfile
-from deep_translator import GoogleTranslator
+import uuid
+import threading
+import hashlib
+
+import docx_engine
+from fuzzy_match import DEFAULT_FUZZY_THRESHOLD
+from language_detection import detect_language
+from library_artifact import DEFAULT_ARTIFACT_PATH
+from library_store import LibraryIndex, LibraryStore
+from pipeline import DEFAULT_BACKOFF, DEFAULT_MAX_BATCH_CHARS, DEFAULT_MAX_FAILURES, DEFAULT_RETRIES, translate_missing
+from segment_cache import SegmentCache
+from segmentation import assemble, is_passthrough, segment_missing
+from translation_backends import create_backend
+from janitor import DEFAULT_RETENTION, Janitor
+from jobs import JobManager, QueueFull
+from manifest import Manifest, ManifestError
+from metrics import MetricsRegistry, UploadRecorder
+from result_cache import ResultCache, upload_key
+from result_store import ResultStore
 
 import logging
 import time
 from datetime import datetime
-import shutil
+from collections import Counter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+# Import time of the app: the gunicorn master's with --preload, so startup
+# figures below cover the whole deploy and not only a worker's life
+STARTED_AT = time.time()
 
 app = Flask(__name__, static_folder='static', template_folder='static')
 
@@ -25,34 +47,165 @@ if not os.path.exists(UPLOAD_FOLDER):
     
 ALLOWED_EXTENSIONS = {'docx'}
 MASTER_LIBRARY = 'master_library.json'
+MASTER_LIBRARY_DB = 'master_library.db'
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Translation API: concurrent batches under a token-bucket rate limit
+app.config['TRANSLATION_BATCH_SIZE'] = int(os.environ.get('TRANSLATION_BATCH_SIZE', 50))
+app.config['TRANSLATION_MAX_IN_FLIGHT'] = int(os.environ.get('TRANSLATION_MAX_IN_FLIGHT', 4))
+app.config['TRANSLATION_RATE_LIMIT'] = float(os.environ.get('TRANSLATION_RATE_LIMIT', 2.0))  # batches/second
+# Batches are also bounded by characters; failed requests are retried with backoff, then bisected
+app.config['TRANSLATION_MAX_BATCH_CHARS'] = int(os.environ.get('TRANSLATION_MAX_BATCH_CHARS', DEFAULT_MAX_BATCH_CHARS))
+app.config['TRANSLATION_RETRIES'] = int(os.environ.get('TRANSLATION_RETRIES', DEFAULT_RETRIES))
+app.config['TRANSLATION_BACKOFF'] = float(os.environ.get('TRANSLATION_BACKOFF', DEFAULT_BACKOFF))  # seconds
+# Failed requests in a row after which an upload stops calling the backend (0 = never)
+app.config['TRANSLATION_MAX_FAILURES'] = int(os.environ.get('TRANSLATION_MAX_FAILURES', DEFAULT_MAX_FAILURES))
+# Untranslated segments listed in a job's details_url (the count in the result is always complete)
+MAX_REPORTED_UNTRANSLATED = 50
+# 'google' (network) or 'fake' (offline deterministic stand-in, see translation_backends.py)
+app.config['TRANSLATION_BACKEND'] = os.environ.get('TRANSLATION_BACKEND', 'google')
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+library_store = LibraryStore(MASTER_LIBRARY_DB, MASTER_LIBRARY)
+# Split missed paragraphs at labels, lists and sentences to reuse library pieces
+app.config['TRANSLATION_SEGMENTATION'] = os.environ.get('TRANSLATION_SEGMENTATION', '0').lower() in ('1', 'true', 'yes')
+# Minimum similarity (0-1) for near-duplicate library matches, 0 disables them
+app.config['LIBRARY_FUZZY_THRESHOLD'] = float(os.environ.get('LIBRARY_FUZZY_THRESHOLD', DEFAULT_FUZZY_THRESHOLD))
+# Compiled into a memory-mapped file shared by the workers (see library_artifact.py); learned
+# terms are added in memory until the janitor recompiles it; '' keeps a per-worker in-memory index
+app.config['LIBRARY_ARTIFACT'] = os.environ.get('LIBRARY_ARTIFACT', DEFAULT_ARTIFACT_PATH)
+library_index = LibraryIndex(library_store, app.config['LIBRARY_FUZZY_THRESHOLD'],
+                             app.config['LIBRARY_ARTIFACT'] or None)
+# Built here, at import: with gunicorn --preload the master builds it once and the forked
+# workers share it (and the compiled regexes and signal tables) copy-on-write
+library_index.refresh()
+translation_backend = create_backend(app.config['TRANSLATION_BACKEND'])
+# Recent backend translations shared by all workers (hashed keys, strict TTL, 0 disables)
+app.config['SEGMENT_CACHE_PATH'] = os.environ.get('SEGMENT_CACHE_PATH', 'segment_cache.db')
+app.config['SEGMENT_CACHE_TTL'] = int(os.environ.get('SEGMENT_CACHE_TTL', 60))
+app.config['SEGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('SEGMENT_CACHE_MAX_ENTRIES', 20000))
+segment_cache = None
+if app.config['SEGMENT_CACHE_TTL'] > 0:
+    segment_cache = SegmentCache(app.config['SEGMENT_CACHE_PATH'], app.config['SEGMENT_CACHE_TTL'],
+                                 app.config['SEGMENT_CACHE_MAX_ENTRIES'])
+# Uploads are processed in the background by a bounded pool (per worker)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_QUEUE_LIMIT'] = int(os.environ.get('JOB_QUEUE_LIMIT', 20))
+app.config['BULK_MAX_FILES'] = int(os.environ.get('BULK_MAX_FILES', 200))
+# Total size of the DOCX files of a bulk archive once extracted (ZIP bombs are refused before reading)
+app.config['BULK_MAX_UNCOMPRESSED_BYTES'] = int(os.environ.get('BULK_MAX_UNCOMPRESSED_BYTES', 256 * 1024 * 1024))
+# zlib level (0-9) for the rewritten XML parts; other DOCX entries are copied as-is
+app.config['DOCX_COMPRESSLEVEL'] = int(os.environ.get('DOCX_COMPRESSLEVEL', docx_engine.DEFAULT_COMPRESSLEVEL))
+# Workspaces and job state files are deleted by a background thread RETENTION seconds after use
+app.config['RETENTION'] = int(os.environ.get('RETENTION', DEFAULT_RETENTION))
+janitor = Janitor(UPLOAD_FOLDER, app.config['RETENTION'])
+job_manager = JobManager(UPLOAD_FOLDER, app.config['JOB_WORKERS'], app.config['JOB_QUEUE_LIMIT'],
+                         on_submitted=janitor.hold, on_finished=janitor.track)
+# In-memory mode: uploads, maps and results stay in spooled buffers (disk only above the limit)
+# and results can be downloaded from /result/<token> for RESULT_TTL seconds
+app.config['IN_MEMORY_PROCESSING'] = os.environ.get('IN_MEMORY_PROCESSING', '1').lower() in ('1', 'true', 'yes')
+app.config['IN_MEMORY_SPOOL_LIMIT'] = int(os.environ.get('IN_MEMORY_SPOOL_LIMIT', 8 * 1024 * 1024))
+# Folder shared by gunicorn workers for results, ideally RAM-backed (/dev/shm); unset = this process
+app.config['RESULT_STORE_FOLDER'] = os.environ.get('RESULT_STORE_FOLDER') or None
+app.config['RESULT_TTL'] = int(os.environ.get('RESULT_TTL', 60))
+result_store = ResultStore(app.config['RESULT_STORE_FOLDER'], app.config['RESULT_TTL'])
+janitor.periodic.append(result_store.purge)
+if segment_cache is not None:
+    # Translations are stored in plaintext: expired ones must not wait for the next upload
+    janitor.periodic.append(segment_cache.purge)
+if library_index.artifact_path:
+    # Recompiles take seconds at tens of thousands of terms: never inside a job
+    janitor.periodic.append(library_index.compile_pending)
+# Single uploads return a fingerprint manifest the client sends back with its next upload
+# (see manifest.py), served from the job result's details_url, never from the job state file;
+# with a key it is encrypted (needs the 'cryptography' package)
+app.config['MANIFEST_KEY'] = os.environ.get('MANIFEST_KEY') or None
+# Identical uploads (same bytes, name and options) join the running job or reuse its result
+result_cache = ResultCache(UPLOAD_FOLDER)
+result_cache_lock = threading.Lock()
+# Per-worker metrics, summed across gunicorn workers through this folder (see metrics.py)
+METRICS_FOLDER = os.environ.get('METRICS_FOLDER', os.path.join(os.getcwd(), 'metrics'))
+metrics = MetricsRegistry(METRICS_FOLDER)
+
+def record_inference_batch(direction, segments, tokens, seconds):
+    metrics.observe('inference_batch_seconds', seconds, direction=direction)
+    metrics.inc('inference_segments_total', segments, direction=direction)
+
+if translation_backend.name == 'local':
+    translation_backend.on_batch = record_inference_batch
+
+# Per-worker warmup, run after the fork (loading models in the master would share torch
+# threads with the children): GET /ready answers 503 until it is done
+worker_lock = threading.Lock()
+worker_state = {'pid': None, 'ready': False, 'warmup_seconds': None, 'error': None, 'first_upload': False}
+
+def ensure_warm():
+    """Start this worker's warmup once; returns True when it is done"""
+    if worker_state['pid'] != os.getpid():
+        with worker_lock:
+            if worker_state['pid'] != os.getpid():
+                worker_state.update(pid=os.getpid(), ready=False, warmup_seconds=None, error=None,
+                                    first_upload=False)
+                threading.Thread(target=warm_up, name='warmup', daemon=True).start()
+    return worker_state['ready']
 
-def cleanup_old_files():
-    """Delete files older than 60 seconds for privacy"""
+def warm_up():
+    """Refresh the library index and warm the backend (imports, models) off the request path"""
+    started = time.perf_counter()
     try:
-        now = time.time()
-        cutoff = 60  # 60 seconds retention (strict privacy)
-        count = 0
-        for f in os.listdir(UPLOAD_FOLDER):
-            path = os.path.join(UPLOAD_FOLDER, f)
-            try:
-                if os.stat(path).st_mtime < now - cutoff:
-                    if os.path.isfile(path):
-                        os.remove(path)
-                    elif os.path.isdir(path):
-                        shutil.rmtree(path)
-                    count += 1
-            except FileNotFoundError:
-                pass 
-        if count > 0:
-            logger.info(f"Cleaned up {count} old files/dirs")
+        library_index.refresh()
+        if hasattr(translation_backend, 'warmup'):
+            translation_backend.warmup()
     except Exception as e:
-        logger.error(f"Cleanup error: {e}")
+        logger.error(f"Worker {os.getpid()} warmup failed: {e}")
+        with worker_lock:
+            # The next request starts another attempt
+            worker_state.update(pid=None, error=str(e))
+        return
+    worker_state['warmup_seconds'] = time.perf_counter() - started
+    worker_state['ready'] = True
+    metrics.observe('startup_seconds', time.time() - STARTED_AT, event='ready')
+    logger.info(f"Worker {os.getpid()} ready: warmed up in {worker_state['warmup_seconds']:.2f}s, "
+                f"{time.time() - STARTED_AT:.2f}s after start")
+
+def record_first_upload():
+    """Log and measure the time from start to this worker's first successful upload"""
+    with worker_lock:
+        if worker_state['first_upload']:
+            return
+        worker_state['first_upload'] = True
+    seconds = time.time() - STARTED_AT
+    metrics.observe('startup_seconds', seconds, event='first_upload')
+    logger.info(f"Worker {os.getpid()} finished its first upload {seconds:.2f}s after start")
+
+@app.before_request
+def track_request_start():
+    metrics.gauge_add('http_requests_in_flight', 1)
+    # The first request of each worker starts its janitor, which sweeps orphans, and its warmup
+    janitor.start()
+    ensure_warm()
+
+@app.teardown_request
+def track_request_end(exc=None):
+    metrics.gauge_add('http_requests_in_flight', -1)
+    metrics.flush()
+
+def metered_job(kind, fn):
+    """Wrap a job function: stage timings, counters and one structured log record per upload"""
+    def run(job, *args):
+        recorder = UploadRecorder(job, metrics, kind)
+        try:
+            result = fn(recorder, *args)
+        except Exception:
+            recorder.finish('error')
+            raise
+        recorder.finish('done')
+        record_first_upload()
+        return result
+    return run
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def log_upload(filename):
     """Log upload event for audit"""
@@ -62,145 +215,71 @@ def log_upload(filename):
     except Exception as e:
         logger.error(f"Logging error: {e}")
 
-def load_master_library(library_path):
-    if os.path.exists(library_path):
+def translate_docx(source_docx, translation_map, output_docx, document=None):
+    """Translate DOCX file (path or buffer) using the translation map (dict or JSON path)"""
+    if isinstance(translation_map, str):
         try:
-            with open(library_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_master_library(library_path, data):
-    clean_data = {k: v for k, v in data.items() if isinstance(v, str) and v.strip() != ""}
-    try:
-        with open(library_path, 'w', encoding='utf-8') as f:
-            json.dump(clean_data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        logger.error(f"Failed to save library: {e}")
-
-def detect_language(text_segments):
-    """
-    Heuristic language detection based on keyword frequency.
-    Returns: 'fr' or 'en'
-    """
-    if not text_segments: return 'fr'
-    
-    # Join first ~2000 chars to analyze
-    sample_text = " ".join(text_segments)[:2000].lower()
-    
-    fr_signals = ["expérience", "formation", "compétences", "langues", "résumé", "janvier", "février", "août", "juillet", "décembre", "mars", "avril", "mai", "juin", "septembre", "octobre", "novembre", "actuel", "aujourd'hui"]
-    en_signals = ["experience", "education", "skills", "languages", "summary", "january", "february", "august", "july", "december", "march", "april", "may", "june", "september", "october", "november", "current", "present"]
-    
-    fr_score = sum(sample_text.count(s) for s in fr_signals)
-    en_score = sum(sample_text.count(s) for s in en_signals)
-    
-    # Check simple words if scores are tied or zero
-    if fr_score == 0 and en_score == 0:
-        if " et " in sample_text or " le " in sample_text or " la " in sample_text:
-            return 'fr'
-        if " and " in sample_text or " the " in sample_text:
-            return 'en'
-            
-    if en_score > fr_score:
-        return 'en'
-    return 'fr'
-
-def is_safe_to_save(text):
-    """
-    Sanitization filter: Returns True if the text is generic enough to be saved in the library.
-    Returns False for PII, specific dates, or long sentences.
-    """
-    text = text.strip()
-    if not text: return False
-    
-    # 1. Exclude too long strings (Sentences)
-    if len(text.split()) > 5:
-        return False
-        
-    # 2. Exclude PII patterns
-    # Email
-    if re.search(r'\S+@\S+', text): return False
-    # URL
-    if re.search(r'http[s]?://', text) or re.search(r'www\.', text): return False
-    # Phone numbers (loose check for digits)
-    if sum(c.isdigit() for c in text) > 3: return False
-    
-    # 3. Exclude Specific Entities usually containing many numbers
-    # Dates often contain digits (2024, 12/02), Addresses (123 St)
-    if any(char.isdigit() for char in text):
-        return False
-        
-    return True
-
-def translate_docx(source_docx, translation_map_path, output_docx):
-    """Translate DOCX file using the translation map"""
-    try:
-        with open(translation_map_path, 'r', encoding='utf-8') as f:
-            translation_map = json.load(f)
-    except Exception as e:
-        raise Exception(f"Error loading translation map: {e}")
+            with open(translation_map, 'r', encoding='utf-8') as f:
+                translation_map = json.load(f)
+        except Exception as e:
+            raise Exception(f"Error loading translation map: {e}")
 
     # No library update here anymore, it's done during extraction/translation phase
-    
-    # Translate DOCX
-    def sub_xml(content, trans_map):
-        xml_str = content.decode('utf-8')
-        def replace_para(match):
-            para_xml = match.group(0)
-            t_contents = re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para_xml)
-            para_text = "".join(t_contents)
-            
-            # Lookup with strip
-            translation = trans_map.get(para_text) or trans_map.get(para_text.strip())
-            
-            if translation and isinstance(translation, str) and translation.strip() != "":
-                state = {'first': True}
-                def sub_t(t_match):
-                    tag_start = t_match.group(1)
-                    if state['first']:
-                        state['first'] = False
-                        safe = translation.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
-                        return f'<w:t{tag_start}>{safe}</w:t>'
-                    return f'<w:t{tag_start}></w:t>'
-                return re.sub(r'<w:t([^>]*)>([^<]*)</w:t>', sub_t, para_xml)
-            return para_xml
-        return re.sub(r'<w:p\b[^>]*>.*?</w:p>', replace_para, xml_str, flags=re.DOTALL).encode('utf-8')
-
-    target_pattern = re.compile(r'word/(document|header|footer)\d*\.xml')
-    with zipfile.ZipFile(source_docx, 'r') as zin, zipfile.ZipFile(output_docx, 'w', zipfile.ZIP_DEFLATED) as zout:
-        for info in zin.infolist():
-            content = zin.read(info.filename)
-            if target_pattern.match(info.filename):
-                zout.writestr(info.filename, sub_xml(content, translation_map))
-            else:
-                zout.writestr(info, content)
+    docx_engine.translate_docx(source_docx, translation_map, output_docx, document=document,
+                               compresslevel=app.config['DOCX_COMPRESSLEVEL'])
 
-def process_file_logic(source_docx, output_json):
+def process_file_logic(source_docx, output_json, document=None, progress=None, usage=None, manifest=None,
+                       untranslated=None):
     """
     Main logic for Web App:
     1. Extract
     2. Detect Lang
     3. Translate (Bidirectional)
-    4. Save Map
+    4. Save Map (skipped when output_json is None)
+    source_docx is a path or a buffer. Pass the DocumentModel from docx_engine.load_document to reuse it later in translate_docx.
+    progress(stage=..., **counters) is called as the pipeline advances (see jobs.Job.update);
+    usage is an optional Counter for the pipeline counters (see metrics.UploadRecorder).
+    manifest is an optional manifest.Manifest from the client's previous upload.
+    Segments left in the source language are appended to the untranslated list when given.
+    Returns (translation map, language_detection.Detection).
     """
-    target_pattern = re.compile(r'word/(document|header|footer)\d*\.xml')
-    unique_strings = []
-    
+    progress = progress or (lambda stage=None, **fields: None)
+
     # 1. Extract
-    with zipfile.ZipFile(source_docx, 'r') as z:
-        for info in z.infolist():
-            if target_pattern.match(info.filename):
-                content = z.read(info.filename).decode('utf-8')
-                paragraphs = re.findall(r'<w:p\b[^>]*>.*?</w:p>', content, flags=re.DOTALL)
-                for para in paragraphs:
-                    t_contents = re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para)
-                    para_text = "".join(t_contents).strip()
-                    if para_text and para_text not in unique_strings:
-                        unique_strings.append(para_text)
+    progress(stage='extract')
+    if document is None:
+        document = docx_engine.load_document(source_docx)
+    unique_strings = document.segments()
+    progress(segments=len(unique_strings))
+    if usage is not None:
+        usage.update(documents=1, segments=len(unique_strings))
 
     # 2. Detect Language
-    detected_lang = detect_language(unique_strings)
+    progress(stage='detect')
+    detection = detect_language(unique_strings)
+    progress(language=detection.lang, language_confidence=round(detection.confidence, 2))
+
+    # 3. Library lookup & translation of missing strings
+    mapping = translate_segments(unique_strings, detection.lang, progress, usage, manifest, untranslated)
+
+    # Save translation map (not in in-memory mode)
+    if output_json:
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(mapping, f, indent=4, ensure_ascii=False)
+        
+    return mapping, detection
+
+def translate_segments(unique_strings, detected_lang, progress=None, usage=None, manifest=None, untranslated=None):
+    """
+    Build the translation map of unique segments written in detected_lang:
+    library hits first, then the client's manifest and the segment cache,
+    then the translation backend for missing strings.
+    Safe new terms are learned into the master library.
+    Lookup and backend counters are added to the usage Counter when given;
+    segments the backend could not translate are appended to untranslated.
+    """
+    progress = progress or (lambda stage=None, **fields: None)
+    usage = usage if usage is not None else Counter()
     if detected_lang == 'fr':
         target_lang = 'en'
         logger.info("🇫🇷 Detected language: French -> Target: English")
@@ -208,100 +287,102 @@ def process_file_logic(source_docx, output_json):
         target_lang = 'fr'
         logger.info("🇬🇧 Detected language: English -> Target: French")
 
-    # 3. Load Library & Prepare Reverse Lookup if needed
-    master_lib = load_master_library(MASTER_LIBRARY)
-    current_library = {} 
-    
-    if detected_lang == 'fr':
-        current_library = master_lib
-    else:
-        # Reverse Library for EN -> FR
-        current_library = {v: k for k, v in master_lib.items() if v and isinstance(v, str)}
-
-    # Build normalized lookup for fuzzy matching (ignore trailing :;. and spaces)
-    norm_lookup = {}
-    for k, v in current_library.items():
-        nk = k.strip().rstrip(':;\u00a0. ').replace('\u00a0', ' ').strip()
-        if nk and nk not in norm_lookup:
-            norm_lookup[nk] = v
-
-    def fuzzy_lookup(text):
-        """Try exact match first, then normalized (strip trailing :;. and spaces)"""
-        result = current_library.get(text) or current_library.get(text.strip())
-        if result:
-            return result
-        norm = text.strip().rstrip(':;\u00a0. ').replace('\u00a0', ' ').strip()
-        return norm_lookup.get(norm)
+    # 3. Refresh the per-worker library index (no-op unless the store changed)
+    progress(stage='library')
+    library_index.refresh()
 
     # 4. Map existing translations
     mapping = {}
     missing_strings = []
+    match_types = {}
     
     for s in unique_strings:
         clean_s = s.strip()
         if not clean_s: continue
         
-        trans = fuzzy_lookup(s)
+        trans, match_type = library_index.match(s, detected_lang)
         if trans:
             mapping[s] = trans
+            match_types[match_type] = match_types.get(match_type, 0) + 1
         else:
-            if clean_s.replace('.', '').replace(',', '').isdigit() or len(clean_s) < 2:
+            if is_passthrough(s):
                 mapping[s] = s
+                usage['lookup_passthrough'] += 1
             else:
                 missing_strings.append(s)
 
+    for match_type, count in match_types.items():
+        usage[f'lookup_{match_type}'] += count
+    usage['lookup_miss'] += len(missing_strings)
+    if match_types.get('fuzzy'):
+        logger.info(f"{match_types['fuzzy']} near-duplicate library matches")
+    progress(library_hits=len(mapping), match_types=match_types, missing=len(missing_strings))
+
+    # Optionally reuse library pieces of the missed paragraphs
+    plans = {}
+    if app.config['TRANSLATION_SEGMENTATION'] and missing_strings:
+        missing_strings, plans = segment_missing(missing_strings, lambda t: library_index.lookup(t, detected_lang))
+        if plans:
+            logger.info(f"{len(plans)} paragraphs split to reuse library pieces")
+        progress(segmented=len(plans), missing=len(missing_strings))
+
     # 5. Translate missing strings
     if missing_strings:
         logger.info(f"Translating {len(missing_strings)} new strings...")
-        try:
-            translator = GoogleTranslator(source=detected_lang, target=target_lang)
-            batch_size = 50
-            new_knowledge = {}
-
-            for i in range(0, len(missing_strings), batch_size):
-                batch = missing_strings[i:i + batch_size]
-                try:
-                    logger.info(f"Translating batch {i//batch_size + 1}")
-                    translations = translator.translate_batch(batch)
-                    
-                    for original, translated in zip(batch, translations):
-                        if translated:
-                            mapping[original] = translated
-                            
-                            # SAFETY CHECK BEFORE SAVING
-                            if is_safe_to_save(original):
-                                if detected_lang == 'fr':
-                                    master_lib[original] = translated
-                                    new_knowledge[original] = translated
-                                else:
-                                    # Store as {FR: EN}
-                                    master_lib[translated] = original
-                                    new_knowledge[translated] = original
-                        else:
-                            mapping[original] = original
-                            
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.error(f"Batch translation failed: {e}")
-                    for s in batch:
-                        mapping[s] = s
-            
-            if new_knowledge:
-                save_master_library(MASTER_LIBRARY, master_lib)
+        progress(stage='translate', batches_done=0)
+
+        def on_batch(done, total, error):
+            logger.info(f"Translated batch {done}/{total}")
+            progress(batches_done=done, batches_total=total)
+
+        new_knowledge, stats = translate_missing(
+            missing_strings, detected_lang, target_lang, translation_backend, mapping,
+            batch_size=app.config['TRANSLATION_BATCH_SIZE'],
+            max_in_flight=app.config['TRANSLATION_MAX_IN_FLIGHT'],
+            rate_limit=app.config['TRANSLATION_RATE_LIMIT'],
+            on_batch=on_batch,
+            cache=manifest if manifest is not None else segment_cache,
+            max_batch_chars=app.config['TRANSLATION_MAX_BATCH_CHARS'],
+            retries=app.config['TRANSLATION_RETRIES'],
+            backoff=app.config['TRANSLATION_BACKOFF'],
+            max_failures=app.config['TRANSLATION_MAX_FAILURES'],
+        )
+        usage.update({key: stats[key] for key in ('batches', 'failed_batches', 'retries', 'chars_sent', 'backend_latency', 'fallbacks')})
+        if untranslated is not None:
+            untranslated.extend(stats['untranslated'])
+        if stats['untranslated']:
+            logger.warning(f"{len(stats['untranslated'])} segments left untranslated")
+        manifest_hits = manifest.hits if manifest is not None else 0
+        usage.update(cache_hits=stats['cache_hits'] - manifest_hits, manifest_hits=manifest_hits)
+        progress(chars_sent=stats['chars_sent'], manifest_hits=manifest_hits, untranslated=len(stats['untranslated']))
+        logger.info(f"{stats['cache_hits']} cached, {stats['batches']} batches via {translation_backend.name}: "
+                    f"{stats['chars_sent']} chars sent, {stats['failed_batches']} failed, "
+                    f"{stats['backend_latency']:.2f}s backend time")
+
+        if new_knowledge:
+            try:
+                library_store.add_terms(new_knowledge)
                 logger.info("Master library updated.")
-            
-        except Exception as e:
-            logger.error(f"Translation setup failed: {e}")
-            for s in missing_strings:
-                mapping[s] = s
+            except Exception as e:
+                logger.error(f"Failed to save library: {e}")
+
+    for s, (parts, resolved, _) in plans.items():
+        mapping[s] = assemble(parts, resolved, mapping, target_lang)
 
-    # Save translation map
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(mapping, f, indent=4, ensure_ascii=False)
-        
     return mapping
 
+def output_base_name(base_name, detected_lang):
+    """Swap the _FR/_EN suffix (or append one) for the translated file name"""
+    if detected_lang == 'fr':
+        # FR -> EN
+        if re.search(r'[_.-]FR$', base_name, re.I):
+            return re.sub(r'([_.-])FR$', r'\1EN', base_name, flags=re.I)
+        return f"{base_name}_EN"
+    # EN -> FR
+    if re.search(r'[_.-]EN$', base_name, re.I):
+        return re.sub(r'([_.-])EN$', r'\1FR', base_name, flags=re.I)
+    return f"{base_name}_FR"
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -322,68 +403,362 @@ def upload_file():
     try:
         filename = secure_filename(file.filename)
         log_upload(filename)
-        cleanup_old_files()
-        
-        upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(upload_path)
-        logger.info(f"File saved: {upload_path}")
-        
-        # Determine unique base name
-        base_name = os.path.splitext(filename)[0]
-        map_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{base_name}.json")
-        
-        # --- NEW LOGIC CALL ---
-        translation_map = process_file_logic(upload_path, map_path)
-        
-        # Decide output filename based on detection logic (heuristic check)
-        # We can re-check detection or pass it out from logic.
-        # For simplicity, let's peek at the file again or assume from filename.
-        # But `process_file_logic` knows best. 
-        # Refactoring to detect lang inside logic is cleaner, but let's assume FR->EN unless detected otherwise.
-        
-        # To get the real detected lang, we could re-run detect on keys, but `process_file_logic` already did the heavy lifting.
-        # Let's inspect the map. If keys are French indicators, it was FR->EN.
         
-        # Quick check:
-        sample_keys = list(translation_map.keys())[:50]
-        detected_lang = detect_language(sample_keys)
-        
-        if detected_lang == 'fr':
-            # FR -> EN
-            if re.search(r'[_.-]FR$', base_name, re.I):
-                output_base = re.sub(r'([_.-])FR$', r'\1EN', base_name, flags=re.I)
-            else:
-                output_base = f"{base_name}_EN"
-        else:
-             # EN -> FR
-            if re.search(r'[_.-]EN$', base_name, re.I):
-                output_base = re.sub(r'([_.-])EN$', r'\1FR', base_name, flags=re.I)
-            else:
-                output_base = f"{base_name}_FR"
-        
-        output_docx = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_base}.docx")
+        manifest = read_manifest(request.form.get('manifest'))
+
+        # Processing runs in the background; the client polls the status URL. Translations
+        # from a client's manifest are its own: such a job is never shared with other uploads
+        return start_job('single', run_translation_job, file, filename, manifest, shared=not manifest.previous)
+
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"Processing error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def receive_upload(file, filename):
+    """
+    Keep the upload in a spooled buffer (in-memory mode) or save it to its own
+    workspace. Returns (path or buffer, SHA-256 hex digest of the bytes).
+    """
+    digest = hashlib.sha256()
+    if app.config['IN_MEMORY_PROCESSING']:
+        target = tempfile.SpooledTemporaryFile(max_size=app.config['IN_MEMORY_SPOOL_LIMIT'])
+    else:
+        # One directory per upload: same-named uploads never overwrite each other
+        workspace = os.path.join(app.config['UPLOAD_FOLDER'], uuid.uuid4().hex)
+        os.makedirs(workspace)
+        janitor.hold(workspace)
+        upload_path = os.path.join(workspace, filename)
+        target = open(upload_path, 'wb')
+    for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+        digest.update(chunk)
+        target.write(chunk)
+    if app.config['IN_MEMORY_PROCESSING']:
+        target.seek(0)
+        return target, digest.hexdigest()
+    target.close()
+    logger.info(f"File saved: {upload_path}")
+    return upload_path, digest.hexdigest()
+
+def discard_upload(source):
+    """Drop an upload that will not be processed"""
+    if isinstance(source, str):
+        janitor.discard(os.path.dirname(source))
+    else:
+        source.close()
+
+def job_response(job_id, duplicate=False):
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/jobs/{job_id}',
+        'duplicate': duplicate
+    }), 202
+
+def start_job(kind, fn, file, filename, *args, shared=True):
+    """Receive the upload and queue its job, or join the job of an identical upload (when shared)"""
+    source, digest = receive_upload(file, filename)
+    if not shared:
+        return job_response(submit_job(kind, fn, source, filename, *args).id)
+    options = (app.config['TRANSLATION_BACKEND'], app.config['TRANSLATION_SEGMENTATION'],
+               app.config['LIBRARY_FUZZY_THRESHOLD'], app.config['DOCX_COMPRESSLEVEL'],
+               app.config['IN_MEMORY_PROCESSING'])
+    key = upload_key(digest, kind, filename, options)
+    job_id = find_identical_job(key)
+    if job_id is not None:
+        discard_upload(source)
+        return job_response(job_id, duplicate=True)
+    try:
+        # The lock orders this record before the one written when the job ends
+        with result_cache_lock:
+            job = submit_job(kind, fn, source, filename, *args, key=key)
+            result_cache.record(key, job.id, library_store.version())
+    except QueueFull:
+        janitor.discard(result_cache.path(key))
+        raise
+    return job_response(job.id)
+
+def find_identical_job(key):
+    """Job id of an identical upload still running or with a live result; otherwise claim the key"""
+    for _ in range(2):
+        if result_cache.claim(key):
+            janitor.hold(result_cache.path(key))
+            metrics.inc('result_cache_lookups_total', result='miss')
+            return None
+        entry = result_cache.read(key)
+        if entry is None:
+            break
+        state = job_manager.get(entry['job_id'])
+        if state is not None and state['status'] in ('queued', 'running'):
+            logger.info(f"Identical upload joins running job {entry['job_id']}")
+            metrics.inc('result_cache_lookups_total', result='in_flight')
+            return entry['job_id']
+        if (state is not None and state['status'] == 'done'
+                and entry['library_version'] == library_store.version()
+                and result_available(state.get('result'))):
+            logger.info(f"Identical upload reuses the result of job {entry['job_id']}")
+            metrics.inc('result_cache_lookups_total', result='completed')
+            return entry['job_id']
+        # Failed, expired or built with another library version
+        result_cache.release(key)
+    metrics.inc('result_cache_lookups_total', result='miss')
+    return None
+
+def result_available(result):
+    """True while the download URL of a job result still serves the file"""
+    url = (result or {}).get('download_url', '')
+    if url.startswith('/result/'):
+        return result_store.exists(url[len('/result/'):])
+    parts = url.split('/')
+    return len(parts) == 4 and os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], parts[2], parts[3]))
+
+def release_upload(source):
+    """Free the upload buffer, or hand the workspace to the janitor"""
+    if isinstance(source, str):
+        janitor.track(os.path.dirname(source))
+    else:
+        source.close()
+
+def read_manifest(token):
+    """Manifest from the client's previous upload; a missing or invalid one starts empty"""
+    if token:
+        try:
+            return Manifest.decode(token, app.config['MANIFEST_KEY'], cache=segment_cache)
+        except ManifestError as e:
+            logger.warning(f"Ignoring manifest: {e}")
+    return Manifest(cache=segment_cache)
+
+def submit_job(kind, fn, source, filename, *args, key=None):
+    """Queue a metered job; the upload is dropped at once if the queue is full"""
+    def run(job, *job_args):
+        try:
+            return fn(job, *job_args)
+        finally:
+            if key is not None:
+                # Results are reused while the library stays as this job left it
+                with result_cache_lock:
+                    result_cache.record(key, job.id, library_store.version())
+                janitor.track(result_cache.path(key))
+
+    try:
+        return job_manager.submit(filename, metered_job(kind, run), source, filename, *args)
+    except QueueFull:
+        discard_upload(source)
+        raise
+
+def open_output(source, output_name):
+    """Output target: a spooled buffer in in-memory mode, else a path in the upload's workspace"""
+    if not isinstance(source, str):
+        return tempfile.SpooledTemporaryFile(max_size=app.config['IN_MEMORY_SPOOL_LIMIT'])
+    return os.path.join(os.path.dirname(source), output_name)
+
+def publish_result(output, output_name):
+    """Job result with the download URL: a short-lived token in in-memory mode"""
+    if isinstance(output, str):
+        workspace_id = os.path.basename(os.path.dirname(output))
+        return {'download_url': f'/download/{workspace_id}/{output_name}', 'filename': output_name}
+    token = result_store.put(output, output_name)
+    return {'download_url': f'/result/{token}', 'filename': output_name}
+
+def publish_details(result, details):
+    """
+    Serve the result fields that quote the document from a short-lived token,
+    like the result itself: the job state file only gets their URL
+    """
+    if details:
+        token = result_store.put(io.BytesIO(json.dumps(details).encode('utf-8')), 'details.json')
+        result['details_url'] = f'/result/{token}'
+    return result
+
+def run_translation_job(job, source, filename, manifest=None):
+    """Full pipeline for one upload (a path, or a buffer in in-memory mode), run by the job pool"""
+    in_memory = not isinstance(source, str)
+
+    # Determine unique base name
+    base_name = os.path.splitext(filename)[0]
+    map_path = None if in_memory else os.path.join(os.path.dirname(source), f"{base_name}.json")
+    
+    try:
+        # Parse once: the same document model feeds extraction and rewrite
+        document = docx_engine.load_document(source)
+        untranslated = []
+        translation_map, detection = process_file_logic(source, map_path, document=document, progress=job.update,
+                                                        usage=job.usage, manifest=manifest, untranslated=untranslated)
         
-        translate_docx(upload_path, map_path, output_docx)
+        # Output name follows the language detected by the pipeline
+        output_name = f"{output_base_name(base_name, detection.lang)}.docx"
+        output = open_output(source, output_name)
         
-        return jsonify({
-            'success': True,
-            'download_url': f'/download/{os.path.basename(output_docx)}',
-            'filename': os.path.basename(output_docx)
-        })
+        job.update(stage='rewrite')
+        translate_docx(source, translation_map, output, document=document)
+        result = publish_result(output, output_name)
+        # Only the count goes to the job state: the segments quote the document
+        result['untranslated_count'] = len(untranslated)
+        details = {}
+        if untranslated:
+            details['untranslated'] = untranslated[:MAX_REPORTED_UNTRANSLATED]
+        if manifest is not None:
+            try:
+                details['manifest'] = manifest.encode(app.config['MANIFEST_KEY'])
+            except ManifestError as e:
+                logger.error(f"Could not build manifest: {e}")
+        return publish_details(result, details)
+    finally:
+        release_upload(source)
+
+@app.route('/upload/bulk', methods=['POST'])
+def upload_bulk():
+    """ZIP of DOCX resumes in, ZIP of translated resumes out (as a job)"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
     
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not file.filename.lower().endswith('.zip'):
+        return jsonify({'error': 'Bulk mode expects a ZIP of DOCX files'}), 400
+    
+    try:
+        filename = secure_filename(file.filename)
+        log_upload(filename)
+        
+        return start_job('bulk', run_bulk_job, file, filename)
+
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Processing error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/download/<filename>')
-def download_file(filename):
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    if os.path.exists(file_path):
+def run_bulk_job(job, source, filename):
+    """
+    Translate every DOCX of a ZIP archive (a path, or a buffer in in-memory
+    mode) with one shared translation map per source language: segments of all
+    documents are extracted first, the union of unique segments is translated
+    once, then every document is rewritten.
+    """
+    try:
+        return _run_bulk_job(job, source, filename)
+    finally:
+        release_upload(source)
+
+def _run_bulk_job(job, source, filename):
+    # 1. Extract & detect every document
+    job.update(stage='extract')
+    documents = []  # (output name, source bytes, document model, detected lang)
+    segments_by_lang = {}  # {lang: ordered set of segments}
+    total_segments = 0
+    with zipfile.ZipFile(source, 'r') as zin:
+        entries = [info for info in zin.infolist()
+                   if not (info.is_dir() or info.filename.startswith('__MACOSX/'))
+                   and not os.path.basename(info.filename).startswith('~$')
+                   and allowed_file(os.path.basename(info.filename))]
+        if len(entries) > app.config['BULK_MAX_FILES']:
+            raise Exception(f"Archive holds more than {app.config['BULK_MAX_FILES']} DOCX files")
+        # Checked on the declared sizes before reading anything: zipfile never
+        # returns more than the declared size of an entry
+        limit = app.config['BULK_MAX_UNCOMPRESSED_BYTES']
+        if sum(info.file_size for info in entries) > limit:
+            raise Exception(f"Archive expands to more than {limit // (1024 * 1024)} MB of DOCX files")
+        for info in entries:
+            name = os.path.basename(info.filename)
+            data = zin.read(info)
+            document = docx_engine.load_document(io.BytesIO(data))
+            segments = document.segments()
+            detected_lang = detect_language(segments).lang
+            total_segments += len(segments)
+            segments_by_lang.setdefault(detected_lang, {}).update(dict.fromkeys(segments))
+            base_name = os.path.splitext(secure_filename(name) or 'document.docx')[0]
+            documents.append((output_base_name(base_name, detected_lang), data, document, detected_lang))
+
+    if not documents:
+        raise Exception("No DOCX files found in the archive")
+    unique_segments = sum(len(segs) for segs in segments_by_lang.values())
+    job.update(documents=len(documents), segments=total_segments, unique_segments=unique_segments)
+    logger.info(f"Bulk: {len(documents)} documents, {total_segments} segments, {unique_segments} unique")
+
+    # 2. Translate the union of segments once per source language
+    job.usage.update(documents=len(documents), segments=unique_segments)
+    untranslated = {lang: [] for lang in segments_by_lang}
+    mappings = {lang: translate_segments(list(segs), lang, job.update, job.usage, untranslated=untranslated[lang])
+                for lang, segs in segments_by_lang.items()}
+
+    # 3. Rewrite every document from the shared map
+    job.update(stage='rewrite')
+    output_name = f"{os.path.splitext(filename)[0]}_translated.zip"
+    output = open_output(source, output_name)
+    used_names = set()
+    untranslated_by_document = {}
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for i, (output_base, data, document, detected_lang) in enumerate(documents, 1):
+            entry_name = f"{output_base}.docx"
+            suffix = 2
+            while entry_name in used_names:
+                entry_name = f"{output_base}_{suffix}.docx"
+                suffix += 1
+            used_names.add(entry_name)
+
+            document_output = io.BytesIO()
+            docx_engine.translate_docx(io.BytesIO(data), mappings[detected_lang], document_output, document=document,
+                                       compresslevel=app.config['DOCX_COMPRESSLEVEL'])
+            zout.writestr(entry_name, document_output.getvalue())
+            job.update(documents_rewritten=i)
+
+            # Failed strings may be pieces of a segmented paragraph
+            segments = document.segments()
+            failed = [u for u in untranslated[detected_lang] if any(u in segment for segment in segments)]
+            if failed:
+                untranslated_by_document[entry_name] = failed[:MAX_REPORTED_UNTRANSLATED]
+
+    result = publish_result(output, output_name)
+    result['untranslated_count'] = sum(len(segs) for segs in untranslated.values())
+    return publish_details(result, {'untranslated': untranslated_by_document} if untranslated_by_document else {})
+
+@app.route('/ready')
+def ready():
+    """Readiness probe of the worker that answers: 200 once warm, 503 before"""
+    if not ensure_warm():
+        return jsonify({'ready': False, 'error': worker_state['error']}), 503
+    return jsonify({
+        'ready': True,
+        'pid': os.getpid(),
+        'warmup_seconds': round(worker_state['warmup_seconds'], 3),
+        'uptime_seconds': round(time.time() - STARTED_AT, 3),
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    state = job_manager.get(job_id)
+    if state is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(state)
+
+@app.route('/download/<workspace_id>/<filename>')
+def download_file(workspace_id, filename):
+    if not workspace_id.isalnum():
+        return jsonify({'error': 'File not found'}), 404
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], workspace_id, secure_filename(filename))
+    if os.path.isfile(file_path):
         return send_file(file_path, as_attachment=True)
     return jsonify({'error': 'File not found'}), 404
 
+@app.route('/result/<token>')
+def download_result(token):
+    result = result_store.get(token)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired'}), 404
+    filename, data = result
+    return send_file(io.BytesIO(data), as_attachment=True, download_name=filename)
+
 if __name__ == '__main__':
     print(f"Upload folder: {UPLOAD_FOLDER}")
-    print(f"Master library: {MASTER_LIBRARY}")
+    print(f"Master library: {MASTER_LIBRARY_DB} (export: python library_store.py export)")
     print("Starting Flask server on http://localhost:5000")
     app.run(debug=False, host='0.0.0.0', port=5000)
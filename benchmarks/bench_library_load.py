@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Library load time and memory per process: the master library grown with
+synthetic terms, loaded in a fresh process for each mode:
+
+    json      json.load of the pretty-printed library, then the in-memory index
+    store     SQLite snapshot, then the in-memory index (LibraryIndex without artifact)
+    artifact  the compiled library mapped with mmap (LibraryIndex with artifact_path)
+
+Each child reports its load time, its resident memory after a round of
+lookups and the anonymous part of it (heap: the memory no other worker can
+share, unlike the mapped pages of the page cache; Linux only), and the mean
+latency of exact and near-duplicate lookups. Run from the repository root:
+
+    python benchmarks/bench_library_load.py --terms 50000 --output load.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import load_library
+from fuzzy_match import RECOMMENDED_FUZZY_THRESHOLD
+
+MODES = ('json', 'store', 'artifact')
+LOOKUPS = 2000
+SYLLABLES = [c + v for c in 'bcdfglmnprstv' for v in ('a', 'e', 'i', 'o', 'u', 'é', 'ou', 'an', 'on')]
+
+
+def memory_kb():
+    """(resident, anonymous) KB of this process; anonymous is None outside Linux"""
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line[0].isdigit())
+        kb = {name: int(value.split()[0]) for name, value in fields.items()}
+        return kb['Rss'], kb['Anonymous']
+    except (OSError, KeyError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return (rss // 1024 if sys.platform == 'darwin' else rss), None
+
+
+def word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_terms(count, seed=1):
+    """The master library plus count client terms with a varied vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = [word(rng) for _ in range(5000)]
+    terms = dict(load_library())
+    while len(terms) < count + len(load_library()):
+        words = rng.sample(vocabulary, rng.randint(1, 6))
+        terms[' '.join(words).capitalize()] = ' '.join(reversed(words)).capitalize()
+    return terms
+
+
+def queries(terms, count=LOOKUPS, seed=2):
+    """Exact keys, and the same keys with a one-letter typo for near-duplicate lookups"""
+    rng = random.Random(seed)
+    exact = rng.sample(sorted(terms), min(count, len(terms)))
+    typos = [k[:len(k) // 2] + k[len(k) // 2 + 1:] for k in exact[:count // 10]]
+    return exact, typos
+
+
+def child(mode, workdir):
+    """Load the library once in this process and print the measurements as JSON"""
+    from library_store import LibraryIndex, LibraryStore
+
+    baseline_rss, baseline_anonymous = memory_kb()
+    started = time.perf_counter()
+    if mode == 'json':
+        with open(os.path.join(workdir, 'library.json'), 'r', encoding='utf-8') as f:
+            terms = json.load(f)
+        index = LibraryIndex(None, RECOMMENDED_FUZZY_THRESHOLD)
+        index._build(terms)
+    else:
+        store = LibraryStore(os.path.join(workdir, 'library.db'), json_path=None)
+        index = LibraryIndex(store, RECOMMENDED_FUZZY_THRESHOLD, artifact_path=os.path.join(workdir, 'library.idx') if mode == 'artifact' else None)
+        index.refresh()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    with open(os.path.join(workdir, 'queries.json'), 'r', encoding='utf-8') as f:
+        exact, typos = json.load(f)
+    started = time.perf_counter()
+    assert all(index.lookup(text, 'fr') for text in exact)
+    exact_us = (time.perf_counter() - started) / len(exact) * 1e6
+    started = time.perf_counter()
+    for text in typos:
+        index.match(text, 'fr')
+    fuzzy_us = (time.perf_counter() - started) / max(len(typos), 1) * 1e6
+
+    rss, anonymous = memory_kb()
+    print(json.dumps({
+        'load_ms': round(load_ms, 1),
+        'rss_kb': rss - baseline_rss,
+        'anonymous_kb': None if anonymous is None else anonymous - baseline_anonymous,
+        'exact_us': round(exact_us, 2),
+        'fuzzy_us': round(fuzzy_us, 1),
+    }))
+
+
+def run_benchmark(count, modes=MODES):
+    from library_store import LibraryIndex, LibraryStore
+
+    terms = synthetic_terms(count)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, 'library.json'), 'w', encoding='utf-8') as f:
+            json.dump(terms, f, indent=4, ensure_ascii=False)
+        with open(os.path.join(workdir, 'queries.json'), 'w', encoding='utf-8') as f:
+            json.dump(queries(terms), f, ensure_ascii=False)
+        store = LibraryStore(os.path.join(workdir, 'library.db'), json_path=None)
+        store.add_terms(terms)
+        started = time.perf_counter()
+        LibraryIndex(store, artifact_path=os.path.join(workdir, 'library.idx')).refresh()
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        for mode in modes:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, workdir],
+                                    check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+        sizes = {name: os.path.getsize(os.path.join(workdir, name)) for name in ('library.json', 'library.idx')}
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'terms': len(terms),
+            'json_bytes': sizes['library.json'],
+            'artifact_bytes': sizes['library.idx'],
+            'compile_ms': round(compile_ms, 1),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Library load time and memory: JSON, SQLite and compiled artifact")
+    parser.add_argument("--terms", type=int, default=50000, help="Synthetic terms added to the master library")
+    parser.add_argument("--modes", nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    current = run_benchmark(args.terms, args.modes)
+    meta = current['meta']
+    print(f"Library: {meta['terms']} terms, JSON {meta['json_bytes'] / 1e6:.1f} MB, "
+          f"artifact {meta['artifact_bytes'] / 1e6:.1f} MB (compiled in {meta['compile_ms']:.0f} ms)")
+    for mode, r in current['results'].items():
+        heap = '' if r['anonymous_kb'] is None else f"   anonymous {r['anonymous_kb'] / 1024:6.1f} MB"
+        print(f"  {mode:9s} load {r['load_ms']:8.1f} ms   rss {r['rss_kb'] / 1024:6.1f} MB{heap}"
+              f"   exact {r['exact_us']:6.2f} us   fuzzy {r['fuzzy_us']:7.1f} us")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark library lookups on the master library and the template terms of
+triggers.txt: hit rate of the exact + normalized lookups (before) versus the
+approximate index (folded and near-duplicate matches), and lookup latency.
+Each trigger is queried as-is and as the variants seen in real resumes:
+other case, missing accents, changed punctuation and two swapped letters.
+Run from the repository root:
+
+    python benchmarks/bench_library_match.py --threshold 0.9
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fuzzy_match import RECOMMENDED_FUZZY_THRESHOLD
+from library_store import LibraryIndex, LibraryStore
+
+TRIGGER_RE = re.compile(r'^\s+(.+?)\s+->\s+(.+?)\s*$')
+
+
+def load_triggers(path):
+    """(French queries, English queries) from the two sections of triggers.txt"""
+    queries = {'fr': [], 'en': []}
+    section = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('--- FR'):
+                section = 'fr'
+            elif line.startswith('--- EN'):
+                section = 'en'
+            match = TRIGGER_RE.match(line)
+            if section and match:
+                # FR section: template -> key; EN section: French key -> English value
+                queries[section].append(match.group(1) if section == 'fr' else match.group(2))
+    return queries
+
+
+def strip_accents(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def variants(text):
+    words = text.split()
+    longest = max(words, key=len) if words else ''
+    middle = len(longest) // 2
+    swapped = longest[:middle - 1] + longest[middle] + longest[middle - 1] + longest[middle + 1:]
+    typo = text.replace(longest, swapped, 1) if len(longest) > 5 else text
+    return {
+        'as-is': text,
+        'upper': text.upper(),
+        'lower': text.lower(),
+        'no accents': strip_accents(text),
+        'punctuation': text.rstrip(':;. ') + ' ;',
+        'typo': typo,
+    }
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Library approximate-match benchmark")
+    parser.add_argument("--library", default=os.path.join(ROOT, 'master_library.json'))
+    parser.add_argument("--triggers", default=os.path.join(ROOT, 'triggers.txt'))
+    parser.add_argument("--threshold", type=float, default=RECOMMENDED_FUZZY_THRESHOLD)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LibraryIndex(LibraryStore(os.path.join(tmp, 'bench.db'), args.library), args.threshold)
+        start = time.perf_counter()
+        index.refresh()
+        print(f"Library: {len(index.forward)} terms, index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    queries = load_triggers(args.triggers)
+    timings = []
+    for lang in ('fr', 'en'):
+        print(f"\n{lang.upper()} triggers ({len(queries[lang])})")
+        print(f"  {'variant':12s} {'before':>8s} {'after':>8s}   match types")
+        for name in variants('x'):
+            before = after = 0
+            types = {}
+            for query in queries[lang]:
+                text = variants(query)[name]
+                start = time.perf_counter()
+                _, match_type = index.match(text, lang)
+                timings.append(time.perf_counter() - start)
+                if match_type:
+                    after += 1
+                    types[match_type] = types.get(match_type, 0) + 1
+                if match_type in ('exact', 'normalized'):
+                    before += 1
+            total = len(queries[lang]) or 1
+            summary = ', '.join(f"{k} {v}" for k, v in sorted(types.items()))
+            print(f"  {name:12s} {before / total * 100:7.1f}% {after / total * 100:7.1f}%   {summary}")
+
+    print(f"\nLookup latency: mean {sum(timings) / len(timings) * 1e6:.1f} us, "
+          f"p99 {percentile(timings, 99) * 1e6:.1f} us, max {max(timings) * 1e6:.1f} us")
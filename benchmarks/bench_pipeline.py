@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Stage-by-stage benchmark of the translation pipeline on synthetic resumes
+(see corpus.py): extraction, language detection, library lookup,
+translation with the fake backend, DOCX rewrite, and the whole pipeline
+end to end. Results are medians in milliseconds, saved as JSON and
+compared against a baseline to catch regressions. Run from the repository
+root:
+
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --baseline bench.json --tolerance 0.25
+
+The exit status is 1 when a stage is slower than the baseline beyond the
+tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import docx_engine
+from corpus import build_resume, load_library
+from language_detection import detect_language
+from library_store import LibraryIndex, LibraryStore
+from pipeline import translate_missing
+from segmentation import is_passthrough
+from translation_backends import FakeBackend
+
+PROFILES = {
+    'small': dict(paragraphs=60, tables=1, media_kb=0),
+    'medium': dict(paragraphs=300, tables=3, media_kb=512),
+    'large': dict(paragraphs=1500, tables=8, media_kb=4096),
+}
+STAGES = ('extract', 'detect', 'library', 'translate', 'rewrite', 'end_to_end')
+NOISE_FLOOR_MS = 1.0  # Differences below this are never regressions
+
+
+def run_pipeline(source, library_index, backend, timings=None):
+    """One pass over a resume; records per-stage seconds into timings when given"""
+    clock = time.perf_counter
+    mark = clock()
+
+    def lap(stage):
+        nonlocal mark
+        now = clock()
+        if timings is not None:
+            timings.setdefault(stage, []).append(now - mark)
+        mark = now
+
+    document = docx_engine.load_document(io.BytesIO(source))
+    segments = document.segments()
+    lap('extract')
+
+    lang = detect_language(segments).lang
+    lap('detect')
+
+    mapping = {}
+    missing = []
+    for s in segments:
+        if not s.strip():
+            continue
+        trans, _ = library_index.match(s, lang)
+        if trans:
+            mapping[s] = trans
+        elif is_passthrough(s):
+            mapping[s] = s
+        else:
+            missing.append(s)
+    lap('library')
+
+    if missing:
+        translate_missing(missing, lang, 'en' if lang == 'fr' else 'fr', backend, mapping, rate_limit=0)
+    lap('translate')
+
+    output = io.BytesIO()
+    docx_engine.translate_docx(io.BytesIO(source), mapping, output, document=document)
+    lap('rewrite')
+    return len(segments), len(missing)
+
+
+def run_benchmark(profiles, repeat=5, library_scale=0, fake_latency=0.0, hit_ratio=0.5, lang='fr'):
+    """Return the results dict: {'meta': {...}, 'results': {profile: {stage: median ms}}}"""
+    library = load_library()
+    terms = dict(library)
+    # Grow the library with synthetic terms to watch lookup cost as it grows
+    terms.update({f"Terme synthétique {i}": f"Synthetic term {i}" for i in range(library_scale)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LibraryStore(os.path.join(tmp, 'bench.db'), json_path=None)
+        store.add_terms(terms)
+        index = LibraryIndex(store)
+        started = time.perf_counter()
+        index.refresh()
+        index_build_ms = (time.perf_counter() - started) * 1000
+
+    backend = FakeBackend(latency=fake_latency)
+    results = {}
+    for name in profiles:
+        shape = PROFILES[name]
+        source = build_resume(library=library, library_hit_ratio=hit_ratio, lang=lang, **shape)
+        run_pipeline(source, index, backend)  # warm-up
+        timings = {}
+        end_to_end = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            segments, missing = run_pipeline(source, index, backend, timings)
+            end_to_end.append(time.perf_counter() - started)
+        timings['end_to_end'] = end_to_end
+        results[name] = {stage: round(statistics.median(timings[stage]) * 1000, 3) for stage in STAGES}
+        results[name].update(segments=segments, missing=missing, docx_bytes=len(source))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'library_terms': len(terms),
+            'index_build_ms': round(index_build_ms, 3),
+            'repeat': repeat,
+            'fake_latency': fake_latency,
+            'hit_ratio': hit_ratio,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return [(profile, stage, baseline ms, current ms)] for stages slower than tolerance allows"""
+    regressions = []
+    for profile, stages in current['results'].items():
+        base = baseline.get('results', {}).get(profile)
+        if not base:
+            continue
+        for stage in STAGES:
+            before, after = base.get(stage), stages[stage]
+            if before is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_MS:
+                regressions.append((profile, stage, before, after))
+    return regressions
+
+
+def print_results(current, baseline=None):
+    for profile, stages in current['results'].items():
+        base = (baseline or {}).get('results', {}).get(profile, {})
+        print(f"\n{profile}: {stages['segments']} segments, {stages['missing']} sent to backend, "
+              f"{stages['docx_bytes'] / 1e6:.2f} MB")
+        for stage in STAGES:
+            line = f"  {stage:11s} {stages[stage]:9.2f} ms"
+            if stage in base and base[stage]:
+                line += f"   baseline {base[stage]:9.2f} ms ({stages[stage] / base[stage]:.2f}x)"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmark on synthetic resumes")
+    parser.add_argument("--profiles", nargs='+', choices=sorted(PROFILES), default=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--library-scale", type=int, default=0, help="Synthetic terms added to the library")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="Fake backend delay per batch (seconds)")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Share of paragraphs that are library terms")
+    parser.add_argument("--lang", choices=['fr', 'en'], default='fr')
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    current = run_benchmark(args.profiles, args.repeat, args.library_scale, args.fake_latency, args.hit_ratio, args.lang)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"Library: {current['meta']['library_terms']} terms (index built in {current['meta']['index_build_ms']:.1f} ms)")
+    print_results(current, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if baseline:
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for profile, stage, before, after in regressions:
+                print(f"  {profile}/{stage}: {before:.2f} ms -> {after:.2f} ms")
+            sys.exit(1)
+        print(f"\n✅ No regression beyond {args.tolerance:.0%}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark translate_docx on a media-heavy DOCX: raw copy of untouched
+entries versus the previous approach of inflating and recompressing every
+entry. Run from the repository root:
+
+    python benchmarks/bench_rewrite.py --media-mb 12 --paragraphs 2000
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx_engine
+
+W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def build_media_docx(paragraphs, media_mb, media_files=6):
+    """Synthetic resume: text paragraphs plus incompressible embedded media"""
+    body = ''.join(
+        f'<w:p><w:r><w:t>Mandat {i} : conception et architecture</w:t></w:r></w:p>'
+        for i in range(paragraphs)
+    )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', '<Types/>')
+        z.writestr('word/document.xml', f'<w:document {W_NS}><w:body>{body}</w:body></w:document>')
+        size = media_mb * 1024 * 1024 // media_files
+        for i in range(media_files):
+            z.writestr(f'word/media/image{i + 1}.png', os.urandom(size))
+        z.writestr('word/fontTable.xml', '<w:fonts/>' * 2000)
+    return buf.getvalue()
+
+
+def legacy_translate_docx(source_docx, translation_map, output_docx, document):
+    """Previous behaviour: every entry is read fully and recompressed"""
+    with zipfile.ZipFile(source_docx, 'r') as zin, zipfile.ZipFile(output_docx, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            content = zin.read(info.filename)
+            part = document.parts.get(info.filename)
+            if part is not None:
+                zout.writestr(info.filename, docx_engine.rewrite_part(part, translation_map).encode('utf-8'))
+            else:
+                zout.writestr(info, content)
+
+
+def measure(fn, source, translation_map, document, repeat):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        output = io.BytesIO()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(io.BytesIO(source), translation_map, output, document=document)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(timings), peak, len(output.getvalue())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="translate_docx rewrite benchmark")
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--media-mb", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = build_media_docx(args.paragraphs, args.media_mb)
+    document = docx_engine.load_document(io.BytesIO(source))
+    translation_map = {s: re.sub('conception', 'design', s) for s in document.segments()}
+
+    print(f"Source: {len(source) / 1e6:.1f} MB, {args.paragraphs} paragraphs, {args.media_mb} MB media")
+    for label, fn in [("recompress all (before)", legacy_translate_docx), ("raw copy (translate_docx)", docx_engine.translate_docx)]:
+        best, peak, size = measure(fn, source, translation_map, document, args.repeat)
+        print(f"  {label:28s} {best * 1000:8.1f} ms   peak alloc {peak / 1e6:6.1f} MB   output {size / 1e6:.1f} MB")
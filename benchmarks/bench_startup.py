@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Time to first successful upload after a deploy: starts gunicorn on the app
+(fake backend, throwaway working directory), polls GET /ready, then uploads
+a synthetic resume and waits for its job and download. Each mode is
+started repeat times and reported as medians in seconds, from the launch
+of gunicorn to:
+
+    ready          first 200 from /ready (a warm worker)
+    first_upload   the translated document downloaded
+
+Compares --preload (app imported once by the master, workers forked from
+it) with workers importing the app themselves. Run from the repository root:
+
+    python benchmarks/bench_startup.py --workers 2 --repeat 3 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import build_resume, load_library
+from server import GunicornServer, http, multipart, wait_until
+
+MODES = {'preload': ['--preload'], 'no_preload': []}
+
+
+def measure(mode, workers, source, timeout=60):
+    """Launch gunicorn once; returns {'ready': s, 'first_upload': s}"""
+    with GunicornServer(workers, MODES[mode]) as server:
+        ready = server.wait_ready(timeout)
+        base = server.url
+        status, body = http(f'{base}/upload', *multipart('CV_Startup_FR.docx', source))
+        if status != 202:
+            raise RuntimeError(f"Upload refused ({status}): {body[:200]}")
+        status_url = json.loads(body)['status_url']
+
+        def finished():
+            job = json.loads(http(f'{base}{status_url}')[1] or b'{}')
+            return job if job.get('status') in ('done', 'error') else None
+
+        job = wait_until(server.started + timeout, finished)
+        if job['status'] != 'done' or http(f"{base}{job['result']['download_url']}")[0] != 200:
+            raise RuntimeError(f"First upload failed: {job}")
+        first_upload = time.perf_counter() - server.started
+    return {'ready': ready, 'first_upload': first_upload}
+
+
+def run_benchmark(modes=tuple(MODES), workers=2, repeat=3, paragraphs=60):
+    source = build_resume(paragraphs=paragraphs, tables=1, library=load_library(), library_hit_ratio=0.5)
+    results = {}
+    for mode in modes:
+        runs = [measure(mode, workers, source) for _ in range(repeat)]
+        results[mode] = {key: round(statistics.median(run[key] for run in runs), 3) for key in ('ready', 'first_upload')}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'workers': workers,
+            'repeat': repeat,
+            'paragraphs': paragraphs,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time from gunicorn launch to a ready worker and a first upload")
+    parser.add_argument("--modes", nargs='+', choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=60, help="Size of the uploaded resume")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    current = run_benchmark(args.modes, args.workers, args.repeat, args.paragraphs)
+    print(f"gunicorn, {args.workers} workers, fake backend, median of {args.repeat}:")
+    for mode, times in current['results'].items():
+        print(f"  {mode:11s} ready {times['ready']:6.2f} s   first upload {times['first_upload']:6.2f} s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
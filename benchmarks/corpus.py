@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Synthetic resume corpus for benchmarks and load tests.
+
+build_resume() produces a DOCX of controlled shape: paragraph count,
+tables, headers/footers, embedded media, share of paragraphs in the other
+language and share of paragraphs that are master library terms. Output is
+deterministic for a given seed. Write a corpus to disk with:
+
+    python benchmarks/corpus.py corpus/ --count 20 --paragraphs 300 --media-kb 512
+"""
+import argparse
+import io
+import json
+import os
+import random
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+VOCABULARY = {
+    'fr': {
+        'verbs': ["Conception", "Pilotage", "Mise en place", "Animation", "Migration", "Analyse", "Développement", "Suivi"],
+        'objects': ["d'une plateforme de données", "des ateliers avec les équipes métier", "du socle cloud",
+                    "des pipelines d'intégration continue", "d'un entrepôt de données", "des tableaux de bord"],
+        'contexts': ["pour un client bancaire", "dans un contexte agile", "en lien avec la direction",
+                     "sur un périmètre international", "avec une équipe de huit personnes"],
+    },
+    'en': {
+        'verbs': ["Design", "Management", "Implementation", "Facilitation", "Migration", "Analysis", "Development", "Monitoring"],
+        'objects': ["of a data platform", "of workshops with business teams", "of the cloud foundation",
+                    "of continuous integration pipelines", "of a data warehouse", "of dashboards"],
+        'contexts': ["for a banking client", "in an agile context", "with senior management",
+                     "across international sites", "with a team of eight people"],
+    },
+}
+
+
+def load_library(path=None):
+    with open(path or os.path.join(ROOT, 'master_library.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def paragraph(text):
+    return f'<w:p><w:pPr><w:pStyle w:val="Normal"/></w:pPr><w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def sentence(rng, lang, index):
+    words = VOCABULARY[lang]
+    text = f"{rng.choice(words['verbs'])} {rng.choice(words['objects'])} {rng.choice(words['contexts'])}"
+    # Make most sentences unique, like real experience bullets
+    return f"{text} ({2000 + index % 25})" if rng.random() < 0.7 else text
+
+
+class TextSource:
+    """Paragraph texts with a given share of library terms and of the other language"""
+
+    def __init__(self, rng, lang, library, hit_ratio, mix_ratio):
+        self.rng = rng
+        self.lang = lang
+        self.hit_ratio = hit_ratio
+        self.mix_ratio = mix_ratio
+        terms = list(library.items())
+        # English resumes hit the library through its values
+        self.terms = [fr for fr, _ in terms] if lang == 'fr' else [en for _, en in terms]
+        self.count = 0
+
+    def next(self):
+        self.count += 1
+        if self.terms and self.rng.random() < self.hit_ratio:
+            return self.rng.choice(self.terms)
+        lang = self.lang
+        if self.rng.random() < self.mix_ratio:
+            lang = 'en' if lang == 'fr' else 'fr'
+        return sentence(self.rng, lang, self.count)
+
+
+def table(source, rows, cols=3):
+    cells = ''.join(
+        '<w:tr>' + ''.join(f'<w:tc><w:tcPr/>{paragraph(source.next())}</w:tc>' for _ in range(cols)) + '</w:tr>'
+        for _ in range(rows)
+    )
+    return f'<w:tbl><w:tblPr/>{cells}</w:tbl>'
+
+
+def build_resume(paragraphs=200, tables=2, table_rows=5, headers=True, media_kb=0, media_files=2,
+                 lang='fr', library_hit_ratio=0.5, mix_ratio=0.0, library=None, seed=0):
+    """Return the bytes of a synthetic resume DOCX"""
+    rng = random.Random(seed)
+    source = TextSource(rng, lang, library if library is not None else load_library(), library_hit_ratio, mix_ratio)
+
+    body = []
+    # Tables are spread evenly between the paragraphs
+    table_after = {paragraphs * (t + 1) // (tables + 1) for t in range(tables)}
+    for i in range(paragraphs):
+        body.append(paragraph(source.next()))
+        if i + 1 in table_after:
+            body.append(table(source, table_rows))
+    document = f'<w:document {W_NS}><w:body>{"".join(body)}<w:sectPr/></w:body></w:document>'
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', CONTENT_TYPES)
+        z.writestr('word/document.xml', document)
+        if headers:
+            z.writestr('word/header1.xml', f'<w:hdr {W_NS}>{paragraph(source.next())}</w:hdr>')
+            z.writestr('word/footer1.xml', f'<w:ftr {W_NS}>{paragraph(source.next())}</w:ftr>')
+        if media_kb:
+            media_rng = random.Random(seed + 1)
+            size = media_kb * 1024 // media_files
+            for i in range(media_files):
+                z.writestr(f'word/media/image{i + 1}.png', media_rng.randbytes(size))
+    return buf.getvalue()
+
+
+def write_corpus(directory, count, **options):
+    """Write count resumes (alternating FR/EN unless lang is given); returns the paths"""
+    os.makedirs(directory, exist_ok=True)
+    library = options.pop('library', None) or load_library()
+    lang = options.pop('lang', None)
+    paths = []
+    for i in range(count):
+        doc_lang = lang or ('fr' if i % 2 == 0 else 'en')
+        path = os.path.join(directory, f"resume_{i:04d}_{doc_lang.upper()}.docx")
+        with open(path, 'wb') as f:
+            f.write(build_resume(lang=doc_lang, library=library, seed=i, **options))
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--tables", type=int, default=2)
+    parser.add_argument("--media-kb", type=int, default=0)
+    parser.add_argument("--lang", choices=['fr', 'en'], default=None, help="Default: alternate FR and EN")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Share of paragraphs that are library terms")
+    parser.add_argument("--mix-ratio", type=float, default=0.0, help="Share of sentences in the other language")
+    args = parser.parse_args()
+
+    paths = write_corpus(args.directory, args.count, paragraphs=args.paragraphs, tables=args.tables,
+                         media_kb=args.media_kb, lang=args.lang, library_hit_ratio=args.hit_ratio,
+                         mix_ratio=args.mix_ratio)
+    print(f"📂 Wrote {len(paths)} resumes to {args.directory}")
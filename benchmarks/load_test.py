@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Load test of the web deployment: starts gunicorn on the app with the fake
+translation backend (see server.py), or targets a running server with
+--url, then replays synthetic resumes (see corpus.py) through the real
+upload, job polling and download endpoints.
+
+Two ways to drive it:
+
+    --concurrency N   closed loop: N clients, each uploading again as soon
+                      as its previous upload is downloaded
+    --rate R          open loop: R uploads per second on average (Poisson
+                      arrivals), whatever the server's pace; latency counts
+                      from the scheduled arrival, so a backlog shows up in it
+
+for --duration seconds or --requests uploads. --mix picks the resume sizes
+(small=0.7,medium=0.25,large=0.05 by default). Every upload has its own
+file name, so identical-upload reuse never answers from a previous job.
+
+Reports throughput (uploads downloaded per second), end-to-end latency
+percentiles (upload to downloaded result) overall and per size, the error
+rate by kind (rejected: 503, queue full; error: failed upload, job or
+download; timeout) and worker saturation: the translation jobs running
+across all workers, sampled from /metrics, against the job slots
+(gunicorn workers x JOB_WORKERS). Run from the repository root:
+
+    python benchmarks/load_test.py --workers 2 --concurrency 8 --duration 30 --output load.json
+    python benchmarks/load_test.py --rate 3 --duration 60 --fake-latency 0.2 --baseline load.json
+
+With --baseline, the exit status is 1 when throughput drops or p95 latency
+grows beyond --tolerance.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import build_resume, load_library
+from server import GunicornServer, http, multipart
+
+PROFILES = {
+    'small': dict(paragraphs=60, tables=1, media_kb=0),
+    'medium': dict(paragraphs=300, tables=3, media_kb=256),
+    'large': dict(paragraphs=1200, tables=6, media_kb=2048),
+}
+DEFAULT_MIX = 'small=0.7,medium=0.25,large=0.05'
+DEFAULT_JOB_WORKERS = 2
+MAX_OPEN_LOOP_CLIENTS = 256
+SAMPLE_INTERVAL = 0.5
+METRIC_LINE_RE = re.compile(r'^resume_translator_(jobs_running|http_requests_in_flight)(?:\{[^}]*\})? ([-0-9.e+]+)$')
+
+
+def parse_mix(text):
+    """'small=0.7,large=0.3' -> {'small': 0.7, 'large': 0.3}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in PROFILES:
+            raise ValueError(f"Unknown resume size '{name}' (choose from {', '.join(PROFILES)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_documents(mix, per_profile=8):
+    """{profile: [DOCX bytes]}, alternating French and English resumes"""
+    library = load_library()
+    return {
+        name: [build_resume(lang='fr' if i % 2 == 0 else 'en', library=library, seed=i, **PROFILES[name])
+               for i in range(per_profile)]
+        for name in mix
+    }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0-100) of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def latency_summary(values):
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 50), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3),
+    }
+
+
+def upload_once(base_url, name, profile, content, scheduled, poll_interval, job_timeout):
+    """One upload, job and download; returns its record"""
+    record = {'profile': profile, 'status': 'ok'}
+    status, body = http(f'{base_url}/upload', *multipart(name, content))
+    record['accept_seconds'] = time.perf_counter() - scheduled
+    if status != 202:
+        record['status'] = 'rejected' if status == 503 else 'error'
+        record['error'] = f"upload: HTTP {status}"
+        return record
+    status_url = json.loads(body)['status_url']
+    deadline = time.perf_counter() + job_timeout
+    while True:
+        status, body = http(f'{base_url}{status_url}')
+        job = json.loads(body) if status == 200 else {}
+        if job.get('status') in ('done', 'error'):
+            break
+        if time.perf_counter() > deadline:
+            record.update(status='timeout', error=f"job still {job.get('stage', 'unknown')}")
+            return record
+        time.sleep(poll_interval)
+    if job['status'] != 'done':
+        record.update(status='error', error=f"job: {job.get('error')}")
+        return record
+    status, _ = http(f"{base_url}{job['result']['download_url']}")
+    if status != 200:
+        record.update(status='error', error=f"download: HTTP {status}")
+        return record
+    record['seconds'] = time.perf_counter() - scheduled
+    return record
+
+
+class SaturationSampler:
+    """Samples running jobs and in-flight requests across workers from /metrics"""
+
+    def __init__(self, base_url, interval=SAMPLE_INTERVAL):
+        self.base_url = base_url
+        self.interval = interval
+        self.samples = []  # (jobs running, requests in flight)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='saturation', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self):
+        status, body = http(f'{self.base_url}/metrics', timeout=5)
+        if status != 200:
+            return None
+        totals = {'jobs_running': 0.0, 'http_requests_in_flight': 0.0}
+        for line in body.decode('utf-8').splitlines():
+            match = METRIC_LINE_RE.match(line)
+            if match:
+                totals[match.group(1)] += float(match.group(2))
+        # Not counting this /metrics request
+        return totals['jobs_running'], max(totals['http_requests_in_flight'] - 1, 0)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            sample = self.sample()
+            if sample is not None:
+                self.samples.append(sample)
+
+    def summary(self, capacity=None):
+        if not self.samples:
+            return {}
+        jobs = [s[0] for s in self.samples]
+        requests = [s[1] for s in self.samples]
+        summary = {
+            'samples': len(self.samples),
+            'jobs_running_mean': round(sum(jobs) / len(jobs), 2),
+            'jobs_running_max': max(jobs),
+            'requests_in_flight_mean': round(sum(requests) / len(requests), 2),
+            'requests_in_flight_max': max(requests),
+        }
+        if capacity:
+            summary['job_slots'] = capacity
+            summary['utilization'] = round(summary['jobs_running_mean'] / capacity, 3)
+            summary['saturated_share'] = round(sum(1 for j in jobs if j >= capacity) / len(jobs), 3)
+        return summary
+
+
+def run_load_test(base_url, documents, mix, concurrency=None, rate=None, duration=None, requests=None,
+                  poll_interval=0.05, job_timeout=120, capacity=None, seed=0):
+    """Replay uploads against base_url; returns the results dict (see print_results)"""
+    if (concurrency is None) == (rate is None):
+        raise ValueError("Give either concurrency or rate")
+    if duration is None and requests is None:
+        raise ValueError("Give a duration or a number of requests")
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    counter = itertools.count()
+    lock = threading.Lock()
+    records = []
+
+    def next_upload():
+        """(file name, profile, content), or None once the request budget is spent"""
+        with lock:
+            n = next(counter)
+            if requests is not None and n >= requests:
+                return None
+            profile = rng.choices(names, weights)[0]
+            content = documents[profile][n % len(documents[profile])]
+        lang = 'FR' if (n % len(documents[profile])) % 2 == 0 else 'EN'
+        return f"Load_{n:06d}_{lang}.docx", profile, content
+
+    def run(upload, scheduled):
+        record = upload_once(base_url, *upload, scheduled, poll_interval, job_timeout)
+        with lock:
+            records.append(record)
+
+    sampler = SaturationSampler(base_url)
+    sampler.start()
+    started = time.perf_counter()
+    stop_at = started + duration if duration is not None else float('inf')
+    if concurrency is not None:
+        def client():
+            while time.perf_counter() < stop_at:
+                upload = next_upload()
+                if upload is None:
+                    return
+                run(upload, time.perf_counter())
+
+        threads = [threading.Thread(target=client, name=f'client-{i}') for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        arrival_rng = random.Random(seed + 1)
+        with ThreadPoolExecutor(max_workers=MAX_OPEN_LOOP_CLIENTS) as pool:
+            scheduled = started
+            while True:
+                scheduled += arrival_rng.expovariate(rate)
+                if scheduled >= stop_at:
+                    break
+                upload = next_upload()
+                if upload is None:
+                    break
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+                pool.submit(run, upload, scheduled)
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+
+    ok = [r for r in records if r['status'] == 'ok']
+    statuses = {}
+    for r in records:
+        statuses[r['status']] = statuses.get(r['status'], 0) + 1
+    errors = {}
+    for r in records:
+        if 'error' in r:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    return {
+        'meta': {
+            'url': base_url,
+            'mode': 'closed' if concurrency is not None else 'open',
+            'concurrency': concurrency,
+            'rate': rate,
+            'duration': duration,
+            'requests': requests,
+            'mix': mix,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {
+            'uploads': len(records),
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput': round(len(ok) / elapsed, 3) if elapsed else 0.0,
+            'statuses': statuses,
+            'error_rate': round(1 - len(ok) / len(records), 4) if records else 0.0,
+            'errors': dict(sorted(errors.items(), key=lambda kv: -kv[1])[:10]),
+            'latency': latency_summary([r['seconds'] for r in ok]),
+            'accept_latency': latency_summary([r['accept_seconds'] for r in records]),
+            'profiles': {name: latency_summary([r['seconds'] for r in ok if r['profile'] == name]) for name in mix},
+            'saturation': sampler.summary(capacity),
+        },
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return [(metric, baseline, current)] for throughput or p95 latency worse than tolerance allows"""
+    regressions = []
+    before, after = baseline['results'], current['results']
+    if after['throughput'] < before['throughput'] * (1 - tolerance):
+        regressions.append(('throughput', before['throughput'], after['throughput']))
+    p95_before, p95_after = before['latency'].get('p95'), after['latency'].get('p95')
+    if p95_before and (p95_after is None or p95_after > p95_before * (1 + tolerance)):
+        regressions.append(('p95 latency', p95_before, p95_after))
+    return regressions
+
+
+def print_results(current):
+    meta, results = current['meta'], current['results']
+    load = f"{meta['concurrency']} clients" if meta['mode'] == 'closed' else f"{meta['rate']} uploads/s"
+    print(f"\n{results['uploads']} uploads in {results['elapsed_seconds']:.1f}s ({load}): "
+          f"{results['throughput']:.2f} uploads/s, error rate {results['error_rate']:.1%} {results['statuses']}")
+    latency = results['latency']
+    if latency['count']:
+        print(f"  latency     p50 {latency['p50']:7.3f} s   p95 {latency['p95']:7.3f} s   "
+              f"p99 {latency['p99']:7.3f} s   max {latency['max']:7.3f} s")
+    for name, summary in results['profiles'].items():
+        if summary['count']:
+            print(f"  {name:10s}  p50 {summary['p50']:7.3f} s   p95 {summary['p95']:7.3f} s   ({summary['count']} uploads)")
+    saturation = results['saturation']
+    if saturation:
+        line = (f"  jobs running: mean {saturation['jobs_running_mean']:.1f}, max {saturation['jobs_running_max']:.0f}; "
+                f"requests in flight: mean {saturation['requests_in_flight_mean']:.1f}")
+        if 'utilization' in saturation:
+            line += (f"; {saturation['job_slots']} job slots {saturation['utilization']:.0%} used, "
+                     f"all busy {saturation['saturated_share']:.0%} of the time")
+        print(line)
+    for error, count in results['errors'].items():
+        print(f"  ❌ {count} x {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the upload endpoints with synthetic resumes")
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument("--concurrency", type=int, help="Closed loop: concurrent clients")
+    load.add_argument("--rate", type=float, help="Open loop: uploads per second (Poisson arrivals)")
+    parser.add_argument("--duration", type=float, help="Seconds of load (default 30 without --requests)")
+    parser.add_argument("--requests", type=int, help="Stop after this many uploads")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Resume sizes and weights (default {DEFAULT_MIX})")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers of the started server")
+    parser.add_argument("--timeout", type=int, default=60, help="gunicorn worker timeout (seconds)")
+    parser.add_argument("--job-workers", type=int, default=DEFAULT_JOB_WORKERS, help="JOB_WORKERS per gunicorn worker")
+    parser.add_argument("--queue-limit", type=int, help="JOB_QUEUE_LIMIT per gunicorn worker")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="Fake translator delay per batch (seconds)")
+    parser.add_argument("--fake-failure-rate", type=float, default=0.0, help="Share of fake translator batches that fail")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between job status requests")
+    parser.add_argument("--job-timeout", type=float, default=120, help="Give up on a job after this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput/p95 change before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 30
+
+    mix = parse_mix(args.mix)
+    documents = build_documents(mix)
+    options = dict(concurrency=args.concurrency, rate=args.rate, duration=args.duration, requests=args.requests,
+                   poll_interval=args.poll_interval, job_timeout=args.job_timeout, seed=args.seed)
+    if args.url:
+        print(f"🎯 Loading {args.url}")
+        current = run_load_test(args.url.rstrip('/'), documents, mix, **options)
+    else:
+        env = {'JOB_WORKERS': args.job_workers, 'FAKE_TRANSLATOR_LATENCY': args.fake_latency,
+               'FAKE_TRANSLATOR_FAILURE_RATE': args.fake_failure_rate}
+        if args.queue_limit is not None:
+            env['JOB_QUEUE_LIMIT'] = args.queue_limit
+        with GunicornServer(args.workers, ['--preload', '--timeout', str(args.timeout)], env) as server:
+            print(f"🚀 gunicorn: {args.workers} workers x {args.job_workers} job slots, "
+                  f"ready in {server.wait_ready():.2f}s")
+            current = run_load_test(server.url, documents, mix, capacity=args.workers * args.job_workers, **options)
+            current['meta'].update(workers=args.workers, timeout=args.timeout, job_workers=args.job_workers,
+                                   fake_latency=args.fake_latency)
+    print_results(current)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for metric, before, after in regressions:
+                print(f"  {metric}: {before} -> {after}")
+            sys.exit(1)
+        print(f"\n✅ No regression beyond {args.tolerance:.0%}")
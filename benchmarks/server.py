@@ -0,0 +1,110 @@
+"""
+Throwaway gunicorn deployment of the app for benchmarks and load tests:
+fake translation backend, a working directory of its own (library copy,
+uploads, metrics, shared result store, gunicorn log) and a free local
+port. Plus the few urllib helpers the clients need, so benchmarks run
+with nothing beyond the app's own requirements.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLL_INTERVAL = 0.02
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def http(url, data=None, headers=None, timeout=30):
+    """Return (status, body bytes); HTTP errors are statuses, refused connections are None"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data, headers or {}), timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None, b''
+
+
+def multipart(filename, content):
+    """(body, headers) of a form upload of one file"""
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8') + content + \
+        f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def wait_until(deadline, check, interval=POLL_INTERVAL):
+    """Poll check() until it returns something truthy; deadline is a time.perf_counter() value"""
+    while time.perf_counter() < deadline:
+        result = check()
+        if result:
+            return result
+        time.sleep(interval)
+    raise TimeoutError("Server did not answer in time")
+
+
+class GunicornServer:
+    """
+    Context manager running `gunicorn app:app` until exit, then removing its
+    folder. options are extra gunicorn arguments, env extra app settings
+    (JOB_WORKERS, FAKE_TRANSLATOR_LATENCY, ...).
+    """
+
+    def __init__(self, workers=2, options=(), env=None):
+        self.workers = workers
+        self.options = list(options)
+        self.env = dict(env or {})
+        self.url = f'http://127.0.0.1:{free_port()}'
+        self.workdir = None
+        self.process = None
+        self.started = None
+
+    def __enter__(self):
+        self.workdir = tempfile.mkdtemp(prefix='bench-server-')
+        shutil.copy(os.path.join(ROOT, 'master_library.json'), self.workdir)
+        # Results shared by the workers through a folder, as start_server.sh does
+        env = dict(os.environ, TRANSLATION_BACKEND='fake', TRANSLATION_RATE_LIMIT='0', SEGMENT_CACHE_TTL='0',
+                   RESULT_STORE_FOLDER=os.path.join(self.workdir, 'results'),
+                   PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        env.update({key: str(value) for key, value in self.env.items()})
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(self.workers), '-b', self.url[len('http://'):],
+                   '--log-level', 'warning', *self.options, 'app:app']
+        self._log = open(os.path.join(self.workdir, 'gunicorn.log'), 'wb')
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(command, cwd=self.workdir, env=env, stdout=self._log, stderr=self._log)
+        return self
+
+    def wait_ready(self, timeout=60):
+        """Wait for a 200 from GET /ready; returns the seconds since launch"""
+        try:
+            wait_until(self.started + timeout, lambda: http(f'{self.url}/ready', timeout=5)[0] == 200)
+        except TimeoutError:
+            raise TimeoutError(f"gunicorn not ready after {timeout}s:\n{self.log_tail()}")
+        return time.perf_counter() - self.started
+
+    def log_tail(self, lines=20):
+        with open(os.path.join(self.workdir, 'gunicorn.log'), 'r', encoding='utf-8', errors='replace') as f:
+            return ''.join(f.readlines()[-lines:])
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
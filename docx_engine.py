@@ -0,0 +1,322 @@
+"""
+DOCX extraction engine shared by the web app (app.py) and the CLI
+(run_translation_pipeline.py).
+
+Each word/*.xml part is scanned once, incrementally. The scan produces a
+DocumentModel (parts, paragraph spans, text-run offsets) that is used both
+to list the segments to translate and to rewrite the DOCX by splicing the
+recorded offsets, so nothing is parsed twice. When writing the output,
+only the rewritten parts are recompressed; every other ZIP entry is copied
+with its compressed bytes as-is (or through zipfile's public API if its
+internals ever change).
+The scanner uses exactly the same paragraph and text-run patterns as the
+original regex path, so segment text stays byte-identical (entities are
+kept as written in the XML and a nested text-box paragraph closes at the
+first </w:p>, just like before).
+"""
+import copy
+import io
+import logging
+import re
+import shutil
+import struct
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Parts of a DOCX that hold translatable text
+TARGET_PART_PATTERN = re.compile(r'word/(document|header|footer)\d*\.xml')
+
+PARAGRAPH_START_RE = re.compile(r'<w:p\b[^>]*>')
+PARAGRAPH_END = '</w:p>'
+TEXT_RUN_RE = re.compile(r'<w:t[^>]*>([^<]*)</w:t>')
+
+READ_CHUNK_SIZE = 64 * 1024
+# zlib level for rewritten parts (untouched entries keep their original bytes)
+DEFAULT_COMPRESSLEVEL = 6
+
+
+def iter_xml_paragraph_spans(xml, pos=0):
+    """
+    Yield (start, end, para_xml) for every closed paragraph of a decoded
+    part from pos on. Scans by position, so the part is never copied:
+    linear in the size of the part.
+    """
+    while True:
+        match = PARAGRAPH_START_RE.search(xml, pos)
+        if not match:
+            return
+        end = xml.find(PARAGRAPH_END, match.end())
+        if end == -1:
+            return
+        pos = end + len(PARAGRAPH_END)
+        yield match.start(), pos, xml[match.start():pos]
+
+
+def iter_paragraph_spans(stream, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield (start, end, para_xml) for every paragraph of a text stream, with
+    offsets counted in characters from the beginning of the part.
+
+    Equivalent to re.finditer(r'<w:p\\b[^>]*>.*?</w:p>', xml, re.DOTALL) but
+    reads the stream in chunks, so only the current paragraph plus one chunk
+    is held in memory.
+    """
+    buffer = ''
+    offset = 0  # Part offset of buffer[0]
+    pos = 0     # Scan position in buffer: the buffer is only trimmed when a chunk is read
+    eof = False
+
+    while True:
+        for start, end, para_xml in iter_xml_paragraph_spans(buffer, pos):
+            yield offset + start, offset + end, para_xml
+            pos = end
+        match = PARAGRAPH_START_RE.search(buffer, pos)
+        if match:
+            # Paragraph is not closed yet: keep it and read further
+            drop = match.start()
+        else:
+            # Keep a possibly truncated start tag for the next chunk
+            last_tag = buffer.rfind('<', pos)
+            drop = last_tag if last_tag != -1 else len(buffer)
+        buffer = buffer[drop:]
+        offset += drop
+        pos = 0
+
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+
+def iter_paragraphs(stream, chunk_size=READ_CHUNK_SIZE):
+    """Yield the raw XML of every paragraph in a binary part stream"""
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    for _, _, para_xml in iter_paragraph_spans(text_stream, chunk_size):
+        yield para_xml
+
+
+def paragraph_text(para_xml):
+    """Concatenated <w:t> content of a paragraph (not stripped)"""
+    return "".join(TEXT_RUN_RE.findall(para_xml))
+
+
+def iter_target_parts(zf):
+    """Yield the ZipInfo of every part that holds translatable text"""
+    for info in zf.infolist():
+        if TARGET_PART_PATTERN.match(info.filename):
+            yield info
+
+
+def extract_segments(source_docx):
+    """
+    Extract the unique, stripped paragraph texts of a DOCX in document order.
+    source_docx can be a path or a binary file object.
+    """
+    # dict keeps insertion order: used as an ordered set for O(1) dedup
+    unique_strings = {}
+    with zipfile.ZipFile(source_docx, 'r') as z:
+        for info in iter_target_parts(z):
+            with z.open(info) as part:
+                for para in iter_paragraphs(part):
+                    para_text = paragraph_text(para).strip()
+                    if para_text:
+                        unique_strings[para_text] = None
+    return list(unique_strings)
+
+
+class Paragraph:
+    """A paragraph span of a part and the content offsets of its <w:t> runs"""
+    __slots__ = ('start', 'end', 'text', 'runs')
+
+    def __init__(self, start, end, text, runs):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.runs = runs
+
+
+class DocumentPart:
+    """Decoded XML of one word/*.xml part with its paragraphs"""
+
+    def __init__(self, name, xml, paragraphs):
+        self.name = name
+        self.xml = xml
+        self.paragraphs = paragraphs
+
+
+class DocumentModel:
+    """Parse-once view of a DOCX shared by extraction and translate_docx"""
+
+    def __init__(self, parts):
+        self.parts = parts  # {part name: DocumentPart}
+
+    def segments(self):
+        """Unique, stripped paragraph texts in document order"""
+        unique_strings = {}
+        for part in self.parts.values():
+            for para in part.paragraphs:
+                para_text = para.text.strip()
+                if para_text:
+                    unique_strings[para_text] = None
+        return list(unique_strings)
+
+
+def parse_part(name, xml):
+    """Build a DocumentPart by scanning a decoded part once"""
+    paragraphs = []
+    for start, end, para_xml in iter_xml_paragraph_spans(xml):
+        runs = []
+        texts = []
+        for m in TEXT_RUN_RE.finditer(para_xml):
+            runs.append((start + m.start(1), start + m.end(1)))
+            texts.append(m.group(1))
+        paragraphs.append(Paragraph(start, end, "".join(texts), runs))
+    return DocumentPart(name, xml, paragraphs)
+
+
+def load_document(source_docx):
+    """Read the translatable parts of a DOCX into a DocumentModel"""
+    parts = {}
+    with zipfile.ZipFile(source_docx, 'r') as z:
+        for info in iter_target_parts(z):
+            parts[info.filename] = parse_part(info.filename, z.read(info).decode('utf-8'))
+    return DocumentModel(parts)
+
+
+def escape_xml_text(text):
+    """Basic XML escaping for special characters"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
+
+
+def iter_rewritten_part(part, trans_map):
+    """
+    Yield the part XML in pieces with translated paragraphs spliced in.
+    The translation goes into the first <w:t> of the paragraph and the
+    following ones are emptied to avoid duplicates.
+    """
+    last = 0
+    for para in part.paragraphs:
+        # Look for translation (exact match or stripped)
+        translation = trans_map.get(para.text) or trans_map.get(para.text.strip())
+        if not (translation and isinstance(translation, str) and translation.strip() != ""):
+            continue
+        safe = escape_xml_text(translation)
+        for i, (run_start, run_end) in enumerate(para.runs):
+            yield part.xml[last:run_start]
+            if i == 0:
+                yield safe
+            last = run_end
+    yield part.xml[last:]
+
+
+def rewrite_part(part, trans_map):
+    """Return the part XML with translated paragraphs spliced in"""
+    return "".join(iter_rewritten_part(part, trans_map))
+
+
+# zipfile internals copy_raw_entry relies on; checked so a Python upgrade that
+# changes them falls back to copy_entry instead of writing a corrupt archive
+RAW_COPY_MODULE_ATTRS = ('sizeFileHeader',)
+RAW_COPY_ZIPFILE_ATTRS = ('fp', 'filelist', 'NameToInfo', 'start_dir', '_didModify')
+_fallback_logged = False
+
+
+def raw_copy_supported(zin, zout):
+    """True when both archives expose the zipfile internals of copy_raw_entry"""
+    return (all(hasattr(zipfile, attr) for attr in RAW_COPY_MODULE_ATTRS)
+            and callable(getattr(zipfile.ZipInfo, 'FileHeader', None))
+            and hasattr(zin, 'fp')
+            and all(hasattr(zout, attr) for attr in RAW_COPY_ZIPFILE_ATTRS)
+            and not getattr(zout, '_writing', False))
+
+
+def copy_entry(zin, info, zout):
+    """Copy one ZIP entry through the public API (inflate, then deflate again)"""
+    entry = zipfile.ZipInfo(info.filename, info.date_time)
+    entry.compress_type = info.compress_type
+    entry.external_attr = info.external_attr
+    entry.comment = info.comment
+    entry.file_size = info.file_size  # lets open() pick ZIP64 for huge entries
+    with zin.open(info) as src, zout.open(entry, 'w') as dst:
+        shutil.copyfileobj(src, dst, READ_CHUNK_SIZE)
+
+
+def copy_raw_entry(zin, info, zout):
+    """
+    Copy one ZIP entry with its compressed bytes as-is (no inflate/deflate).
+
+    zipfile has no public API for this, so the local header is rebuilt from
+    the ZipInfo and the entry is registered in zout's central directory the
+    same way ZipFile.write does. Without those internals, the entry is
+    copied with copy_entry instead.
+    """
+    global _fallback_logged
+    if not raw_copy_supported(zin, zout):
+        if not _fallback_logged:
+            _fallback_logged = True
+            logger.warning("zipfile internals changed: recompressing entries instead of copying them raw")
+        copy_entry(zin, info, zout)
+        return
+    # Skip the source local header (fixed part + file name + extra field)
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+
+    entry = copy.copy(info)
+    # CRC and sizes are known: write them in the local header, no data descriptor
+    entry.flag_bits &= ~0x08
+    entry.header_offset = zout.fp.tell()
+    zout.fp.write(entry.FileHeader())
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(READ_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated entry {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(entry)
+    zout.NameToInfo[entry.filename] = entry
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+def write_part(zout, name, pieces):
+    """Compress a rewritten part into zout from an iterator of str pieces"""
+    buffer = []
+    size = 0
+    with zout.open(name, 'w') as dst:
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= READ_CHUNK_SIZE:
+                dst.write("".join(buffer).encode('utf-8'))
+                buffer = []
+                size = 0
+        dst.write("".join(buffer).encode('utf-8'))
+
+
+def translate_docx(source_docx, translation_map, output_docx, document=None, compresslevel=DEFAULT_COMPRESSLEVEL):
+    """
+    Write output_docx with the translation map applied to source_docx.
+    Pass the DocumentModel built during extraction to skip re-parsing.
+
+    Only the rewritten word/*.xml parts are recompressed (at compresslevel);
+    every other entry (images, fonts, media, styles) is copied with its
+    compressed bytes untouched, and output is written as it is produced.
+    """
+    if document is None:
+        document = load_document(source_docx)
+
+    with zipfile.ZipFile(source_docx, 'r') as zin, \
+            zipfile.ZipFile(output_docx, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zout:
+        for info in zin.infolist():
+            part = document.parts.get(info.filename)
+            if part is not None:
+                write_part(zout, info.filename, iter_rewritten_part(part, translation_map))
+            else:
+                copy_raw_entry(zin, info, zout)
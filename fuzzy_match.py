@@ -0,0 +1,242 @@
+"""
+Approximate matching of resume segments against library keys.
+
+Two layers on top of the exact and normalized lookups of LibraryIndex:
+
+- folded keys: case, accents, punctuation and spacing are ignored, so
+  "Analyse, Conception et Architecture" finds "Analyse, conception et
+  architecture" and "Assistance aux usagers;" finds "Assistance aux usagers";
+- near-duplicates, off unless a threshold is configured: a trigram index
+  proposes a few candidates, which are then compared word by word. Words
+  match when they are equal, synonyms from SYNONYMS ("Assistance aux
+  utilisateurs" finds "Assistance aux usagers") or a typo of each other
+  ("Gestion de porjets" finds "Gestion de projets").
+
+Words that differ by a negation prefix ("Indisponible" / "Disponible"), a
+gender or number inflection ("Ingénieure" / "Ingénieur", "Analystes" /
+"Analyste") or a negation word ("non conformes") change the meaning of a
+segment: such candidates are rejected whatever their similarity.
+Near-duplicate matches must also reach the threshold, carry the same
+numbers as the key and be long enough for trigrams to be meaningful.
+"""
+import re
+import unicodedata
+from collections import Counter
+from itertools import chain
+from difflib import SequenceMatcher
+
+DEFAULT_FUZZY_THRESHOLD = 0  # near-duplicates are opt-in
+RECOMMENDED_FUZZY_THRESHOLD = 0.9
+MIN_FUZZY_LENGTH = 8  # folded characters
+MAX_CANDIDATES = 8
+MIN_TYPO_WORD = 4  # shorter words must match exactly
+TYPO_RATIO = 0.8  # similarity of two words for a typo
+
+PUNCTUATION_RE = re.compile(r'[^\w]+')
+DIGITS_RE = re.compile(r'\d+')
+
+# Folded words that mean the same in a resume; each maps to the first of its group
+SYNONYMS = [
+    ('usager', 'utilisateur'),
+    ('usagers', 'utilisateurs'),
+]
+SYNONYM_WORDS = {word: group[0] for group in SYNONYMS for word in group}
+NEGATION_PREFIXES = ('in', 'im', 'il', 'ir', 'des', 'de', 'dis', 'non', 'un', 'mal')
+NEGATION_WORDS = {'non', 'ne', 'pas', 'sans', 'aucun', 'aucune', 'not', 'no', 'without'}
+# (masculine, feminine) endings of singular words, and the plural endings they turn into
+GENDER_ENDINGS = [
+    ('', 'e'), ('l', 'lle'), ('n', 'nne'), ('t', 'tte'), ('eur', 'euse'), ('eur', 'rice'),
+    ('if', 'ive'), ('er', 'ere'), ('et', 'ete'), ('eu', 'euse'), ('f', 've'), ('c', 'que'),
+    ('al', 'au'), ('ail', 'au'), ('y', 'ie'),
+]
+
+
+def fold_text(text):
+    """Lowercase, strip accents and punctuation, collapse spaces"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return PUNCTUATION_RE.sub(' ', stripped.casefold()).strip()
+
+
+def canonical_words(folded):
+    """Words of a folded text, synonyms replaced by the first word of their group"""
+    return [SYNONYM_WORDS.get(word, word) for word in folded.split()]
+
+
+def trigrams(folded):
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _singular(word):
+    return word[:-1] if len(word) > 3 and word[-1] in 'sx' else word
+
+
+def is_inflection(a, b):
+    """True when two different words are gender or number forms of one word"""
+    a, b = _singular(a), _singular(b)
+    if a == b:
+        return True
+    for x, y in ((a, b), (b, a)):
+        for masculine, feminine in GENDER_ENDINGS:
+            if (x.endswith(masculine) and y.endswith(feminine)
+                    and len(x) > len(masculine) and x[:len(x) - len(masculine)] == y[:len(y) - len(feminine)]):
+                return True
+    return False
+
+
+def is_negation(a, b):
+    """True when one word is the other with a negation prefix"""
+    for x, y in ((a, b), (b, a)):
+        for prefix in NEGATION_PREFIXES:
+            if y == prefix + x:
+                return True
+    return False
+
+
+def word_similarity(query, key):
+    """
+    Similarity (0-1) of two word lists, weighted by word length: equal words
+    count fully, typos by their character ratio, other words not at all.
+    None when a pair of words, or a word on one side only, changes the
+    meaning (negation, inflection).
+    """
+    matched = 0.0
+    matcher = SequenceMatcher(None, query, key, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            matched += sum(len(word) for word in query[i1:i2])
+            continue
+        left, right = query[i1:i2], key[j1:j2]
+        for a, b in zip(left, right):
+            if is_negation(a, b) or is_inflection(a, b):
+                return None
+            if min(len(a), len(b)) >= MIN_TYPO_WORD and DIGITS_RE.search(a + b) is None:
+                ratio = SequenceMatcher(None, a, b, autojunk=False).ratio()
+                if ratio >= TYPO_RATIO:
+                    matched += ratio * (len(a) + len(b)) / 2
+        if NEGATION_WORDS.intersection(left + right):
+            return None
+    total = sum(map(len, query)) + sum(map(len, key))
+    return 2 * matched / total if total else 0.0
+
+
+class ApproximateIndex:
+    """Folded and trigram lookups over a {key: value} table"""
+
+    def __init__(self, table, threshold=DEFAULT_FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self.folded = {}
+        self._keys = []
+        self._sizes = []
+        self._grams = {}
+        self._max_length = 0
+        self._added = None  # trigrams of keys added to prebuilt parts
+        for key, value in table.items():
+            self.add(key, value)
+
+    def add(self, key, value, previous=None):
+        """
+        Index key -> value. The first key of a folded form keeps it: a later
+        key only replaces its value when that value is previous (the key was
+        learned again with another translation).
+        """
+        folded = fold_text(key)
+        if not folded:
+            return
+        if folded in self.folded:
+            if previous is not None and self.folded[folded] == previous:
+                self.folded[folded] = value
+            return
+        self.folded[folded] = value
+        if len(folded) >= MIN_FUZZY_LENGTH:
+            (self if self._added is None else self._added)._index(folded)
+
+    def _index(self, folded):
+        key_id = len(self._keys)
+        self._keys.append(folded)
+        # Trigrams and lengths of the canonical words, so synonyms share them
+        words = canonical_words(folded)
+        self._max_length = max(self._max_length, sum(map(len, words)))
+        key_grams = trigrams(' '.join(words))
+        self._sizes.append(len(key_grams))
+        for gram in key_grams:
+            self._grams.setdefault(gram, []).append(key_id)
+
+    def discard(self, key, value):
+        """Forget key if it still maps to value; match skips its trigrams from then on"""
+        folded = fold_text(key)
+        if folded and self.folded.get(folded) == value:
+            del self.folded[folded]
+
+    @classmethod
+    def from_parts(cls, folded, keys, sizes, grams, max_length, threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        Index over prebuilt lookups (see library_artifact): folded {key: value},
+        key number -> folded key, canonical trigram counts per key number, and
+        canonical trigram -> key numbers; nothing is rebuilt. The parts are
+        read-only: add() needs a mutable folded mapping and indexes the
+        trigrams of added keys on the side.
+        """
+        index = cls({}, threshold)
+        index.folded = folded
+        index._keys = keys
+        index._sizes = sizes
+        index._grams = grams
+        index._max_length = max_length
+        index._added = cls({}, threshold)
+        return index
+
+    def match(self, text):
+        """
+        Return (value, match_type, score) with match_type 'folded' or 'fuzzy',
+        or (None, None, 0.0) when nothing is close enough.
+        """
+        folded = fold_text(text)
+        if not folded:
+            return None, None, 0.0
+        value = self.folded.get(folded)
+        if value is not None:
+            return value, 'folded', 1.0
+        if not self.threshold or len(folded) < MIN_FUZZY_LENGTH:
+            return None, None, 0.0
+        # Similarity <= 2 * shorter / (a + b): long sentences cannot reach short keys
+        words = canonical_words(folded)
+        max_length = self._max_length if self._added is None else max(self._max_length, self._added._max_length)
+        if sum(map(len, words)) * self.threshold / (2 - self.threshold) > max_length:
+            return None, None, 0.0
+
+        grams = trigrams(' '.join(words))
+        digits = DIGITS_RE.findall(folded)
+        best, best_score = self._closest(words, grams, digits, self.folded)
+        if self._added is not None:
+            added, added_score = self._added._closest(words, grams, digits, self.folded)
+            if added_score > best_score:
+                best, best_score = added, added_score
+        if best is not None and best_score >= self.threshold:
+            return self.folded[best], 'fuzzy', best_score
+        return None, None, best_score
+
+    def _closest(self, words, grams, digits, folded):
+        """(key, score) of the closest of this index's keys still in folded"""
+        # Candidates share the most trigrams with the query
+        shared = Counter(chain.from_iterable(self._grams.get(gram, ()) for gram in grams))
+        # Cheap trigram (Dice) prefilter before the word comparison, then the
+        # keys sharing the most trigrams: filtering first keeps long keys that
+        # share many trigrams from crowding out a short close match
+        floor = self.threshold - 0.2
+        candidates = sorted(
+            (key_id for key_id, count in shared.items()
+             if 2 * count / (len(grams) + self._sizes[key_id]) >= floor),
+            key=lambda key_id: -shared[key_id],
+        )[:MAX_CANDIDATES]
+
+        best, best_score = None, 0.0
+        for key_id in candidates:
+            key = self._keys[key_id]
+            if key not in folded or DIGITS_RE.findall(key) != digits:
+                continue
+            score = word_similarity(words, canonical_words(key))
+            if score is not None and score > best_score:
+                best, best_score = key, score
+        return best, best_score
@@ -0,0 +1,155 @@
+"""
+Background cleanup of the uploads folder.
+
+Every upload gets its own workspace directory (uploads/<random id>/), so
+two users uploading "CV_FR.docx" at the same time never share a file. When
+a job ends, its workspace and job state file are registered here with an
+expiry time; a daemon thread pops them from an in-memory heap as they
+expire, so the request path only pushes one entry instead of listing and
+stat-ing the whole folder.
+
+Each gunicorn worker runs its own janitor for the paths it registered.
+When the thread starts (first request of a worker), and then every
+sweep_interval seconds, it also sweeps the folder for entries left by a
+crashed or restarted worker and removes those older than the retention
+period. Workspaces and state files of queued and running jobs are held:
+the sweep refreshes their modification time first, so no worker's sweep
+mistakes a long job for an orphan.
+"""
+import heapq
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION = 60  # seconds (strict privacy)
+
+
+class Janitor:
+    """Deletes registered files and directories once they expire"""
+
+    def __init__(self, folder, retention=DEFAULT_RETENTION, interval=1.0, sweep_interval=None, periodic=()):
+        self.folder = folder
+        self.retention = retention
+        self.interval = interval
+        # Held paths must be touched more often than the retention period
+        self.sweep_interval = min(sweep_interval or retention / 2, retention / 2)
+        self.periodic = list(periodic)  # callables run on every tick, e.g. ResultStore.purge
+        self._heap = []  # (expires_at, seq, path)
+        self._held = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """Start the cleanup thread of this process (cheap when already running)"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            # A thread started before a fork does not exist in the child
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='janitor', daemon=True)
+            self._thread.start()
+
+    def hold(self, path):
+        """Protect a path in use (a running job's workspace) from sweeps"""
+        with self._lock:
+            self._held.add(path)
+
+    def track(self, path, expires_at=None):
+        """Release path and schedule it for deletion retention seconds from now (or at expires_at)"""
+        if expires_at is None:
+            expires_at = time.time() + self.retention
+            # Sweeps judge age by mtime: count it from the release
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._held.discard(path)
+            heapq.heappush(self._heap, (expires_at, next(self._seq), path))
+
+    def discard(self, path):
+        """Release and delete a path now"""
+        with self._lock:
+            self._held.discard(path)
+        remove_path(path)
+
+    def pending(self):
+        with self._lock:
+            return len(self._heap)
+
+    def run_pending(self, now=None):
+        """Delete every expired path; returns how many were removed"""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expired.append(heapq.heappop(self._heap)[2])
+        count = sum(1 for path in expired if remove_path(path))
+        if count:
+            logger.info(f"Cleaned up {count} old files/dirs")
+        return count
+
+    def sweep(self, now=None):
+        """Remove unheld entries older than the retention period; returns how many"""
+        now = time.time() if now is None else now
+        with self._lock:
+            held = set(self._held)
+        for path in held:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return 0
+        count = 0
+        for name in names:
+            path = os.path.join(self.folder, name)
+            if path in held:
+                continue
+            try:
+                if os.stat(path).st_mtime < now - self.retention:
+                    count += remove_path(path)
+            except FileNotFoundError:
+                continue
+        if count:
+            logger.info(f"Swept {count} orphaned files/dirs from {self.folder}")
+        return count
+
+    def _loop(self):
+        next_sweep = 0.0
+        while True:
+            try:
+                now = time.time()
+                if now >= next_sweep:
+                    self.sweep(now)
+                    next_sweep = now + self.sweep_interval
+                self.run_pending(now)
+                for task in self.periodic:
+                    task()
+            except Exception as e:
+                logger.error(f"Cleanup error: {e}")
+            self._wake.wait(self.interval)
+
+
+def remove_path(path):
+    """Delete a file or directory tree; returns False when it was already gone"""
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,143 @@
+"""
+Background translation jobs for the web app.
+
+POST /upload queues a job and returns immediately; a bounded thread pool
+runs the pipeline and records real stage progress (extract, library,
+translate, rewrite). Job state is written atomically to a small JSON file
+in the uploads folder, so a status request can be answered by any gunicorn
+worker, not only by the one running the job.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE_SUFFIX = '.job.json'
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class Job:
+    """Status of one translation job, persisted on every update"""
+
+    def __init__(self, manager, job_id, filename):
+        self.manager = manager
+        self.id = job_id
+        self._lock = threading.Lock()
+        self.state = {
+            'id': job_id,
+            'status': 'queued',   # queued | running | done | error
+            'stage': 'queued',
+            'progress': {},
+            'filename': filename,
+            'created_at': time.time(),
+        }
+
+    def update(self, stage=None, status=None, **fields):
+        """Record a stage change or progress counters and persist them"""
+        with self._lock:
+            if stage is not None:
+                self.state['stage'] = stage
+            if status is not None:
+                self.state['status'] = status
+            for key, value in fields.items():
+                if key in ('result', 'error'):
+                    self.state[key] = value
+                else:
+                    self.state['progress'][key] = value
+            self.state['updated_at'] = time.time()
+            snapshot = json.loads(json.dumps(self.state))
+        self.manager._persist(snapshot)
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+
+class JobManager:
+    """Bounded worker pool for translation jobs"""
+
+    def __init__(self, state_folder, max_workers=2, max_queued=20, on_submitted=None, on_finished=None):
+        self.state_folder = state_folder
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.on_submitted = on_submitted  # called with the state file path when a job is queued
+        self.on_finished = on_finished  # called with the state file path once a job is done or failed
+        self._executor = None
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created lazily so the pool belongs to the process that runs jobs
+        # (gunicorn forks workers after importing the app)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return self._executor
+
+    def state_path(self, job_id):
+        return os.path.join(self.state_folder, f"{job_id}{JOB_FILE_SUFFIX}")
+
+    def _persist(self, state):
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path(state['id']))
+        except Exception as e:
+            logger.error(f"Could not persist job {state['id']}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def submit(self, filename, fn, *args):
+        """
+        Queue fn(job, *args). fn returns the result dict stored on the job.
+        Raises QueueFull when too many jobs are waiting or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queued:
+                raise QueueFull("Too many translations in progress, please retry shortly")
+            self._pending += 1
+            job = Job(self, uuid.uuid4().hex, filename)
+            self._jobs[job.id] = job
+        if self.on_submitted is not None:
+            self.on_submitted(self.state_path(job.id))
+        job.update()
+        self._pool().submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        try:
+            job.update(status='running')
+            result = fn(job, *args)
+            job.update(stage='done', status='done', result=result)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.update(status='error', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            if self.on_finished is not None:
+                self.on_finished(self.state_path(job.id))
+
+    def get(self, job_id):
+        """Return the job state, from memory or from another worker's file"""
+        if not job_id.isalnum():
+            return None
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        try:
+            with open(self.state_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
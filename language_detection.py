@@ -0,0 +1,113 @@
+"""
+Resume language detection shared by the web app and the CLI.
+
+Segments are tokenized once and every token is looked up in a signal table
+compiled at import time ({token: ((language, weight), ...)}): section
+headings and month names are strong signals, common function words weak
+ones. Scoring starts with the first SAMPLE_CHARS characters and keeps
+reading the document while the result is not confident enough, so
+short or mixed resumes are judged on all their text. Add a language by
+adding its words to SIGNALS.
+"""
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_CHARS = 2000
+MIN_SIGNALS = 4         # weighted signals needed before stopping early
+MIN_CONFIDENCE = 0.5    # (best - runner-up) / total
+DEFAULT_LANGUAGE = 'fr'
+
+STRONG_WEIGHT = 3
+WEAK_WEIGHT = 1
+
+SIGNALS = {
+    'fr': {
+        'strong': [
+            "expérience", "expériences", "formation", "formations", "compétences", "langues", "résumé",
+            "janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre",
+            "octobre", "novembre", "décembre", "actuel", "actuellement", "aujourd'hui", "aujourd’hui",
+            "professionnelle", "diplôme", "projet", "mandat", "période", "français", "anglais",
+        ],
+        'weak': ["et", "le", "la", "les", "des", "du", "de", "en", "pour", "avec", "dans", "sur", "une", "un", "au", "aux",
+                 "à"],
+    },
+    'en': {
+        'strong': [
+            "experience", "experiences", "education", "skills", "languages", "summary",
+            "january", "february", "march", "april", "may", "june", "july", "august", "september",
+            "october", "november", "december", "current", "currently", "present",
+            "professional", "degree", "project", "french", "english",
+        ],
+        # Not "on", "a" or "an": as common in French ("on a un an") as in English
+        'weak': ["and", "the", "of", "for", "with", "in", "to", "at", "by", "from"],
+    },
+}
+
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?")
+
+
+def compile_signals(signals):
+    """{token: ((language, weight), ...)} from {language: {'strong': [...], 'weak': [...]}}"""
+    table = {}
+    for lang, groups in signals.items():
+        for group, weight in (('strong', STRONG_WEIGHT), ('weak', WEAK_WEIGHT)):
+            for word in groups.get(group, ()):
+                table.setdefault(word.casefold(), {})[lang] = weight
+    return {token: tuple(weights.items()) for token, weights in table.items()}
+
+
+SIGNAL_TABLE = compile_signals(SIGNALS)
+
+
+class Detection:
+    """Detected language with a 0-1 confidence and the raw scores"""
+    __slots__ = ('lang', 'confidence', 'scores', 'chars_scored')
+
+    def __init__(self, lang, confidence, scores, chars_scored):
+        self.lang = lang
+        self.confidence = confidence
+        self.scores = scores
+        self.chars_scored = chars_scored
+
+    @property
+    def low_confidence(self):
+        return self.confidence < MIN_CONFIDENCE
+
+    def __repr__(self):
+        return f"Detection({self.lang!r}, confidence={self.confidence:.2f})"
+
+
+def _confidence(scores):
+    ranked = sorted(scores.values(), reverse=True)
+    total = sum(ranked)
+    if not total:
+        return 0.0
+    return (ranked[0] - (ranked[1] if len(ranked) > 1 else 0)) / total
+
+
+def detect_language(text_segments, sample_chars=SAMPLE_CHARS, table=SIGNAL_TABLE):
+    """
+    Return a Detection for the segments. Reads at least sample_chars
+    characters, then stops at the first point where the result is confident.
+    """
+    scores = dict.fromkeys(SIGNALS, 0)
+    chars = 0
+    for segment in text_segments:
+        for token in TOKEN_RE.findall(segment.casefold()):
+            for lang, weight in table.get(token, ()):
+                scores[lang] = scores.get(lang, 0) + weight
+        chars += len(segment)
+        if chars >= sample_chars and sum(scores.values()) >= MIN_SIGNALS and _confidence(scores) >= MIN_CONFIDENCE:
+            break
+
+    confidence = _confidence(scores)
+    if confidence == 0:
+        lang = DEFAULT_LANGUAGE
+    else:
+        lang = max(scores, key=scores.get)
+    detection = Detection(lang, confidence, scores, chars)
+    if detection.low_confidence:
+        logger.warning(f"Low-confidence language detection: {detection} scores={scores}")
+    return detection
@@ -0,0 +1,360 @@
+"""
+Compiled, memory-mapped master library.
+
+Built in memory, LibraryIndex holds every lookup derived from the store
+(French -> English, the reverse direction, normalized and folded keys,
+trigram postings) as Python dicts rebuilt from a full snapshot in each
+process: with tens of thousands of terms that is seconds of startup and
+tens of MB for every gunicorn and CLI worker. compile_library() writes
+them once into one binary file that processes map read-only: the page
+cache shares it between workers and opening it parses nothing.
+
+Layout: a header (magic, store id, version and watermark, fuzzy key
+length, section count), a directory of named sections, then the sections, 8-byte aligned.
+Integers are in the machine's byte order: the artifact is a local build
+product, like the database it comes from.
+
+- strings: every key and value once, UTF-8, shared by all tables;
+- tables: open-addressing hash tables (CRC-32 of the key, linear probing,
+  at most half full): counts, entries (key offset, key length, value
+  offset, value length in the strings), then slots (entry number + 1, 0
+  for an empty slot);
+- arrays of unsigned 32-bit integers (trigram postings, key spans).
+
+The artifact records the identity, version and updated_at watermark of the
+store it was compiled from. Terms learned since are applied in memory on
+top of the mapped tables (Overlay), and LibraryIndex.compile_pending()
+recompiles the artifact off the request path under a file lock; a
+recreated database is recompiled right away. The file is replaced
+atomically so readers always map a complete file.
+"""
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+from fuzzy_match import MIN_FUZZY_LENGTH, ApproximateIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent compiles only duplicate work
+    fcntl = None
+
+DEFAULT_ARTIFACT_PATH = 'master_library.idx'
+MAGIC = b'RTLIBv3\x00'  # bump when fuzzy_match changes how keys are indexed (e.g. SYNONYMS)
+HEADER = struct.Struct('=8sqqdII')  # magic, store id, version, watermark, MIN_FUZZY_LENGTH, sections
+DIRECTORY_ENTRY = struct.Struct('=16sQQ')  # name, offset, length
+TABLE_HEADER = struct.Struct('=II')  # entries, slots
+LANGUAGES = ('fr', 'en')
+
+
+class ArtifactError(ValueError):
+    """Raised for files that are not a complete library artifact"""
+
+
+def _align(data):
+    data.extend(b'\x00' * (-len(data) % 8))
+
+
+class _Pool:
+    """UTF-8 strings stored once, shared by every table (most keys and values repeat across them)"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._spans = {}
+
+    def add(self, text):
+        """(key bytes, (offset, length)) of text in the pool"""
+        key = text.encode('utf-8')
+        span = self._spans.get(key)
+        if span is None:
+            span = self._spans[key] = (len(self.data), len(key))
+            self.data += key
+        return key, span
+
+
+def _table_section(items):
+    """Serialize [(key bytes, key span, value span)] with unique keys as a hash table"""
+    slots_count = 8
+    while slots_count < 2 * len(items):
+        slots_count *= 2
+    mask = slots_count - 1
+    entries = array('I')
+    slots = array('I', bytes(4 * slots_count))
+    for number, (key, key_span, value_span) in enumerate(items):
+        entries.extend(key_span + value_span)
+        i = zlib.crc32(key) & mask
+        while slots[i]:
+            i = (i + 1) & mask
+        slots[i] = number + 1
+    return TABLE_HEADER.pack(len(items), slots_count) + entries.tobytes() + slots.tobytes()
+
+
+def _text_table(lookup, pool):
+    items = []
+    for k, v in lookup.items():
+        key, key_span = pool.add(k)
+        items.append((key, key_span, pool.add(v)[1]))
+    return _table_section(items)
+
+
+def _sections(index):
+    """{name: bytes} of a built LibraryIndex"""
+    pool = _Pool()
+    sections = {
+        'fr': _text_table(index.forward, pool),
+        'en': _text_table(index.reverse, pool),
+        'collisions': _text_table({en: '\x00'.join(frs) for en, frs in index.collisions.items()}, pool),
+    }
+    limits = array('I')
+    for lang in LANGUAGES:
+        approximate = index.approximate[lang]
+        sections[f'{lang}.norm'] = _text_table(index.normalized[lang], pool)
+        sections[f'{lang}.fold'] = _text_table(approximate.folded, pool)
+        keys = array('I')
+        for key in approximate._keys:
+            keys.extend(pool.add(key)[1])
+        sections[f'{lang}.keys'] = keys.tobytes()
+        sections[f'{lang}.sizes'] = array('I', approximate._sizes).tobytes()
+        # The value span of a trigram is its slice of one postings array
+        postings = array('I')
+        grams = []
+        for gram, key_ids in approximate._grams.items():
+            key, key_span = pool.add(gram)
+            grams.append((key, key_span, (len(postings), len(key_ids))))
+            postings.extend(key_ids)
+        sections[f'{lang}.grams'] = _table_section(grams)
+        sections[f'{lang}.postings'] = postings.tobytes()
+        limits.append(approximate._max_length)
+    sections['limits'] = limits.tobytes()
+    sections['strings'] = bytes(pool.data)
+    return sections
+
+
+def compile_library(index, identity, path=DEFAULT_ARTIFACT_PATH):
+    """Write the lookups of a built LibraryIndex to path; identity is the store's (id, version)"""
+    sections = _sections(index)
+    store_id, version = identity
+    watermark = index.watermark or 0.0
+    data = bytearray(HEADER.pack(MAGIC, store_id, version, watermark, MIN_FUZZY_LENGTH, len(sections)))
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(sections)
+    offset += -offset % 8
+    body = bytearray()
+    for name, section in sections.items():
+        data += DIRECTORY_ENTRY.pack(name.encode('ascii'), offset + len(body), len(section))
+        body += section
+        _align(body)
+    _align(data)
+    data += body
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+@contextlib.contextmanager
+def compile_lock(path):
+    """Serialize compiles of path across processes (no-op without fcntl)"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Table(Mapping):
+    """Read-only {str: str} view of a hash table section over the string pool"""
+
+    def __init__(self, buf, strings):
+        count, slots_count = TABLE_HEADER.unpack_from(buf)
+        start = TABLE_HEADER.size
+        self._count = count
+        self._mask = slots_count - 1
+        self._entries = buf[start:start + 16 * count].cast('I')
+        self._slots = buf[start + 16 * count:start + 16 * count + 4 * slots_count].cast('I')
+        self._strings = strings
+
+    def find(self, key):
+        """Entry number of a str key, or -1"""
+        if not isinstance(key, str):
+            return -1
+        key = key.encode('utf-8')
+        entries, strings = self._entries, self._strings
+        i = zlib.crc32(key) & self._mask
+        while True:
+            number = self._slots[i]
+            if not number:
+                return -1
+            base = 4 * (number - 1)
+            offset, length = entries[base], entries[base + 1]
+            if length == len(key) and strings[offset:offset + length] == key:
+                return number - 1
+            i = (i + 1) & self._mask
+
+    def span(self, number):
+        """(offset, length) of the value of an entry"""
+        return self._entries[4 * number + 2], self._entries[4 * number + 3]
+
+    def _text(self, offset, length):
+        return str(self._strings[offset:offset + length], 'utf-8')
+
+    def get(self, key, default=None):
+        number = self.find(key)
+        return default if number < 0 else self._text(*self.span(number))
+
+    def __getitem__(self, key):
+        number = self.find(key)
+        if number < 0:
+            raise KeyError(key)
+        return self._text(*self.span(number))
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def __iter__(self):
+        entries = self._entries
+        return (self._text(entries[4 * n], entries[4 * n + 1]) for n in range(self._count))
+
+    def __len__(self):
+        return self._count
+
+
+class Overlay(MutableMapping):
+    """A read-only mapping with in-memory changes on top (terms learned since the compile)"""
+
+    def __init__(self, base):
+        self.base = base
+        self._changes = {}
+        self._removed = set()
+
+    def __getitem__(self, key):
+        if key in self._changes:
+            return self._changes[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        if key in self.base:
+            self._removed.add(key)
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self._changes and key not in self._removed:
+                yield key
+        yield from self._changes
+
+    def __len__(self):
+        return len(self.base) - len(self._removed) + sum(1 for key in self._changes if key not in self.base)
+
+
+class _Keys:
+    """Fuzzy key number -> folded key, as ApproximateIndex expects of its key list"""
+
+    def __init__(self, spans, strings):
+        self._spans = spans
+        self._strings = strings
+
+    def __getitem__(self, number):
+        offset, length = self._spans[2 * number], self._spans[2 * number + 1]
+        return str(self._strings[offset:offset + length], 'utf-8')
+
+
+class _Grams:
+    """Trigram -> key numbers, as slices of the postings array"""
+
+    def __init__(self, table, postings):
+        self._table = table
+        self._postings = postings
+
+    def get(self, gram, default=()):
+        number = self._table.find(gram)
+        if number < 0:
+            return default
+        start, count = self._table.span(number)
+        return self._postings[start:start + count]
+
+
+class LibraryArtifact:
+    """A compiled library mapped read-only; opening it only reads the header"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ArtifactError(f"{path} is empty")
+        buf = memoryview(self._mmap)
+        try:
+            magic, store_id, version, watermark, min_length, count = HEADER.unpack_from(buf)
+            if magic != MAGIC or min_length != MIN_FUZZY_LENGTH:
+                raise ArtifactError(f"{path} is not a library artifact of this version")
+            self._sections = {}
+            for i in range(count):
+                name, offset, length = DIRECTORY_ENTRY.unpack_from(buf, HEADER.size + i * DIRECTORY_ENTRY.size)
+                if offset + length > len(buf):
+                    raise ArtifactError(f"{path} is truncated")
+                self._sections[name.rstrip(b'\x00').decode('ascii')] = buf[offset:offset + length]
+        except struct.error:
+            raise ArtifactError(f"{path} is truncated")
+        self.path = path
+        self.identity = (store_id, version)
+        self.version = version
+        self.watermark = watermark  # updated_at of the newest term compiled in
+        self.size = len(buf)
+
+    def table(self, name):
+        return Table(self._sections[name], self._sections['strings'])
+
+    def array(self, name):
+        return self._sections[name].cast('I')
+
+    def collisions(self):
+        table = self.table('collisions')
+        return {en: table[en].split('\x00') for en in table}
+
+    def approximate(self, lang, threshold):
+        """ApproximateIndex over the mapped folded keys and trigram postings"""
+        max_length = self.array('limits')[LANGUAGES.index(lang)]
+        return ApproximateIndex.from_parts(
+            Overlay(self.table(f'{lang}.fold')),
+            _Keys(self.array(f'{lang}.keys'), self._sections['strings']),
+            self.array(f'{lang}.sizes'),
+            _Grams(self.table(f'{lang}.grams'), self.array(f'{lang}.postings')),
+            max_length,
+            threshold,
+        )
+
+
+def open_artifact(path, identity=None):
+    """The artifact at path, or None when it is missing, damaged or not compiled from identity"""
+    try:
+        artifact = LibraryArtifact(path)
+    except (OSError, ArtifactError):
+        return None
+    if identity is not None and artifact.identity != tuple(identity):
+        return None
+    return artifact
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Transactional translation-memory store for the master library.
+
+Terms ({French: English}) live in a SQLite database in WAL mode so several
+gunicorn workers and CLI runs can read concurrently while writes are
+serialized by SQLite's own cross-process lock. Learning a term is a single
+upsert inside a transaction: the cost depends on what was learned, not on
+the size of the library, and a crash can never leave a half-written file.
+
+LibraryIndex keeps the lookups derived from the store in memory and only
+applies the terms updated since its last refresh to them, including the
+approximate (case/accent/punctuation folded and near-duplicate) index of
+fuzzy_match.
+With an artifact path, it compiles them once into a memory-mapped file
+shared by every process instead (see library_artifact.py).
+
+master_library.json stays the human-readable copy: it seeds an empty
+database and can be regenerated with `python library_store.py export`.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import library_artifact
+from fuzzy_match import DEFAULT_FUZZY_THRESHOLD, ApproximateIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'master_library.db'
+DEFAULT_JSON_PATH = 'master_library.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    fr TEXT PRIMARY KEY,
+    en TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS terms_updated_at ON terms (updated_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+
+def normalize_key(text):
+    """Normalized form for fuzzy matching (ignore trailing :;. and spaces, NBSP)"""
+    return text.strip().rstrip(':;\u00a0. ').replace('\u00a0', ' ').strip()
+
+
+def clean_terms(data):
+    """Keep only non-empty string translations"""
+    return {k: v for k, v in data.items() if isinstance(k, str) and isinstance(v, str) and v.strip() != ""}
+
+
+class LibraryStore:
+    """SQLite-backed master library with incremental, atomic writes"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, json_path=DEFAULT_JSON_PATH):
+        self.db_path = db_path
+        self.json_path = json_path
+        self._initialize()
+
+    def _connect(self):
+        # One short-lived connection per operation: safe across threads and forks
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _initialize(self):
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            # Tells a recreated database from the one a library artifact was compiled from
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', ?)",
+                         (int.from_bytes(os.urandom(7), 'big'),))
+            empty = conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0] == 0
+        finally:
+            conn.close()
+        # Seed a brand new database from the human-readable JSON
+        if empty and self.json_path and os.path.exists(self.json_path):
+            count = self.import_json(self.json_path)
+            logger.info(f"Library store seeded with {count} terms from {self.json_path}")
+
+    def version(self):
+        """Monotonic counter bumped by every committed write"""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        finally:
+            conn.close()
+
+    def identity(self):
+        """(store id, version): what a compiled library artifact was built from"""
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('store_id', 'version')"))
+            return meta['store_id'], meta['version']
+        finally:
+            conn.close()
+
+    def load(self):
+        """Return the whole library as {French: English}"""
+        conn = self._connect()
+        try:
+            return dict(conn.execute('SELECT fr, en FROM terms ORDER BY fr'))
+        finally:
+            conn.close()
+
+    def changes(self, since=None):
+        """
+        Return (identity, watermark, terms) read from one consistent
+        transaction: the terms updated after since (all of them when since
+        is None) and the newest updated_at among them, the watermark to
+        pass next time.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('store_id', 'version')"))
+            rows = conn.execute('SELECT fr, en, updated_at FROM terms WHERE updated_at > ? ORDER BY fr',
+                                (-1 if since is None else since,)).fetchall()
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        watermark = max((updated_at for _, _, updated_at in rows), default=since)
+        return (meta['store_id'], meta['version']), watermark, {fr: en for fr, en, _ in rows}
+
+    def add_terms(self, terms):
+        """
+        Insert or update {French: English} terms in one transaction.
+        Returns the number of terms written.
+        """
+        terms = clean_terms(terms)
+        if not terms:
+            return 0
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front, across processes
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Strictly newer than any committed term, so changes() misses no write
+                latest = conn.execute('SELECT MAX(updated_at) FROM terms').fetchone()[0] or 0
+                now = max(time.time(), math.nextafter(latest, math.inf))
+                conn.executemany(
+                    'INSERT INTO terms (fr, en, updated_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT(fr) DO UPDATE SET en = excluded.en, updated_at = excluded.updated_at',
+                    [(fr, en, now) for fr, en in terms.items()]
+                )
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+        return len(terms)
+
+    def import_json(self, json_path):
+        """Merge a {French: English} JSON file into the store"""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load library JSON {json_path}: {e}")
+            return 0
+        return self.add_terms(data)
+
+    def export_json(self, json_path=None):
+        """Atomically write the library back to JSON for human review"""
+        json_path = json_path or self.json_path
+        data = self.load()
+        directory = os.path.dirname(os.path.abspath(json_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, json_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(data)
+
+
+class LibraryIndex:
+    """
+    In-memory bidirectional index over a LibraryStore, built once per worker.
+
+    Holds forward (FR->EN), reverse (EN->FR), normalized and approximate
+    lookups for both directions. When the store version changes, only the
+    terms updated since the last refresh are applied to them; they are
+    rebuilt from scratch only for a new (or recreated) store. fuzzy_threshold (0-1, 0 disables near-duplicates) is the
+    minimum similarity for a near-duplicate match.
+
+    With artifact_path, the lookups are read from a compiled library mapped
+    from that file instead of being built in every process. Terms learned
+    since it was compiled are applied in memory on top of it, and
+    compile_pending() recompiles it in the background.
+    """
+
+    def __init__(self, store, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, artifact_path=None):
+        self.store = store
+        self.fuzzy_threshold = fuzzy_threshold
+        self.artifact_path = artifact_path
+        self.artifact = None
+        self.store_id = None
+        self.version = None
+        self.watermark = None  # updated_at of the newest term applied
+        self.forward = {}
+        self.reverse = {}
+        self.normalized = {'fr': {}, 'en': {}}
+        self.approximate = {'fr': ApproximateIndex({}), 'en': ApproximateIndex({})}
+        # {English: [French, ...]} where several French keys share one English value
+        self.collisions = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date with the store: apply the terms updated
+        since the last refresh, or rebuild everything for a new store
+        """
+        if not force and self.store.version() == self.version:
+            return False
+        with self._lock:
+            if force or self.store_id is None or not self._catch_up():
+                if self.artifact_path:
+                    self._refresh_artifact(force)
+                else:
+                    identity, watermark, terms = self.store.changes()
+                    self._build(terms)
+                    self.store_id, self.version = identity
+                    self.watermark = watermark
+        return True
+
+    def _catch_up(self):
+        """Apply the terms changed since the watermark; False when the store was recreated"""
+        (store_id, version), watermark, terms = self.store.changes(self.watermark)
+        if store_id != self.store_id:
+            return False
+        self._apply(terms)
+        self.version = version
+        self.watermark = watermark
+        return True
+
+    def _refresh_artifact(self, force):
+        artifact = None if force else library_artifact.open_artifact(self.artifact_path)
+        # An older artifact of this store only lacks the terms learned since
+        if artifact is None or artifact.identity[0] != self.store.identity()[0]:
+            artifact = self._compile(force)
+        self._install(artifact)
+        self._catch_up()
+
+    def compile_pending(self):
+        """
+        Recompile the artifact when terms were learned on top of it. Run
+        periodically off the request path (janitor thread): until the new
+        artifact exists, lookups use the old one plus the terms in memory.
+        """
+        if self.artifact is None or self.artifact.identity == (self.store_id, self.version):
+            return False
+        compiled = self._compile(version=self.version)
+        with self._lock:
+            self._install(compiled)
+            self._catch_up()
+        return True
+
+    def _compile(self, force=False, version=0):
+        """
+        An artifact of the store at version or later, compiled from a full
+        snapshot unless another process already did; the index built in
+        memory when the artifact cannot be written.
+        """
+        with library_artifact.compile_lock(self.artifact_path):
+            # Another process may have compiled it while we waited
+            artifact = None if force else library_artifact.open_artifact(self.artifact_path)
+            if artifact is not None and artifact.identity[0] == self.store.identity()[0] \
+                    and artifact.version >= version:
+                return artifact
+            built = LibraryIndex(self.store, self.fuzzy_threshold)
+            built.refresh()
+            started = time.perf_counter()
+            try:
+                size = library_artifact.compile_library(built, (built.store_id, built.version), self.artifact_path)
+            except OSError as e:
+                # e.g. a read-only folder, or a mapped file Windows will not replace
+                logger.warning(f"Could not write library artifact {self.artifact_path}: {e}; "
+                               f"using the in-memory index")
+                return built
+            logger.info(f"Compiled {len(built.forward)} library terms into {self.artifact_path} "
+                        f"({size / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s")
+            return library_artifact.open_artifact(self.artifact_path)
+
+    def _install(self, compiled):
+        """Serve the lookups of a compiled artifact, or those of an index built in memory"""
+        if isinstance(compiled, LibraryIndex):
+            self.forward, self.reverse = compiled.forward, compiled.reverse
+            self.normalized, self.approximate = compiled.normalized, compiled.approximate
+            self.collisions = compiled.collisions
+            self.artifact = None
+            self.store_id, self.version, self.watermark = compiled.store_id, compiled.version, compiled.watermark
+        else:
+            self._use(compiled)
+
+    def _use(self, artifact):
+        # Learned terms go on top of the mapped tables until the next compile
+        self.forward = library_artifact.Overlay(artifact.table('fr'))
+        self.reverse = library_artifact.Overlay(artifact.table('en'))
+        self.normalized = {lang: library_artifact.Overlay(artifact.table(f'{lang}.norm'))
+                           for lang in library_artifact.LANGUAGES}
+        self.approximate = {lang: artifact.approximate(lang, self.fuzzy_threshold)
+                            for lang in library_artifact.LANGUAGES}
+        self.collisions = artifact.collisions()
+        self.artifact = artifact
+        self.store_id, self.version = artifact.identity
+        self.watermark = artifact.watermark
+
+    def _build(self, terms):
+        forward = dict(terms)
+        reverse = {}
+        sources = {}
+        for fr, en in forward.items():
+            if en and isinstance(en, str):
+                reverse[en] = fr  # Last French key wins, as before
+                sources.setdefault(en, []).append(fr)
+        self.collisions = {en: frs for en, frs in sources.items() if len(frs) > 1}
+        if self.collisions:
+            logger.warning(f"Library has {len(self.collisions)} English values shared by several French keys (reverse lookup keeps the last one)")
+
+        self.normalized = {'fr': self._normalize(forward), 'en': self._normalize(reverse)}
+        self.approximate = {
+            'fr': ApproximateIndex(forward, self.fuzzy_threshold),
+            'en': ApproximateIndex(reverse, self.fuzzy_threshold),
+        }
+        self.forward = forward
+        self.reverse = reverse
+
+    def _apply(self, terms):
+        """Update the built lookups with changed {French: English} terms"""
+        for fr, en in terms.items():
+            previous = self.forward.get(fr)
+            if previous == en:
+                continue
+            self.forward[fr] = en
+            self._point('fr', fr, en, previous)
+            if previous is not None:
+                self._link(previous, [f for f in self._sources(previous) if f != fr])
+            self._link(en, self._sources(en) + [fr])
+
+    def _sources(self, en):
+        """French keys of an English value"""
+        if en in self.collisions:
+            return list(self.collisions[en])
+        return [self.reverse[en]] if en in self.reverse else []
+
+    def _link(self, en, frs):
+        """Point an English value at its French keys, as _build would"""
+        frs = sorted(frs)
+        if len(frs) > 1:
+            self.collisions[en] = frs
+        else:
+            self.collisions.pop(en, None)
+        previous = self.reverse.get(en)
+        if frs and frs[-1] != previous:
+            self.reverse[en] = frs[-1]  # Last French key wins
+            self._point('en', en, frs[-1], previous)
+        elif not frs and previous is not None:
+            del self.reverse[en]
+            nk = normalize_key(en)
+            if self.normalized['en'].get(nk) == previous:
+                del self.normalized['en'][nk]
+            self.approximate['en'].discard(en, previous)
+
+    def _point(self, lang, key, value, previous):
+        """Point key at value in the derived lookups; previous is its old value, if any"""
+        norm_lookup = self.normalized[lang]
+        nk = normalize_key(key)
+        if nk and (nk not in norm_lookup or previous is not None and norm_lookup[nk] == previous):
+            norm_lookup[nk] = value
+        self.approximate[lang].add(key, value, previous)
+
+    @staticmethod
+    def _normalize(lookup):
+        norm_lookup = {}
+        for k, v in lookup.items():
+            nk = normalize_key(k)
+            if nk and nk not in norm_lookup:
+                norm_lookup[nk] = v
+        return norm_lookup
+
+    def table(self, source_lang):
+        """Exact lookup table for a source language ('fr' or 'en')"""
+        return self.forward if source_lang == 'fr' else self.reverse
+
+    def match(self, text, source_lang):
+        """
+        Return (translation, match_type): 'exact', 'normalized' (strip trailing
+        :;. and spaces), 'folded' (case, accents, punctuation) or 'fuzzy'
+        (near-duplicate), or (None, None) when the library has nothing close.
+        """
+        table = self.table(source_lang)
+        result = table.get(text) or table.get(text.strip())
+        if result:
+            return result, 'exact'
+        result = self.normalized[source_lang].get(normalize_key(text))
+        if result:
+            return result, 'normalized'
+        result, match_type, _ = self.approximate[source_lang].match(text)
+        if result:
+            return result, match_type
+        return None, None
+
+    def lookup(self, text, source_lang):
+        """Translation of text from the library, or None"""
+        return self.match(text, source_lang)[0]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Master library store maintenance")
+    parser.add_argument("command", choices=["export", "import", "compile"],
+                        help="export the store to JSON, merge JSON into the store, or compile the library artifact")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite library path")
+    parser.add_argument("--json", default=DEFAULT_JSON_PATH, help="JSON library path")
+    parser.add_argument("--artifact", default=library_artifact.DEFAULT_ARTIFACT_PATH, help="Compiled library path")
+    args = parser.parse_args()
+
+    store = LibraryStore(args.db, args.json)
+    if args.command == "export":
+        print(f"📤 Exported {store.export_json(args.json)} terms to {args.json}")
+    elif args.command == "import":
+        print(f"📥 Imported {store.import_json(args.json)} terms from {args.json}")
+    else:
+        index = LibraryIndex(store, artifact_path=args.artifact)
+        index.refresh(force=True)
+        print(f"📦 Compiled {len(index.forward)} terms into {args.artifact}")
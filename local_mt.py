@@ -0,0 +1,176 @@
+"""
+Local CPU machine translation for the 'local' backend (translation_backends.LocalBackend).
+
+One engine per language direction wraps a Hugging Face seq2seq model
+(MarianMT, Helsinki-NLP/opus-mt-fr-en and opus-mt-en-fr by default) that is
+loaded once per process and kept warm. Engines are not called directly:
+a DynamicBatcher owns each engine and a single inference thread. Concurrent
+translate() calls (the in-flight batches of one upload and of every other
+upload of the worker) are queued, gathered for up to max_wait seconds,
+sorted by token length and regrouped into batches whose padded size stays
+under max_batch_tokens, so short headings are not padded to the length of
+long experience bullets. Each inference batch reports its size, token count
+and latency through on_batch.
+
+Needs the optional 'transformers', 'torch' and 'sentencepiece' packages.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'Helsinki-NLP/opus-mt-{source}-{target}'
+DEFAULT_MAX_BATCH_TOKENS = 4096  # padded tokens per inference batch
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT = 0.01          # seconds spent gathering concurrent requests
+MAX_INPUT_TOKENS = 512
+
+
+class MarianEngine:
+    """A seq2seq translation model and its tokenizer, on CPU"""
+
+    def __init__(self, model_path, threads=0, num_beams=1):
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        if threads:
+            torch.set_num_threads(threads)
+        self._torch = torch
+        self.model_path = model_path
+        self.num_beams = num_beams
+        started = time.perf_counter()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_path).eval()
+        logger.info(f"Loaded translation model {model_path} in {time.perf_counter() - started:.1f}s "
+                    f"({torch.get_num_threads()} CPU threads)")
+
+    def token_lengths(self, texts):
+        encoded = self.tokenizer(texts, truncation=True, max_length=MAX_INPUT_TOKENS)
+        return [len(ids) for ids in encoded['input_ids']]
+
+    def translate(self, texts):
+        with self._torch.inference_mode():
+            inputs = self.tokenizer(texts, return_tensors='pt', padding=True, truncation=True,
+                                    max_length=MAX_INPUT_TOKENS)
+            outputs = self.model.generate(**inputs, num_beams=self.num_beams, max_new_tokens=MAX_INPUT_TOKENS)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+def plan_batches(lengths, max_batch_tokens, max_batch_size):
+    """
+    Group item indexes into batches by token length: shortest first, each
+    batch kept under max_batch_tokens once padded to its longest item.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches = []
+    current = []
+    for i in order:
+        # Sorted ascending, so the new item is the longest of the batch
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * lengths[i] > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _Request:
+    __slots__ = ('texts', 'results', 'error', 'done')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.results = [None] * len(texts)
+        self.error = None
+        self.done = threading.Event()
+
+
+class DynamicBatcher:
+    """Regroups the texts of concurrent translate() calls into token-bounded inference batches"""
+
+    def __init__(self, engine, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait=DEFAULT_MAX_WAIT, on_batch=None, name=''):
+        self.engine = engine
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.on_batch = on_batch  # on_batch(name, segments, tokens, seconds)
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _start(self):
+        # One inference thread per process (a thread started before a fork does not exist in the child)
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name=f'inference-{self.name}', daemon=True)
+                self._thread.start()
+
+    def translate(self, texts):
+        """Translate texts, sharing inference batches with concurrent callers"""
+        if not texts:
+            return []
+        if self._thread is None or self._pid != os.getpid():
+            self._start()
+        request = _Request(list(texts))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _gather(self):
+        requests = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                requests.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                return requests
+
+    def _loop(self):
+        while True:
+            requests = self._gather()
+            try:
+                self.run(requests)
+            except Exception as e:
+                for request in requests:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+
+    def run(self, requests):
+        """Translate the texts of all requests in planned batches, then release the callers"""
+        items = [(request, i) for request in requests for i in range(len(request.texts))]
+        texts = [request.texts[i] for request, i in items]
+        lengths = self.engine.token_lengths(texts)
+        pending = {id(request): len(request.texts) for request in requests}
+        for batch in plan_batches(lengths, self.max_batch_tokens, self.max_batch_size):
+            batch_texts = [texts[i] for i in batch]
+            started = time.perf_counter()
+            try:
+                translations = self.engine.translate(batch_texts)
+                error = None
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} segments failed: {e}")
+                translations, error = [None] * len(batch), e
+            seconds = time.perf_counter() - started
+            tokens = len(batch) * max(lengths[i] for i in batch)
+            logger.debug(f"Inference batch {self.name}: {len(batch)} segments, {tokens} padded tokens, {seconds:.3f}s")
+            if self.on_batch is not None:
+                self.on_batch(self.name, len(batch), tokens, seconds)
+            for i, translation in zip(batch, translations):
+                request, index = items[i]
+                request.results[index] = translation
+                if error is not None:
+                    request.error = error
+                pending[id(request)] -= 1
+                # Callers resume as soon as all their texts are done
+                if not pending[id(request)]:
+                    request.done.set()
@@ -0,0 +1,119 @@
+"""
+Client-held fingerprint manifests for incremental re-translation.
+
+Candidates re-upload their resume after small edits. Instead of keeping
+their paragraphs on the server, each translation returns a compact
+manifest, {paragraph fingerprint: translation} for the paragraphs that
+needed the translation backend, and the client sends it back with the next
+upload: unchanged paragraphs are answered from it and only new or edited
+ones reach the backend.
+
+A Manifest plugs into pipeline.translate_missing as its cache (get_many /
+put_many), in front of the optional shared segment cache. Translations
+coming from a manifest are supplied by the client, so they are used for
+that document only: they are never written to the segment cache or learned
+into the master library.
+
+Fingerprints are the first 16 hex digits of the segment cache key (SHA-256
+of the language pair and text). The manifest is compact JSON, zlib
+compressed and URL-safe base64 encoded. With a server key (MANIFEST_KEY),
+it is encrypted and authenticated with Fernet, which needs the optional
+'cryptography' package; tampered or foreign manifests are then rejected.
+"""
+import base64
+import hashlib
+import json
+import zlib
+
+from segment_cache import segment_key
+
+MANIFEST_VERSION = 1
+FINGERPRINT_LENGTH = 16
+MAX_MANIFEST_BYTES = 2 * 1024 * 1024  # Decompressed size limit
+
+
+class ManifestError(ValueError):
+    """Raised for manifests that cannot be decoded or verified"""
+
+
+def fingerprint(text, source, target):
+    return segment_key(text, source, target)[:FINGERPRINT_LENGTH]
+
+
+def _fernet(key):
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise ManifestError("Encrypted manifests need the 'cryptography' package (pip install cryptography)")
+    # Any passphrase works: derive the 32-byte Fernet key from it
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(key.encode('utf-8')).digest()))
+
+
+class Manifest:
+    """Translations of one document's paragraphs, keyed by fingerprint"""
+
+    def __init__(self, previous=None, cache=None):
+        self.previous = previous or {}  # from the client's last upload
+        self.cache = cache               # optional shared SegmentCache behind it
+        self.entries = {}                # this document's translations, returned to the client
+        self.hits = 0
+
+    def get_many(self, texts, source, target):
+        """Return {text: translation} from the manifest, then from the shared cache"""
+        found = {}
+        for text in texts:
+            key = fingerprint(text, source, target)
+            if key in self.previous:
+                found[text] = self.entries[key] = self.previous[key]
+        self.hits += len(found)
+        rest = [t for t in texts if t not in found]
+        if self.cache is not None and rest:
+            cached = self.cache.get_many(rest, source, target)
+            for text, translation in cached.items():
+                self.entries[fingerprint(text, source, target)] = translation
+            found.update(cached)
+        return found
+
+    def put_many(self, translations, source, target):
+        """Record fresh backend translations (and share them through the cache)"""
+        for text, translation in translations.items():
+            self.entries[fingerprint(text, source, target)] = translation
+        if self.cache is not None:
+            self.cache.put_many(translations, source, target)
+
+    def encode(self, key=None):
+        """Return the manifest as a URL-safe string, encrypted when a key is given"""
+        payload = json.dumps({'v': MANIFEST_VERSION, 'e': self.entries}, ensure_ascii=False, separators=(',', ':'))
+        data = zlib.compress(payload.encode('utf-8'), 9)
+        if key:
+            return _fernet(key).encrypt(data).decode('ascii')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    @classmethod
+    def decode(cls, token, key=None, cache=None):
+        """Build a Manifest from a string returned by encode(); raises ManifestError"""
+        try:
+            if key:
+                fernet = _fernet(key)
+                from cryptography.fernet import InvalidToken
+                try:
+                    data = fernet.decrypt(token.encode('ascii'))
+                except InvalidToken:
+                    raise ManifestError("Manifest was not issued by this server or was modified")
+            else:
+                data = base64.urlsafe_b64decode(token.encode('ascii'))
+            decompressor = zlib.decompressobj()
+            payload = decompressor.decompress(data, MAX_MANIFEST_BYTES)
+            if decompressor.unconsumed_tail:
+                raise ManifestError("Manifest is too large")
+            if not decompressor.eof:
+                raise ManifestError("Manifest is truncated")
+            state = json.loads(payload.decode('utf-8'))
+        except ManifestError:
+            raise
+        except (ValueError, UnicodeError, zlib.error) as e:
+            raise ManifestError(f"Invalid manifest: {e}")
+        if not isinstance(state, dict) or state.get('v') != MANIFEST_VERSION or not isinstance(state.get('e'), dict):
+            raise ManifestError("Unsupported manifest version")
+        entries = {k: v for k, v in state['e'].items() if isinstance(k, str) and isinstance(v, str)}
+        return cls(entries, cache)
@@ -0,0 +1,254 @@
+"""
+Prometheus-style metrics for the web app.
+
+Each process keeps counters, gauges and histograms in memory and
+periodically writes them to a small JSON file (metrics-<pid>.json) in a
+shared folder, the same way jobs.py shares job state. GET /metrics sums
+the files of all gunicorn workers, so the numbers cover the whole server
+and not only the worker that answered. Gauges of workers that have exited
+are dropped; their counters are kept.
+
+UploadRecorder wraps a job: it times the pipeline stages from the stage
+changes the pipeline already reports, collects per-upload counters, feeds
+the registry and logs one structured record per upload.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'resume_translator_'
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name: (type, help)
+METRICS = {
+    'uploads_total': ('counter', 'Finished uploads by kind and status'),
+    'documents_total': ('counter', 'DOCX documents processed'),
+    'segments_total': ('counter', 'Unique text segments extracted'),
+    'library_lookups_total': ('counter', 'Segment lookups by result (exact, normalized, folded, fuzzy, passthrough, miss)'),
+    'segment_cache_hits_total': ('counter', 'Missing segments answered by the segment cache'),
+    'manifest_hits_total': ('counter', "Missing segments answered by the client's manifest"),
+    'translation_batches_total': ('counter', 'Translation backend batches by outcome'),
+    'translation_retries_total': ('counter', 'Translation requests retried after a failure'),
+    'translation_chars_sent_total': ('counter', 'Characters sent to the translation backend'),
+    'translation_fallbacks_total': ('counter', 'Segments left in the source language after a failed or empty translation'),
+    'translation_backend_seconds_total': ('counter', 'Time spent waiting for the translation backend'),
+    'result_cache_lookups_total': ('counter', 'Uploads by result cache outcome (completed, in_flight, miss)'),
+    'inference_segments_total': ('counter', 'Segments translated by the local engine, by direction'),
+    'inference_batch_seconds': ('histogram', 'Latency of local engine inference batches, by direction'),
+    'stage_seconds': ('histogram', 'Time spent in each pipeline stage'),
+    'upload_seconds': ('histogram', 'Total processing time of an upload'),
+    'startup_seconds': ('histogram', 'Seconds from app start to worker readiness and to its first successful upload'),
+    'http_requests_in_flight': ('gauge', 'HTTP requests being served'),
+    'jobs_running': ('gauge', 'Translation jobs running'),
+}
+
+
+def label_string(labels):
+    return ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Per-process metrics, shared with other workers through a folder"""
+
+    def __init__(self, folder=None, flush_interval=1.0):
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        # {name: {label string: value}}; histograms hold {'buckets': [...], 'sum': s, 'count': n}
+        self._data = {'counter': {}, 'gauge': {}, 'histogram': {}}
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _series(self, name):
+        kind = METRICS[name][0]
+        return self._data[kind].setdefault(name, {})
+
+    def _add(self, name, value, labels):
+        with self._lock:
+            series = self._series(name)
+            key = label_string(labels)
+            series[key] = series.get(key, 0) + value
+
+    def inc(self, name, value=1, **labels):
+        if value:
+            self._add(name, value, labels)
+
+    def gauge_add(self, name, value, **labels):
+        self._add(name, value, labels)
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            series = self._series(name)
+            key = label_string(labels)
+            hist = series.setdefault(key, {'buckets': [0] * len(STAGE_BUCKETS), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(STAGE_BUCKETS):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def flush(self, force=False):
+        """Write this process's metrics for the other workers (throttled unless forced)"""
+        if not self.folder:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        state = {'pid': os.getpid(), 'metrics': self.snapshot()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, os.path.join(self.folder, f"metrics-{os.getpid()}.json"))
+        except Exception as e:
+            logger.error(f"Could not write metrics: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def collect(self):
+        """Metrics summed over every worker that wrote to the folder"""
+        snapshots = [self.snapshot()]
+        if self.folder:
+            self.flush(force=True)
+            snapshots = []
+            for name in os.listdir(self.folder):
+                if not (name.startswith('metrics-') and name.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(self.folder, name), 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                data = state['metrics']
+                if state['pid'] != os.getpid() and not _pid_alive(state['pid']):
+                    data['gauge'] = {}
+                snapshots.append(data)
+
+        total = {'counter': {}, 'gauge': {}, 'histogram': {}}
+        for data in snapshots:
+            for kind in ('counter', 'gauge'):
+                for name, series in data.get(kind, {}).items():
+                    merged = total[kind].setdefault(name, {})
+                    for key, value in series.items():
+                        merged[key] = merged.get(key, 0) + value
+            for name, series in data.get('histogram', {}).items():
+                merged = total['histogram'].setdefault(name, {})
+                for key, hist in series.items():
+                    into = merged.setdefault(key, {'buckets': [0] * len(STAGE_BUCKETS), 'sum': 0.0, 'count': 0})
+                    into['buckets'] = [a + b for a, b in zip(into['buckets'], hist['buckets'])]
+                    into['sum'] += hist['sum']
+                    into['count'] += hist['count']
+        return total
+
+    def render(self):
+        """Prometheus text exposition format"""
+        data = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = data[kind].get(name, {})
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for key in sorted(series):
+                if kind != 'histogram':
+                    lines.append(f"{full}{{{key}}} {series[key]}" if key else f"{full} {series[key]}")
+                    continue
+                hist = series[key]
+                sep = ',' if key else ''
+                for bound, count in zip(STAGE_BUCKETS, hist['buckets']):
+                    lines.append(f'{full}_bucket{{{key}{sep}le="{bound}"}} {count}')
+                lines.append(f'{full}_bucket{{{key}{sep}le="+Inf"}} {hist["count"]}')
+                suffix = f"{{{key}}}" if key else ''
+                lines.append(f"{full}_sum{suffix} {hist['sum']}")
+                lines.append(f"{full}_count{suffix} {hist['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+class UploadRecorder:
+    """
+    Stand-in for a jobs.Job passed to a job function: forwards progress
+    updates, times each stage and accumulates per-upload counters in usage.
+    """
+
+    def __init__(self, job, registry, kind, first_stage='extract'):
+        self.job = job
+        self.id = job.id
+        self.registry = registry
+        self.kind = kind
+        self.usage = Counter()
+        self.stages = {}
+        self._stage = first_stage
+        self._started = self._mark = time.perf_counter()
+        registry.gauge_add('jobs_running', 1, kind=kind)
+
+    def _lap(self):
+        now = time.perf_counter()
+        self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._mark
+        self._mark = now
+
+    def update(self, stage=None, **fields):
+        if stage is not None and stage != self._stage:
+            self._lap()
+            self._stage = stage
+        self.job.update(stage=stage, **fields)
+
+    def finish(self, status):
+        """Record the upload in the registry and the log"""
+        self._lap()
+        total = time.perf_counter() - self._started
+        registry = self.registry
+        registry.gauge_add('jobs_running', -1, kind=self.kind)
+        registry.inc('uploads_total', kind=self.kind, status=status)
+        for stage, seconds in self.stages.items():
+            registry.observe('stage_seconds', seconds, kind=self.kind, stage=stage)
+        registry.observe('upload_seconds', total, kind=self.kind)
+
+        usage = self.usage
+        registry.inc('documents_total', usage['documents'])
+        registry.inc('segments_total', usage['segments'])
+        for key, value in usage.items():
+            if key.startswith('lookup_'):
+                registry.inc('library_lookups_total', value, result=key[len('lookup_'):])
+        registry.inc('segment_cache_hits_total', usage['cache_hits'])
+        registry.inc('manifest_hits_total', usage['manifest_hits'])
+        registry.inc('translation_batches_total', usage['batches'] - usage['failed_batches'], outcome='ok')
+        registry.inc('translation_batches_total', usage['failed_batches'], outcome='failed')
+        registry.inc('translation_retries_total', usage['retries'])
+        registry.inc('translation_chars_sent_total', usage['chars_sent'])
+        registry.inc('translation_fallbacks_total', usage['fallbacks'])
+        registry.inc('translation_backend_seconds_total', usage['backend_latency'])
+        registry.flush(force=True)
+
+        record = {
+            'event': 'upload',
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': status,
+            'seconds': round(total, 4),
+            'stages': {stage: round(seconds, 4) for stage, seconds in self.stages.items()},
+            'usage': {key: round(value, 4) if isinstance(value, float) else value for key, value in sorted(usage.items())},
+        }
+        logger.info(f"upload_metrics {json.dumps(record, sort_keys=True)}")
+        return record
@@ -0,0 +1,274 @@
+"""
+Translation step shared by the web app (app.py) and the CLI
+(run_translation_pipeline.py).
+
+Missing strings are packed into batches bounded by item count and by
+characters (long mandate descriptions fill a batch sooner than headings),
+then dispatched concurrently to a translation backend (see
+translation_backends), with a token-bucket rate limiter and a cap on
+in-flight requests. A failed request is retried with exponential backoff
+and jitter; a batch that keeps failing is bisected, so only the segments
+the backend really rejects fall back to the source text, and they are
+reported as untranslated. A backend that is down must not turn bisection
+into hundreds of requests: after max_failures failed requests in a row, or
+once the call has made max_requests_per_batch requests per batch, the
+remaining strings fall back without being sent. Results are applied in batch order, so the
+mapping and the learned library terms are the same as with sequential
+batches.
+An optional segment_cache.SegmentCache answers recently translated
+strings before any batch is sent.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_RATE_LIMIT = 2.0  # Batch requests per second
+DEFAULT_MAX_BATCH_CHARS = 4500  # Google rejects requests of more than 5000 characters
+DEFAULT_RETRIES = 2       # Retries of a failed request before bisecting it
+DEFAULT_BACKOFF = 0.5     # Seconds, doubled on every retry (full jitter)
+DEFAULT_MAX_FAILURES = 8  # Failed requests in a row that stop a translate_missing call
+DEFAULT_MAX_REQUESTS_PER_BATCH = 20  # Request budget of a call, retries and bisection included
+
+
+class BackendUnavailable(RuntimeError):
+    """Raised instead of sending a request once a call has given up on the backend"""
+
+
+def is_safe_to_save(text):
+    """
+    Sanitization filter: Returns True if the text is generic enough to be saved in the library.
+    Returns False for PII, specific dates, or long sentences.
+    """
+    text = text.strip()
+    if not text: return False
+
+    # 1. Exclude too long strings (Sentences)
+    if len(text.split()) > 5:
+        return False
+
+    # 2. Exclude PII patterns
+    # Email
+    if re.search(r'\S+@\S+', text): return False
+    # URL
+    if re.search(r'http[s]?://', text) or re.search(r'www\.', text): return False
+    # Phone numbers (loose check for digits)
+    if sum(c.isdigit() for c in text) > 3: return False
+
+    # 3. Exclude Specific Entities usually containing many numbers
+    # Dates often contain digits (2024, 12/02), Addresses (123 St)
+    if any(char.isdigit() for char in text):
+        return False
+
+    return True
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_batches(items, batch_size, max_chars=DEFAULT_MAX_BATCH_CHARS):
+    """Consecutive batches of at most batch_size items and max_chars characters (a longer item is alone)"""
+    batches = []
+    current = []
+    chars = 0
+    for item in items:
+        if current and (len(current) >= batch_size or chars + len(item) > max_chars):
+            batches.append(current)
+            current = []
+            chars = 0
+        current.append(item)
+        chars += len(item)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def backoff_delay(attempt, backoff):
+    """Full-jitter exponential backoff before retry number attempt (0-based)"""
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+def translate_missing(missing_strings, source_lang, target_lang, backend, mapping,
+                      batch_size=DEFAULT_BATCH_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                      rate_limit=DEFAULT_RATE_LIMIT, on_batch=None, cache=None,
+                      max_batch_chars=DEFAULT_MAX_BATCH_CHARS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                      max_failures=DEFAULT_MAX_FAILURES, max_requests_per_batch=DEFAULT_MAX_REQUESTS_PER_BATCH):
+    """
+    Translate missing strings into `mapping` with a translation_backends
+    backend. Returns (new_knowledge, stats): the safe terms learned as
+    {French: English} and counters for batches, failures, retries,
+    characters sent, requests and backend latency; stats['untranslated']
+    lists the strings left in the source language.
+
+    on_batch(done, total, error) is called as each batch completes.
+    Failed requests are retried `retries` times, then bisected; strings
+    that still fail map back to the source text. After max_failures failed
+    requests in a row (0 = never), or max_requests_per_batch requests per
+    batch in total, nothing more is sent. With a cache, cached
+    strings skip the backend and successful translations are cached.
+    """
+    cached = {}
+    if cache is not None:
+        try:
+            cached = cache.get_many(missing_strings, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"Segment cache lookup failed: {e}")
+        mapping.update(cached)
+        missing_strings = [s for s in missing_strings if s not in cached]
+
+    batches = make_batches(missing_strings, batch_size, max_batch_chars)
+    if not getattr(backend, 'rate_limited', True):
+        # Local engines have no API quota
+        rate_limit = 0
+    limiter = TokenBucket(rate_limit, capacity=max_in_flight)
+    progress_lock = threading.Lock()
+    progress = {'done': 0}
+    # Circuit breaker shared by the batches of this call
+    breaker_lock = threading.Lock()
+    breaker = {'requests': 0, 'failures': 0, 'open': None}
+    max_requests = max_requests_per_batch * len(batches)
+
+    def admit():
+        """Count one request, or return the BackendUnavailable that stops the call"""
+        with breaker_lock:
+            if breaker['open'] is None and breaker['requests'] >= max_requests:
+                breaker['open'] = BackendUnavailable(f"request budget of {max_requests} exhausted")
+                logger.warning(f"Translation stopped: {breaker['open']}")
+            if breaker['open'] is None:
+                breaker['requests'] += 1
+            return breaker['open']
+
+    def record(error):
+        with breaker_lock:
+            if error is None:
+                breaker['failures'] = 0
+                return
+            breaker['failures'] += 1
+            if max_failures and breaker['failures'] >= max_failures and breaker['open'] is None:
+                breaker['open'] = BackendUnavailable(f"{breaker['failures']} failed requests in a row, last: {error}")
+                logger.warning(f"Translation stopped: {breaker['open']}")
+
+    def request(batch, attempts):
+        """One BatchResult, or the last error after `attempts` tries"""
+        error = None
+        for attempt in range(attempts):
+            if attempt and breaker['open'] is None:
+                time.sleep(backoff_delay(attempt - 1, backoff))
+            stopped = admit()
+            if stopped is not None:
+                return None, stopped, max(attempt - 1, 0)
+            limiter.acquire()
+            try:
+                result = backend.translate_batch(batch, source_lang, target_lang)
+                if len(result.translations) != len(batch):
+                    raise RuntimeError(f"{len(result.translations)} translations for {len(batch)} texts")
+                record(None)
+                return result, None, attempt
+            except Exception as e:
+                error = e
+                record(e)
+        return None, error, attempts - 1
+
+    def translate_resilient(batch, attempts):
+        """[(texts, BatchResult)] for the parts that succeeded, [(texts, error)] for the rest, retries"""
+        result, error, retried = request(batch, attempts)
+        if error is None:
+            return [(batch, result)], [], retried
+        if len(batch) == 1 or isinstance(error, BackendUnavailable):
+            return [], [(batch, error)], retried
+        # Keeps failing: bisect so only the offending strings fall back
+        half = len(batch) // 2
+        done, failed = [], []
+        for part in (batch[:half], batch[half:]):
+            part_done, part_failed, part_retried = translate_resilient(part, 1 + retries if len(part) == 1 else 1)
+            done += part_done
+            failed += part_failed
+            retried += part_retried
+        return done, failed, retried
+
+    def run(batch):
+        outcome = translate_resilient(batch, 1 + retries)
+        failed = outcome[1]
+        with progress_lock:
+            progress['done'] += 1
+            done = progress['done']
+        if on_batch:
+            on_batch(done, len(batches), failed[-1][1] if failed else None)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        results = list(pool.map(run, batches))
+
+    # Apply in batch order so the outcome does not depend on completion order
+    new_knowledge = {}
+    fresh = {}
+    untranslated = []
+    stats = {'batches': len(batches), 'failed_batches': 0, 'retries': 0, 'requests': breaker['requests'],
+             'chars_sent': 0, 'backend_latency': 0.0, 'cache_hits': len(cached), 'fallbacks': 0,
+             'untranslated': untranslated}
+    for batch, (done, failed, retried) in zip(batches, results):
+        stats['retries'] += retried
+        if failed:
+            stats['failed_batches'] += 1
+            logger.error(f"Batch translation failed for {sum(len(texts) for texts, _ in failed)} of "
+                         f"{len(batch)} strings: {failed[-1][1]}")
+        translated_parts = {}
+        for texts, result in done:
+            stats['chars_sent'] += result.chars_sent
+            stats['backend_latency'] += result.latency
+            translated_parts.update(zip(texts, result.translations))
+        for original in batch:
+            translated = translated_parts.get(original)
+            if translated:
+                mapping[original] = translated
+                fresh[original] = translated
+
+                # SAFETY CHECK BEFORE SAVING
+                if backend.learns and is_safe_to_save(original):
+                    if source_lang == 'fr':
+                        # Forward: original=FR, translated=EN
+                        new_knowledge[original] = translated
+                    else:
+                        # Reverse: original=EN, translated=FR
+                        # Store as {FR: EN} to maintain library consistency
+                        new_knowledge[translated] = original
+            else:
+                mapping[original] = original
+                stats['fallbacks'] += 1
+                untranslated.append(original)
+
+    if cache is not None and fresh:
+        try:
+            cache.put_many(fresh, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"Segment cache update failed: {e}")
+    return new_knowledge, stats
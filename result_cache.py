@@ -0,0 +1,82 @@
+"""
+Content-addressed index of upload jobs, for identical uploads.
+
+Double-clicks, browser retries and colleagues re-sending the same resume
+would each run the whole pipeline. Uploads are keyed by a SHA-256 of their
+bytes, file name and the options that change the output; the index maps a
+key to the job that handles it, in one small JSON file per key in the
+uploads folder, so every gunicorn worker sees it.
+
+The first upload of a key claims its file (O_EXCL create) before queuing
+its job; identical uploads arriving meanwhile get the same job id and poll
+the same job (single-flight). Once the job is done, its entry records the
+library version the result was built with, so an identical upload within
+the retention window reuses the result until the library changes. Entries
+of failed or expired jobs are replaced. Claims are best effort: two workers
+replacing the same stale entry at once may both run a job, which only costs
+the duplicate work.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+ENTRY_SUFFIX = '.result.json'
+CLAIM_WAIT = 1.0  # seconds to wait for a claimant to record its job id
+
+
+def upload_key(digest, kind, filename, options=()):
+    """Key of an upload from the SHA-256 hex digest of its bytes"""
+    parts = [kind, filename, *(str(o) for o in options), digest]
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """{upload key: {'job_id', 'library_version'}} shared through a folder"""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}{ENTRY_SUFFIX}")
+
+    def claim(self, key):
+        """Create the entry of key; False when another upload already holds it"""
+        try:
+            os.close(os.open(self.path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            return True
+        except FileExistsError:
+            return False
+
+    def read(self, key, wait=CLAIM_WAIT):
+        """Return the entry of key, waiting up to wait seconds for a fresh claim to be recorded"""
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                with open(self.path(key), 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+            except ValueError:
+                # Claimed but not recorded yet
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.02)
+
+    def record(self, key, job_id, library_version):
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'job_id': job_id, 'library_version': library_version}, f)
+            os.replace(tmp_path, self.path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def release(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,135 @@
+"""
+Short-lived store for translated documents served by token.
+
+In in-memory mode the web app never writes the translated document to the
+uploads folder: the job hands the output buffer to a ResultStore and the
+client downloads it from /result/<token> within the TTL (60 seconds, like
+uploaded files).
+
+Without a folder, results stay in this process's memory, which suits a
+single worker. Under gunicorn, point the store at a folder on a RAM-backed
+filesystem shared by the workers (/dev/shm on Linux), so any worker can
+serve the download; each result is one file named by its token plus a small
+JSON sidecar holding the download name.
+"""
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+
+DEFAULT_TTL = 60  # seconds, aligned with the upload retention policy
+COPY_BUFFER = 64 * 1024
+
+
+class ResultStore:
+    """Results keyed by random tokens, dropped after ttl seconds"""
+
+    def __init__(self, folder=None, ttl=DEFAULT_TTL):
+        self.folder = folder
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = {}  # token -> (expires_at, filename, buffer)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def put(self, buffer, filename):
+        """Store a readable buffer (BytesIO, SpooledTemporaryFile) and return its token"""
+        token = secrets.token_hex(16)
+        expires_at = time.time() + self.ttl
+        buffer.seek(0)
+        if self.folder:
+            self._write(token, buffer, filename, expires_at)
+            buffer.close()
+        else:
+            with self._lock:
+                self._results[token] = (expires_at, filename, buffer)
+        self.purge()
+        return token
+
+    def _write(self, token, buffer, filename, expires_at):
+        data_path = os.path.join(self.folder, token)
+        self._replace(data_path, lambda f: shutil.copyfileobj(buffer, f, COPY_BUFFER))
+        # The sidecar is written last: a result is visible only once complete
+        meta = json.dumps({'filename': filename, 'expires_at': expires_at}).encode('utf-8')
+        self._replace(f"{data_path}.json", lambda f: f.write(meta))
+
+    def _replace(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, token):
+        """Return (filename, bytes) for a live token, or None"""
+        if not token.isalnum():
+            return None
+        now = time.time()
+        if self.folder:
+            data_path = os.path.join(self.folder, token)
+            try:
+                with open(f"{data_path}.json", 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta['expires_at'] <= now:
+                    return None
+                with open(data_path, 'rb') as f:
+                    return meta['filename'], f.read()
+            except (OSError, ValueError, KeyError):
+                return None
+        with self._lock:
+            entry = self._results.get(token)
+            if entry is None or entry[0] <= now:
+                return None
+            expires_at, filename, buffer = entry
+            # Buffers are shared by concurrent downloads: read under the lock
+            buffer.seek(0)
+            return filename, buffer.read()
+
+    def exists(self, token):
+        """True while token can be downloaded"""
+        if not token.isalnum():
+            return False
+        if self.folder:
+            try:
+                with open(os.path.join(self.folder, f"{token}.json"), 'r', encoding='utf-8') as f:
+                    return json.load(f)['expires_at'] > time.time()
+            except (OSError, ValueError, KeyError):
+                return False
+        with self._lock:
+            entry = self._results.get(token)
+            return entry is not None and entry[0] > time.time()
+
+    def purge(self):
+        """Drop expired results; returns how many were removed"""
+        now = time.time()
+        removed = 0
+        if self.folder:
+            for name in os.listdir(self.folder):
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(self.folder, name)
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        expired = json.load(f)['expires_at'] <= now
+                except (OSError, ValueError, KeyError):
+                    expired = True
+                if expired:
+                    for path in (meta_path, meta_path[:-len('.json')]):
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+                    removed += 1
+            return removed
+        with self._lock:
+            for token in [t for t, entry in self._results.items() if entry[0] <= now]:
+                self._results.pop(token)[2].close()
+                removed += 1
+        return removed
@@ -1,210 +1,127 @@
 #!/usr/bin/env python3
-import zipfile
-import json
 import re
 import os
 import sys
 import argparse
-import time
+import glob
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Check for dependencies and provide friendly error
-try:
-    from deep_translator import GoogleTranslator
-except ImportError:
-    print("❌ Error: 'deep-translator' library not found.")
-    print("Please run 'setup_requirements.sh' (Linux) or 'setup_windows.bat' (Windows) first.")
-    sys.exit(1)
+import docx_engine
+from fuzzy_match import DEFAULT_FUZZY_THRESHOLD
+from language_detection import detect_language
+from library_store import LibraryIndex, LibraryStore
+from manifest import Manifest, ManifestError
+from pipeline import (DEFAULT_BACKOFF, DEFAULT_MAX_BATCH_CHARS, DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE_LIMIT,
+                      DEFAULT_RETRIES, translate_missing)
+from segmentation import assemble, is_passthrough, segment_missing
+from translation_backends import BACKENDS, create_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-MASTER_LIBRARY = 'master_library.json'
+# The master library lives next to this script, whatever the working directory
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MASTER_LIBRARY = os.path.join(SCRIPT_DIR, 'master_library.json')
+MASTER_LIBRARY_DB = os.path.join(SCRIPT_DIR, 'master_library.db')
+# Compiled library mapped by the pool workers (see library_artifact.py), '' builds it in memory
+MASTER_LIBRARY_ARTIFACT = os.environ.get('LIBRARY_ARTIFACT', os.path.join(SCRIPT_DIR, 'master_library.idx'))
+MANIFEST_SUFFIX = '.manifest'
+
+def manifest_path(manifest_dir, source_docx):
+    return os.path.join(manifest_dir, os.path.basename(source_docx) + MANIFEST_SUFFIX)
 
-def load_master_library(library_path):
-    if os.path.exists(library_path):
+def load_manifest(path):
+    """Manifest saved by a previous run (MANIFEST_KEY decrypts web-issued ones); empty when absent or invalid"""
+    if os.path.exists(path):
         try:
-            with open(library_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"Could not load library: {e}")
-            return {}
-    return {}
-
-def save_master_library(library_path, data):
-    """Saves non-empty translations back to the master library"""
-    clean_data = {k: v for k, v in data.items() if isinstance(v, str) and v.strip() != ""}
-    try:
-        with open(library_path, 'w', encoding='utf-8') as f:
-            json.dump(clean_data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        logger.error(f"Failed to save library: {e}")
+            with open(path, 'r', encoding='utf-8') as f:
+                return Manifest.decode(f.read().strip(), os.environ.get('MANIFEST_KEY'))
+        except ManifestError as e:
+            logger.warning(f"Ignoring manifest {path}: {e}")
+    return Manifest()
 
-def detect_language(text_segments):
-    """
-    Heuristic language detection based on keyword frequency.
-    Returns: 'fr' or 'en'
-    """
-    # Join first ~1000 chars to analyze
-    sample_text = " ".join(text_segments)[:2000].lower()
-    
-    fr_signals = ["expérience", "formation", "compétences", "langues", "résumé", "janvier", "février", "août", "juillet", "décembre", "mars", "avril", "mai", "juin", "septembre", "octobre", "novembre", "actuel", "aujourd'hui"]
-    en_signals = ["experience", "education", "skills", "languages", "summary", "january", "february", "august", "july", "december", "march", "april", "may", "june", "september", "october", "november", "current", "present"]
-    
-    fr_score = sum(sample_text.count(s) for s in fr_signals)
-    en_score = sum(sample_text.count(s) for s in en_signals)
-    
-    # Check simple words if scores are tied or zero
-    if fr_score == 0 and en_score == 0:
-        if " et " in sample_text or " le " in sample_text or " la " in sample_text:
-            return 'fr'
-        if " and " in sample_text or " the " in sample_text:
-            return 'en'
-            
-    if en_score > fr_score:
-        return 'en'
-    return 'fr'
-
-def is_safe_to_save(text):
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(manifest.encode(os.environ.get('MANIFEST_KEY')))
+    os.replace(tmp_path, path)
+
+def output_path(source_docx, detected_lang):
+    """..._FR.docx -> ..._EN.docx (and back), other names get the target suffix"""
+    base_name, _ = os.path.splitext(source_docx)
+    if detected_lang == 'fr':
+        # ..._FR -> ..._EN
+        if re.search(r'[_.-]FR$', base_name, re.I):
+            return re.sub(r'([_.-])FR$', r'\1EN', base_name, flags=re.I) + '.docx'
+        return f"{base_name}_EN.docx"
+    # ..._EN -> ..._FR
+    if re.search(r'[_.-]EN$', base_name, re.I):
+        return re.sub(r'([_.-])EN$', r'\1FR', base_name, flags=re.I) + '.docx'
+    return f"{base_name}_FR.docx"
+
+def process_translation(source_docx, backend, library_index, batch_size=30, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                        rate_limit=DEFAULT_RATE_LIMIT, compresslevel=docx_engine.DEFAULT_COMPRESSLEVEL, segmentation=False,
+                        manifest_dir=None, max_batch_chars=DEFAULT_MAX_BATCH_CHARS, retries=DEFAULT_RETRIES,
+                        backoff=DEFAULT_BACKOFF, overwrite=False, verbose=True):
     """
-    Sanitization filter: Returns True if the text is generic enough to be saved in the library.
-    Returns False for PII, specific dates, or long sentences.
+    Main process: Extract -> Detect Lang -> Translate (Bidirectional) -> Generate DOCX
+    Returns a result dict with counters and the safe terms learned ({French: English});
+    the caller writes them to the library, once for a whole run.
+    With manifest_dir, paragraphs translated by the previous run of the same file
+    are reused from its manifest and the manifest is updated.
+    An existing output file is only replaced with overwrite.
     """
-    text = text.strip()
-    if not text: return False
-    
-    # 1. Exclude too long strings (Sentences)
-    if len(text.split()) > 5:
-        return False
-        
-    # 2. Exclude PII patterns
-    # Email
-    if re.search(r'\S+@\S+', text): return False
-    # URL
-    if re.search(r'http[s]?://', text) or re.search(r'www\.', text): return False
-    # Phone numbers (loose check for digits)
-    if sum(c.isdigit() for c in text) > 3: return False
-    
-    # 3. Exclude Specific Entities usually containing many numbers
-    # Dates often contain digits (2024, 12/02), Addresses (123 St)
-    if any(char.isdigit() for char in text):
-        return False
-        
-    return True
-
-def translate_docx(source_docx, translation_map, output_docx):
-    """Translate DOCX file using the translation map while preserving XML structure"""
-    def sub_xml(content, trans_map):
-        xml_str = content.decode('utf-8')
-        def replace_para(match):
-            para_xml = match.group(0)
-            # Find all text content within the paragraph
-            t_contents = re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para_xml)
-            para_text = "".join(t_contents)
-            
-            # Look for translation (exact match or stripped)
-            translation = trans_map.get(para_text) or trans_map.get(para_text.strip())
-            
-            if translation and isinstance(translation, str) and translation.strip() != "":
-                state = {'first': True}
-                def sub_t(t_match):
-                    tag_start = t_match.group(1)
-                    if state['first']:
-                        state['first'] = False
-                        # Basic XML escaping for special characters
-                        safe = translation.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
-                        return f'<w:t{tag_start}>{safe}</w:t>'
-                    # Clear subsequent text tags in the same paragraph to avoid duplicates
-                    return f'<w:t{tag_start}></w:t>'
-                return re.sub(r'<w:t([^>]*)>([^<]*)</w:t>', sub_t, para_xml)
-            return para_xml
-        
-        # Process each paragraph
-        return re.sub(r'<w:p\b[^>]*>.*?</w:p>', replace_para, xml_str, flags=re.DOTALL).encode('utf-8')
-
-    target_pattern = re.compile(r'word/(document|header|footer)\d*\.xml')
-    try:
-        with zipfile.ZipFile(source_docx, 'r') as zin, zipfile.ZipFile(output_docx, 'w', zipfile.ZIP_DEFLATED) as zout:
-            for info in zin.infolist():
-                content = zin.read(info.filename)
-                if target_pattern.match(info.filename):
-                    zout.writestr(info.filename, sub_xml(content, translation_map))
-                else:
-                    zout.writestr(info, content)
-    except Exception as e:
-        logger.error(f"DOCX translation failed: {e}")
+    say = print if verbose else (lambda *a, **k: None)
+    started = time.perf_counter()
+    result = {'source': source_docx, 'output': None, 'error': None, 'segments': 0,
+              'library_hits': 0, 'fuzzy_hits': 0, 'translated': 0, 'segmented': 0,
+              'chars_sent': 0, 'manifest_hits': 0, 'untranslated': [], 'language': None, 'language_confidence': 0.0,
+              'new_knowledge': {}, 'elapsed': 0.0}
 
-def process_translation(source_docx):
-    """Main process: Extract -> Detect Lang -> Translate (Bidirectional) -> Generate DOCX"""
-    # Ensure absolute path for source because we might change CWD
-    source_docx = os.path.abspath(source_docx)
-    
     if not os.path.exists(source_docx):
-        print(f"❌ Error: File not found: {source_docx}")
-        return
-
-    # Set working directory to script location to find master_library.json
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
+        say(f"❌ Error: File not found: {source_docx}")
+        result['error'] = 'File not found'
+        return result
 
     # 1. Extract strings from DOCX
-    target_pattern = re.compile(r'word/(document|header|footer)\d*\.xml')
-    unique_strings = []
-    
-    print(f"📖 Reading {os.path.basename(source_docx)}...")
+    say(f"📖 Reading {os.path.basename(source_docx)}...")
     try:
-        with zipfile.ZipFile(source_docx, 'r') as z:
-            for info in z.infolist():
-                if target_pattern.match(info.filename):
-                    content = z.read(info.filename).decode('utf-8')
-                    paragraphs = re.findall(r'<w:p\b[^>]*>.*?</w:p>', content, flags=re.DOTALL)
-                    for para in paragraphs:
-                        t_contents = re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para)
-                        para_text = "".join(t_contents).strip()
-                        if para_text and para_text not in unique_strings:
-                            unique_strings.append(para_text)
+        document = docx_engine.load_document(source_docx)
+        unique_strings = document.segments()
     except Exception as e:
-        print(f"❌ Error reading DOCX: {e}")
-        return
+        say(f"❌ Error reading DOCX: {e}")
+        result['error'] = f"Error reading DOCX: {e}"
+        return result
+    result['segments'] = len(unique_strings)
     
     # 2. Detect Language
-    detected_lang = detect_language(unique_strings)
+    detection = detect_language(unique_strings)
+    detected_lang = detection.lang
+    result['language'] = detected_lang
+    result['language_confidence'] = detection.confidence
+    if detection.low_confidence:
+        say(f"⚠️ Language detection is uncertain (confidence {detection.confidence:.2f}); check the output direction.")
     if detected_lang == 'fr':
         target_lang = 'en'
-        print("🇫🇷 Detected language: French -> Target: English")
+        say("🇫🇷 Detected language: French -> Target: English")
     else:
         target_lang = 'fr'
-        print("🇬🇧 Detected language: English -> Target: French")
+        say("🇬🇧 Detected language: English -> Target: French")
 
-    # 3. Load Library & Prepare Reverse Lookup if needed
-    master_lib = load_master_library(MASTER_LIBRARY)
-    
-    # If translating EN -> FR, we need to reverse the library (Value matches Key)
-    # Master Lib Structure: { "French": "English" }
-    current_library = {} 
-    
-    if detected_lang == 'fr':
-        # FR -> EN: Use library as is
-        current_library = master_lib
-    else:
-        # EN -> FR: Create reverse map { "English": "French" }
-        current_library = {v: k for k, v in master_lib.items() if v and isinstance(v, str)}
-
-    # Build normalized lookup for fuzzy matching (ignore trailing :;. and spaces)
-    norm_lookup = {}
-    for k, v in current_library.items():
-        nk = k.strip().rstrip(':;\u00a0. ').replace('\u00a0', ' ').strip()
-        if nk and nk not in norm_lookup:
-            norm_lookup[nk] = v
-
-    def fuzzy_lookup(text):
-        """Try exact match first, then normalized (strip trailing :;. and spaces)"""
-        result = current_library.get(text) or current_library.get(text.strip())
-        if result:
-            return result
-        norm = text.strip().rstrip(':;\u00a0. ').replace('\u00a0', ' ').strip()
-        return norm_lookup.get(norm)
+    # The output may be another original (CV_EN.docx next to CV_FR.docx) or a previous run's result
+    output_docx = output_path(source_docx, detected_lang)
+    if os.path.exists(output_docx) and not overwrite:
+        say(f"❌ Error: {os.path.basename(output_docx)} already exists (use --overwrite to replace it)")
+        result['error'] = f"{os.path.basename(output_docx)} already exists"
+        return result
+
+    # 3. Library index (forward, reverse and normalized lookups)
+    if detected_lang == 'en' and library_index.collisions:
+        say(f"⚠️ {len(library_index.collisions)} English terms map to several French entries; using the last one.")
 
     # 4. Map existing translations and identify missing ones
     mapping = {}
@@ -215,94 +132,226 @@ def process_translation(source_docx):
         clean_s = s.strip()
         if not clean_s: continue
         
-        # Check library (exact then fuzzy)
-        trans = fuzzy_lookup(s)
+        # Check library (exact, normalized, folded, then near-duplicates)
+        trans, match_type = library_index.match(s, detected_lang)
         
         if trans:
             mapping[s] = trans
             found_in_lib += 1
+            if match_type == 'fuzzy':
+                result['fuzzy_hits'] += 1
         else:
             # Skip numbers/symbols from translation
-            if clean_s.replace('.', '').replace(',', '').isdigit() or len(clean_s) < 2:
+            if is_passthrough(s):
                 mapping[s] = s
             else:
                 missing_strings.append(s)
 
-    print(f"📚 Found {found_in_lib} terms in Master Library.")
+    say(f"📚 Found {found_in_lib} terms in Master Library ({result['fuzzy_hits']} near-duplicates).")
+    result['library_hits'] = found_in_lib
+
+    # Optionally reuse library pieces of the missed paragraphs
+    plans = {}
+    if segmentation and missing_strings:
+        missing_strings, plans = segment_missing(missing_strings, lambda t: library_index.lookup(t, detected_lang))
+        result['segmented'] = len(plans)
+        say(f"✂️ Split {len(plans)} paragraphs to reuse library pieces.")
+
+    manifest = load_manifest(manifest_path(manifest_dir, source_docx)) if manifest_dir else None
 
     # 5. AI Translation for missing strings
     if missing_strings:
-        print(f"🤖 Translating {len(missing_strings)} new strings via AI...")
-        try:
-            translator = GoogleTranslator(source=detected_lang, target=target_lang)
-            batch_size = 30
-            
-            # Identify new knowledge to save (only safe terms)
-            new_knowledge = {}
-            
-            for i in range(0, len(missing_strings), batch_size):
-                batch = missing_strings[i:i + batch_size]
-                print(f"  ⏳ Processing batch {i//batch_size + 1}/{(len(missing_strings)-1)//batch_size + 1}")
-                try:
-                    translations = translator.translate_batch(batch)
-                    for original, translated in zip(batch, translations):
-                        if translated:
-                            mapping[original] = translated
-                            
-                            # SAFETY CHECK BEFORE SAVING
-                            if is_safe_to_save(original):
-                                if detected_lang == 'fr':
-                                    # Forward: original=FR, translated=EN
-                                    master_lib[original] = translated
-                                    new_knowledge[original] = translated
-                                else:
-                                    # Reverse: original=EN, translated=FR
-                                    # Store as {FR: EN} to maintain library consistency
-                                    master_lib[translated] = original
-                                    new_knowledge[translated] = original
-                        else:
-                            mapping[original] = original
-                    time.sleep(0.5)
-                except Exception as e:
-                    print(f"  ⚠️ Batch failed: {e}")
-                    for s in batch: mapping[s] = s
-            
-            # Save only if we learned something new and safe
-            if new_knowledge:
-                save_master_library(MASTER_LIBRARY, master_lib)
-                print(f"✨ Master library updated with {len(new_knowledge)} new generic terms.")
-            else:
-                print("🔒 No new verifiable terms saved to library (Sanitization active).")
-                
-        except Exception as e:
-            print(f"❌ Translation service error: {e}")
-            for s in missing_strings: mapping[s] = s
+        say(f"🤖 Translating {len(missing_strings)} new strings via AI ({backend.name})...")
+
+        def on_batch(done, total, error):
+            if error is not None:
+                say(f"  ⚠️ Batch failed: {error}")
+            say(f"  ⏳ Processed batch {done}/{total}")
+
+        # Identify new knowledge to save (only safe terms)
+        result['new_knowledge'], stats = translate_missing(
+            missing_strings, detected_lang, target_lang, backend, mapping,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            rate_limit=rate_limit,
+            on_batch=on_batch,
+            cache=manifest,
+            max_batch_chars=max_batch_chars,
+            retries=retries,
+            backoff=backoff,
+        )
+        result['untranslated'] = stats['untranslated']
+        result['manifest_hits'] = stats['cache_hits']
+        result['translated'] = len(missing_strings) - stats['cache_hits']
+        result['chars_sent'] = stats['chars_sent']
+        if manifest is not None:
+            say(f"  ♻️ {stats['cache_hits']} unchanged paragraphs reused from the manifest.")
+        say(f"  📨 {stats['chars_sent']} characters sent for translation.")
+        if stats['untranslated']:
+            say(f"  ⚠️ {len(stats['untranslated'])} segments left untranslated:")
+            for text in stats['untranslated'][:10]:
+                say(f"     - {text[:80]}")
+
+    for s, (parts, resolved, _) in plans.items():
+        mapping[s] = assemble(parts, resolved, mapping, target_lang)
 
     # 6. Generate Output DOCX
-    base_name, _ = os.path.splitext(source_docx)
-    
-    # Handle suffix swapping
-    if detected_lang == 'fr':
-        # ..._FR -> ..._EN
-        if re.search(r'[_.-]FR$', base_name, re.I):
-            output_base = re.sub(r'([_.-])FR$', r'\1EN', base_name, flags=re.I)
-        else:
-            output_base = f"{base_name}_EN"
-    else:
-        # ..._EN -> ..._FR
-        if re.search(r'[_.-]EN$', base_name, re.I):
-            output_base = re.sub(r'([_.-])EN$', r'\1FR', base_name, flags=re.I)
+    say(f"💾 Generating output: {os.path.basename(output_docx)}...")
+    try:
+        docx_engine.translate_docx(source_docx, mapping, output_docx, document=document, compresslevel=compresslevel)
+    except Exception as e:
+        logger.error(f"DOCX translation failed: {e}")
+        result['error'] = f"DOCX translation failed: {e}"
+        return result
+    result['output'] = output_docx
+    if manifest is not None:
+        try:
+            save_manifest(manifest_path(manifest_dir, source_docx), manifest)
+        except (OSError, ManifestError) as e:
+            logger.error(f"Could not save manifest: {e}")
+    result['elapsed'] = time.perf_counter() - started
+    say("✅ Success! Translation complete.")
+    return result
+
+def expand_sources(patterns):
+    """
+    Resolve files, directories (recursive) and glob patterns to DOCX paths.
+    Directories and patterns skip the outputs of earlier runs: a file that
+    another, older source would be translated to (CV_EN.docx next to
+    CV_FR.docx or CV.docx). Files named explicitly are always kept.
+    """
+    sources = {}
+    expanded = set()
+    for pattern in patterns:
+        explicit = not os.path.isdir(pattern) and not glob.has_magic(pattern)
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '**', '*.docx'), recursive=True)
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
         else:
-            output_base = f"{base_name}_FR"
-        
-    output_docx = f"{output_base}.docx"
-    print(f"💾 Generating output: {os.path.basename(output_docx)}...")
-    translate_docx(source_docx, mapping, output_docx)
-    print("✅ Success! Translation complete.")
+            matches = [pattern]
+        for path in sorted(matches):
+            # Skip Word lock files
+            if not os.path.basename(path).startswith('~$'):
+                sources[os.path.abspath(path)] = None
+                if not explicit:
+                    expanded.add(os.path.abspath(path))
+
+    producers = {}
+    for path in sources:
+        for lang in ('fr', 'en'):
+            producers.setdefault(output_path(path, lang), []).append(path)
+    for path in sorted(expanded):
+        mtime = os.path.getmtime(path)
+        older = [p for p in producers.get(path, ()) if p != path and (os.path.getmtime(p), p) < (mtime, path)]
+        if older:
+            logger.info(f"Skipping {path}: output of {os.path.basename(older[0])}")
+            del sources[path]
+    return list(sources)
+
+# Per-process state of pool workers, built once by _init_worker
+_worker = {}
+
+def _open_library_index(fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+    library_index = LibraryIndex(LibraryStore(MASTER_LIBRARY_DB, MASTER_LIBRARY), fuzzy_threshold,
+                                 MASTER_LIBRARY_ARTIFACT or None)
+    library_index.refresh()
+    return library_index
+
+def _init_worker(backend_name, fuzzy_threshold):
+    _worker['backend'] = create_backend(backend_name)
+    _worker['library_index'] = _open_library_index(fuzzy_threshold)
+
+def _translate_in_worker(source_docx, options):
+    return process_translation(source_docx, _worker['backend'], _worker['library_index'], verbose=False, **options)
+
+def run(sources, backend_name, workers=1, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, **options):
+    """Translate all sources, in a process pool when workers > 1; returns result dicts"""
+    if workers <= 1 or len(sources) == 1:
+        backend = create_backend(backend_name)
+        library_index = _open_library_index(fuzzy_threshold)
+        return [process_translation(source, backend, library_index, **options) for source in sources]
+
+    # The request rate limit is shared between worker processes
+    options = dict(options, rate_limit=options.get('rate_limit', DEFAULT_RATE_LIMIT) / workers)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend_name, fuzzy_threshold)) as pool:
+        futures = [pool.submit(_translate_in_worker, source, options) for source in sources]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            status = f"❌ {result['error']}" if result['error'] else f"✅ {os.path.basename(result['output'])}"
+            print(f"  [{i}/{len(sources)}] {os.path.basename(result['source'])} {status}")
+            results.append(result)
+    return results
+
+def save_learned_terms(results):
+    """Merge the safe terms learned by every file into one library write"""
+    new_knowledge = {}
+    for result in results:
+        new_knowledge.update(result['new_knowledge'])
+    if not new_knowledge:
+        print("🔒 No new verifiable terms saved to library (Sanitization active).")
+        return
+    try:
+        LibraryStore(MASTER_LIBRARY_DB, MASTER_LIBRARY).add_terms(new_knowledge)
+        print(f"✨ Master library updated with {len(new_knowledge)} new generic terms.")
+    except Exception as e:
+        logger.error(f"Failed to save library: {e}")
+
+def print_summary(results, elapsed):
+    """Throughput summary for a multi-file run"""
+    done = [r for r in results if not r['error']]
+    segments = sum(r['segments'] for r in done)
+    hits = sum(r['library_hits'] for r in done)
+    translated = sum(r['translated'] for r in done)
+    print("")
+    print("📊 Summary")
+    print(f"  Files: {len(done)} translated, {len(results) - len(done)} failed in {elapsed:.1f}s ({len(done) / elapsed if elapsed else 0:.2f} files/s)")
+    print(f"  Segments: {segments} ({segments / elapsed if elapsed else 0:.0f}/s)")
+    print(f"  Characters sent for translation: {sum(r['chars_sent'] for r in done)}")
+    print(f"  Segments left untranslated: {sum(len(r['untranslated']) for r in done)}")
+    print(f"  Library hit rate: {hits / (hits + translated) * 100 if hits + translated else 0:.1f}% ({hits} hits, {translated} sent for translation)")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Professional Resume Translator CLI")
-    parser.add_argument("source", help="Path to DOCX file")
+    parser.add_argument("source", nargs='+', help="DOCX files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for multi-file runs (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=30, help="Strings per translation request")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Maximum concurrent translation requests per file")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT, help="Maximum translation requests per second (shared by all workers)")
+    parser.add_argument("--max-batch-chars", type=int, default=DEFAULT_MAX_BATCH_CHARS, help="Maximum characters per translation request")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries of a failed request before splitting it")
+    parser.add_argument("--compresslevel", type=int, default=docx_engine.DEFAULT_COMPRESSLEVEL, help="zlib level (0-9) for rewritten XML parts")
+    parser.add_argument("--segment", action="store_true", help="Split missed paragraphs at labels, lists and sentences to reuse library pieces")
+    parser.add_argument("--fuzzy-threshold", type=float, default=DEFAULT_FUZZY_THRESHOLD, help="Minimum similarity (0-1) for near-duplicate library matches, 0 disables them")
+    parser.add_argument("--manifest-dir", default=None, help="Keep one manifest per file here and only re-translate new or edited paragraphs")
+    parser.add_argument("--overwrite", action="store_true", help="Replace output files that already exist")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None, help="Translation backend (default: TRANSLATION_BACKEND or google)")
     args = parser.parse_args()
-    
-    process_translation(args.source)
+
+    # Check for dependencies and provide friendly error
+    try:
+        create_backend(args.backend)
+    except ImportError as e:
+        if (args.backend or os.environ.get('TRANSLATION_BACKEND')) == 'local':
+            print(f"❌ Error: the local backend needs 'transformers', 'torch' and 'sentencepiece' ({e}).")
+            sys.exit(1)
+        print("❌ Error: 'deep-translator' library not found.")
+        print("Please run 'setup_requirements.sh' (Linux) or 'setup_windows.bat' (Windows) first.")
+        sys.exit(1)
+
+    sources = expand_sources(args.source)
+    if not sources:
+        print("❌ Error: No DOCX files found.")
+        sys.exit(1)
+    if len(sources) > 1:
+        print(f"📂 Translating {len(sources)} files with {args.workers} worker(s)...")
+
+    started = time.perf_counter()
+    results = run(sources, args.backend, workers=args.workers, fuzzy_threshold=args.fuzzy_threshold, batch_size=args.batch_size,
+                  max_in_flight=args.max_in_flight, rate_limit=args.rate_limit, compresslevel=args.compresslevel,
+                  segmentation=args.segment, manifest_dir=args.manifest_dir, max_batch_chars=args.max_batch_chars,
+                  retries=args.retries, overwrite=args.overwrite)
+    save_learned_terms(results)
+    if len(sources) > 1:
+        print_summary(results, time.perf_counter() - started)
@@ -0,0 +1,133 @@
+"""
+Short-lived segment translation cache shared by all workers.
+
+Only short, generic strings are learned into the master library, so long
+sentences would otherwise be re-sent to the translation backend on every
+upload, even when the same resume is re-uploaded a minute later. This cache
+keeps backend translations for a strict TTL (60 seconds by default, the
+same retention as uploaded files) in a local SQLite file shared by the
+gunicorn workers, bounded by least-recently-used eviction and completely
+separate from the library.
+
+Entries are keyed by a SHA-256 of the language pair and source text, so the
+source text is not stored, but translations are, in plaintext, and may
+carry personal data from the resume. Expired rows are therefore deleted by
+the janitor (purge(), every tick), deleted content is overwritten
+(secure_delete) and the WAL is truncated after each purge so no copy
+outlives the TTL on disk.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = 'segment_cache.db'
+DEFAULT_TTL = 60  # seconds, aligned with the upload retention policy
+DEFAULT_MAX_ENTRIES = 20000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key TEXT PRIMARY KEY,
+    translation TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_expires ON segments (expires_at);
+CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used);
+"""
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK = 500
+
+
+def segment_key(text, source, target):
+    return hashlib.sha256(f"{source}\x00{target}\x00{text}".encode('utf-8')).hexdigest()
+
+
+class SegmentCache:
+    """TTL + LRU cache of backend translations in a shared SQLite file"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        # Resolved once: the janitor thread must purge this file, whatever the working directory later
+        self.path = os.path.abspath(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        # Zero deleted rows instead of leaving them in free pages
+        conn.execute('PRAGMA secure_delete=ON')
+        return conn
+
+    def get_many(self, texts, source, target):
+        """Return {text: translation} for the texts cached and not expired"""
+        if not texts:
+            return {}
+        keys = {segment_key(t, source, target): t for t in texts}
+        found = {}
+        now = time.time()
+        conn = self._connect()
+        try:
+            key_list = list(keys)
+            for i in range(0, len(key_list), QUERY_CHUNK):
+                chunk = key_list[i:i + QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, translation FROM segments WHERE key IN ({placeholders}) AND expires_at > ?',
+                    chunk + [now]
+                ).fetchall()
+                for key, translation in rows:
+                    found[keys[key]] = translation
+                if rows:
+                    conn.execute(
+                        f'UPDATE segments SET last_used = ? WHERE key IN ({",".join("?" * len(rows))})',
+                        [now] + [key for key, _ in rows]
+                    )
+        finally:
+            conn.close()
+        return found
+
+    def put_many(self, translations, source, target):
+        """Cache {text: translation}, then drop expired and least recently used entries"""
+        if not translations:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO segments (key, translation, expires_at, last_used) VALUES (?, ?, ?, ?)',
+                    [(segment_key(t, source, target), tr, now + self.ttl, now) for t, tr in translations.items()]
+                )
+                conn.execute('DELETE FROM segments WHERE expires_at <= ?', (now,))
+                excess = conn.execute('SELECT COUNT(*) FROM segments').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    conn.execute(
+                        'DELETE FROM segments WHERE key IN (SELECT key FROM segments ORDER BY last_used LIMIT ?)',
+                        (excess,)
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def purge(self):
+        """Delete expired entries and truncate the WAL that still holds them; returns how many were removed"""
+        conn = self._connect()
+        try:
+            removed = conn.execute('DELETE FROM segments WHERE expires_at <= ?', (time.time(),)).rowcount
+            if removed:
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            return removed
+        finally:
+            conn.close()
@@ -0,0 +1,124 @@
+"""
+Optional sub-paragraph segmentation between library lookup and translation.
+
+A long paragraph that misses the library as a whole often consists of
+pieces the library already knows, e.g. "Environnement technologique :
+Azure Data Factory, Kanban, CI/CD". Such paragraphs are split at label
+colons, semicolons, bullets and sentence ends (and at commas when every
+list item is a library hit); library pieces are reused, only the remaining
+pieces are sent to the backend and the translation is reassembled with the
+original separators, respaced for the target language ("Période : 2019"
+becomes "Period: 2019", "Period: 2019" becomes "Période : 2019").
+Paragraphs where no piece is known are sent whole, so the backend keeps the
+full sentence context.
+"""
+import re
+
+# Captured so separators are kept verbatim on reassembly
+BOUNDARY_RE = re.compile(r'(\s*:\s+|\s*;\s*|\s+[-–•]\s+|(?<=[.!?])\s+(?=[A-ZÀ-ÖØ-Þ]))')
+COMMA_RE = re.compile(r'(\s*,\s*)')
+# Marks French typography separates from the preceding word with a space
+SPACED_MARKS = (':', ';')
+
+
+def is_passthrough(text):
+    """Numbers and single characters are kept as they are"""
+    clean = text.strip()
+    return clean.replace('.', '').replace(',', '').isdigit() or len(clean) < 2
+
+
+def resolve_piece(piece, lookup):
+    """Library translation of a piece; names such as Azure Data Factory keep their own case"""
+    if is_passthrough(piece):
+        return piece
+    translation = lookup(piece)
+    if translation and translation.casefold() == piece.casefold():
+        return piece
+    return translation
+
+
+def plan_segment(text, lookup):
+    """
+    Split text into parts for reassembly. Returns (parts, resolved, unresolved)
+    where parts is a list of (kind, value) with kind 'sep' or 'piece',
+    resolved maps library pieces to their translation and unresolved lists
+    the pieces left for the backend. Returns None when splitting does not help.
+    """
+    parts = []
+    resolved = {}
+    unresolved = []
+    for i, chunk in enumerate(BOUNDARY_RE.split(text)):
+        if chunk == '':
+            continue
+        if i % 2 == 1 or not chunk.strip():
+            parts.append(('sep', chunk))
+            continue
+        translation = resolve_piece(chunk, lookup)
+        if translation:
+            parts.append(('piece', chunk))
+            resolved[chunk] = translation
+            continue
+        # A list of known items ("Azure Data Factory, Kanban, CI/CD")
+        items = COMMA_RE.split(chunk)
+        if len(items) > 1:
+            known = {item: resolve_piece(item, lookup) for item in items[::2]}
+            if all(known.values()):
+                for j, item in enumerate(items):
+                    parts.append(('sep' if j % 2 else 'piece', item))
+                resolved.update(known)
+                continue
+        parts.append(('piece', chunk))
+        unresolved.append(chunk)
+
+    pieces = [value for kind, value in parts if kind == 'piece']
+    if len(pieces) < 2 or not resolved or all(is_passthrough(p) for p in resolved):
+        return None
+    return parts, resolved, unresolved
+
+
+def respace_separator(separator, target):
+    """Space before ':' and ';' as the target language writes it ("label : " in French, "label: " in English)"""
+    mark = separator.strip()
+    if mark not in SPACED_MARKS:
+        return separator
+    trailing = separator[len(separator.rstrip()):]
+    if target == 'en':
+        return mark + trailing
+    if target == 'fr':
+        return ' ' + mark + trailing
+    return separator
+
+
+def assemble(parts, resolved, translated, target=None):
+    """Rebuild the translated paragraph from its parts, separators respaced for target ('en' or 'fr')"""
+    out = []
+    for i, (kind, value) in enumerate(parts):
+        if kind == 'sep':
+            out.append(respace_separator(value, target))
+            continue
+        translation = resolved.get(value) or translated.get(value) or value
+        # "Période :" is in the library as "Period:", the separator already has the colon
+        following = parts[i + 1][1].strip() if i + 1 < len(parts) else ''
+        if following and translation.rstrip().endswith(following[0]):
+            translation = translation.rstrip().rstrip(following[0]).rstrip()
+        out.append(translation)
+    return ''.join(out)
+
+
+def segment_missing(missing_strings, lookup):
+    """
+    Plan segmentation for strings the library missed as a whole.
+    Returns (to_translate, plans): the unique strings still to send to the
+    backend (whole strings and unresolved pieces) and {string: plan}.
+    """
+    to_translate = {}
+    plans = {}
+    for s in missing_strings:
+        plan = plan_segment(s, lookup)
+        if plan is None:
+            to_translate[s] = None
+            continue
+        plans[s] = plan
+        for piece in plan[2]:
+            to_translate[piece] = None
+    return list(to_translate), plans
@@ -27,6 +27,8 @@ fi
 echo "⬇️ Installing dependencies from requirements.txt..."
 if [ -f "requirements.txt" ]; then
     ./venv/bin/pip install -r requirements.txt
+    # Same stamp as start_server.sh, which then skips the install
+    ./venv/bin/python3 -c "import hashlib; print(hashlib.sha256(open('requirements.txt', 'rb').read()).hexdigest())" > venv/.requirements.sha256
     echo "[OK] Dependencies installed successfully."
 else
     echo "[ERROR] requirements.txt not found!"
@@ -19,11 +19,19 @@ if [ ! -d "venv" ]; then
     fi
 fi
 
-# Install dependencies
-echo "⬇️  Installing/Updating dependencies..."
+# Install dependencies, only when requirements.txt changed since the last install
+# (FORCE_INSTALL=1 reinstalls anyway): a restart does not wait for pip
+STAMP="venv/.requirements.sha256"
 if [ -f "requirements.txt" ]; then
-    venv/bin/pip install -r requirements.txt
+    CURRENT=$(venv/bin/python3 -c "import hashlib; print(hashlib.sha256(open('requirements.txt', 'rb').read()).hexdigest())")
+    if [ "$FORCE_INSTALL" = "1" ] || [ ! -f "$STAMP" ] || [ "$(cat "$STAMP")" != "$CURRENT" ]; then
+        echo "⬇️  Installing/Updating dependencies..."
+        venv/bin/pip install -r requirements.txt && echo "$CURRENT" > "$STAMP"
+    else
+        echo "✅ Dependencies up to date (requirements.txt unchanged)"
+    fi
 else
+    echo "⬇️  Installing/Updating dependencies..."
     venv/bin/pip install flask deep-translator werkzeug
 fi
 
@@ -35,9 +43,13 @@ echo ""
 echo "✅ Starting Gunicorn server..."
 echo "📍 Web app will be available at: http://localhost:5000"
 echo "   - 2 concurrent workers"
-echo "   - 300s timeout"
+echo "   - 60s request timeout (translations run as background jobs)"
+echo "   - app preloaded once, workers forked from it (GET /ready answers 200 once a worker is warm)"
 echo "Press CTRL+C to stop the server"
 echo ""
 
+# Translated results stay in RAM (tmpfs) and are shared by the workers
+export RESULT_STORE_FOLDER="${RESULT_STORE_FOLDER:-/dev/shm/resume-translator-results}"
+
 # Use exec to replace the shell process
-exec venv/bin/gunicorn -w 2 -b 0.0.0.0:5000 --timeout 300 --access-logfile - --error-logfile - app:app
+exec venv/bin/gunicorn -w 2 -b 0.0.0.0:5000 --timeout 60 --preload --access-logfile - --error-logfile - app:app
@@ -0,0 +1,357 @@
+import importlib
+import io
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+from test_docx_engine import DOCUMENT_XML, HEADER_XML, W_NS, build_docx
+from translation_backends import FakeBackend
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('app')
+    mp = pytest.MonkeyPatch()
+    mp.chdir(workdir)
+    mp.setenv('TRANSLATION_BACKEND', 'fake')
+    sys.modules.pop('app', None)
+    yield importlib.import_module('app')
+    sys.modules.pop('app', None)
+    mp.undo()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def wait_for_job(client, status_url, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'error'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job still running: {job}")
+
+
+def upload(client, name='CV_Test_FR.docx'):
+    docx = build_docx({'word/document.xml': DOCUMENT_XML, 'word/header1.xml': HEADER_XML})
+    return client.post('/upload', data={'file': (docx, name)})
+
+
+def test_upload_returns_job_and_reports_progress(client):
+    response = upload(client)
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['status_url'])
+
+    assert job['status'] == 'done' and job['stage'] == 'done'
+    assert job['progress']['segments'] == 7
+    assert job['progress']['language'] == 'fr'
+    assert job['progress']['batches_done'] == job['progress']['batches_total'] == 1
+    assert job['result']['filename'] == 'CV_Test_EN.docx'
+
+    download = client.get(job['result']['download_url'])
+    assert download.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(download.data)) as z:
+        assert '[en] Gestion de projet' in z.read('word/document.xml').decode('utf-8')
+
+
+def test_unknown_job_and_bad_upload(client):
+    assert client.get('/jobs/doesnotexist').status_code == 404
+    assert client.get('/jobs/..').status_code == 404
+    assert client.post('/upload', data={'file': (io.BytesIO(b'x'), 'cv.pdf')}).status_code == 400
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def _translate(self, texts, source, target):
+        self.texts.extend(texts)
+        return super()._translate(texts, source, target)
+
+
+def resume(name_line, lang='fr'):
+    body = '<w:p><w:r><w:t>{}</w:t></w:r></w:p>'
+    lines = ["Expérience professionnelle", "Gestion de projet", "Animation des ateliers", name_line]
+    if lang == 'en':
+        lines = ["Professional experience", "Project management", "Summary of skills", name_line]
+    xml = f'<w:document {W_NS}><w:body>' + ''.join(body.format(l) for l in lines) + '</w:body></w:document>'
+    return build_docx({'word/document.xml': xml}).getvalue()
+
+
+def test_bulk_translates_shared_segments_once(app_module, client, monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(app_module, 'translation_backend', backend)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as z:
+        z.writestr('cvs/Jean_Dupont_FR.docx', resume("Jean Dupont, consultant senior"))
+        z.writestr('cvs/Marie_Curie_FR.docx', resume("Marie Curie, architecte données"))
+        z.writestr('cvs/John_Smith_EN.docx', resume("John Smith, senior consultant", 'en'))
+        z.writestr('__MACOSX/cvs/._Jean_Dupont_FR.docx', b'junk')
+        z.writestr('notes.txt', 'ignored')
+    archive.seek(0)
+
+    response = client.post('/upload/bulk', data={'file': (archive, 'cvs.zip')})
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done', job
+    assert job['progress']['documents'] == 3
+    assert job['progress']['unique_segments'] < job['progress']['segments']
+    # Shared headings are sent once even though they appear in two resumes
+    assert len(backend.texts) == len(set(backend.texts))
+    assert "Animation des ateliers" in backend.texts
+
+    download = client.get(job['result']['download_url'])
+    with zipfile.ZipFile(io.BytesIO(download.data)) as z:
+        assert sorted(z.namelist()) == ['Jean_Dupont_EN.docx', 'John_Smith_FR.docx', 'Marie_Curie_EN.docx']
+        with zipfile.ZipFile(io.BytesIO(z.read('Marie_Curie_EN.docx'))) as doc:
+            assert '[en] Animation des ateliers' in doc.read('word/document.xml').decode('utf-8')
+
+
+def test_bulk_refuses_archives_that_expand_beyond_the_limit(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'BULK_MAX_UNCOMPRESSED_BYTES', 1024 * 1024)
+    read = []
+    monkeypatch.setattr(zipfile.ZipFile, 'read', lambda self, *a, **k: read.append(a) or b'')
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('small_FR.docx', resume("Jean Dupont, consultant senior"))
+        # Compresses to a few KB, expands to 2 MB
+        z.writestr('bomb_FR.docx', b'\x00' * (2 * 1024 * 1024))
+    archive.seek(0)
+
+    response = client.post('/upload/bulk', data={'file': (archive, 'bomb.zip')})
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'error' and 'expands to more than 1 MB' in job['error']
+    assert read == []
+
+
+def test_reupload_within_ttl_uses_segment_cache(app_module, client, monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(app_module, 'translation_backend', backend)
+    xml = resume("Jean Dupont, consultant senior depuis plus de dix ans")
+    # A different file name, so the second upload is not served by the result cache
+    for name in ('Jean_Dupont_FR.docx', 'Jean_Dupont_v2_FR.docx'):
+        response = client.post('/upload', data={'file': (io.BytesIO(xml), name)})
+        job = wait_for_job(client, response.get_json()['status_url'])
+        assert job['status'] == 'done', job
+    # The second upload is answered from the cache
+    assert backend.texts.count("Jean Dupont, consultant senior depuis plus de dix ans") == 1
+
+
+def test_janitor_purges_expired_segments(app_module):
+    assert app_module.segment_cache.purge in app_module.janitor.periodic
+
+
+def test_library_artifact_is_recompiled_by_the_janitor(app_module):
+    assert app_module.library_index.artifact is not None
+    assert app_module.library_index.compile_pending in app_module.janitor.periodic
+
+
+def test_metrics_endpoint_reports_stages_and_counters(app_module, client, caplog):
+    caplog.set_level('INFO')
+    response = upload(client, 'CV_Metrics_FR.docx')
+    assert wait_for_job(client, response.get_json()['status_url'])['status'] == 'done'
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert '# TYPE resume_translator_stage_seconds histogram' in text
+    for stage in ('extract', 'detect', 'library', 'translate', 'rewrite'):
+        assert f'resume_translator_stage_seconds_count{{kind="single",stage="{stage}"}}' in text
+    assert 'resume_translator_uploads_total{kind="single",status="done"}' in text
+    assert 'resume_translator_library_lookups_total{result="miss"}' in text
+    assert 'resume_translator_translation_batches_total{outcome="ok"}' in text
+    assert 'resume_translator_http_requests_in_flight 1' in text  # this request
+
+    records = [r.getMessage() for r in caplog.records if r.getMessage().startswith('upload_metrics ')]
+    assert records and '"kind": "single"' in records[-1] and '"stages"' in records[-1]
+
+
+def test_in_memory_mode_serves_result_by_token(app_module, client):
+    response = upload(client, 'CV_Memory_FR.docx')
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done', job
+    assert job['result']['download_url'].startswith('/result/')
+    # Neither the upload nor the translated document touched the uploads folder
+    leftovers = [f for f in os.listdir(app_module.UPLOAD_FOLDER) if f.startswith('CV_Memory')]
+    assert leftovers == []
+
+    download = client.get(job['result']['download_url'])
+    assert download.status_code == 200
+    assert 'CV_Memory_EN.docx' in download.headers['Content-Disposition']
+    assert client.get('/result/notavalidtoken').status_code == 404
+
+
+def test_disk_mode_uses_one_workspace_per_upload(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'IN_MEMORY_PROCESSING', False)
+    # Two users uploading different resumes under the same file name at once
+    responses = [client.post('/upload', data={'file': (io.BytesIO(resume(line)), 'CV_Disk_FR.docx')})
+                 for line in ("Jean Dupont, consultant", "Marie Curie, architecte")]
+    jobs = [wait_for_job(client, r.get_json()['status_url']) for r in responses]
+    urls = [job['result']['download_url'] for job in jobs]
+    assert all(job['status'] == 'done' for job in jobs), jobs
+    assert urls[0] != urls[1]
+    assert all(url.startswith('/download/') and url.endswith('/CV_Disk_EN.docx') for url in urls)
+    assert all(client.get(url).status_code == 200 for url in urls)
+    assert client.get('/download/../CV_Disk_EN.docx').status_code == 404
+
+    # Finished workspaces are handed to the janitor instead of being scanned on upload
+    workspaces = [os.path.join(app_module.UPLOAD_FOLDER, url.split('/')[2]) for url in urls]
+    app_module.janitor.run_pending(now=time.time() + app_module.app.config['RETENTION'] + 1)
+    assert not any(os.path.exists(path) for path in workspaces)
+
+
+def test_manifest_limits_reupload_to_edited_paragraphs(app_module, client, monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(app_module, 'translation_backend', backend)
+    monkeypatch.setattr(app_module, 'segment_cache', None)
+    first = client.post('/upload', data={'file': (io.BytesIO(resume("Jeanne Martin, cheffe de projet confirmée")), 'JM_FR.docx')})
+    job = wait_for_job(client, first.get_json()['status_url'])
+    # The manifest quotes the translations: only behind its token, never in the job state
+    manifest = client.get(job['result']['details_url']).get_json()['manifest']
+    assert 'manifest' not in job['result']
+    with open(app_module.job_manager.state_path(job['id']), encoding='utf-8') as f:
+        assert manifest not in f.read()
+    sent_first = list(backend.texts)
+    assert "Jeanne Martin, cheffe de projet confirmée" in sent_first
+
+    backend.texts.clear()
+    edited = resume("Jeanne Martin, directrice de projet confirmée")
+    second = client.post('/upload', data={'file': (io.BytesIO(edited), 'JM_FR.docx'), 'manifest': manifest})
+    job = wait_for_job(client, second.get_json()['status_url'])
+    assert job['status'] == 'done', job
+    # Only the edited paragraph goes to the backend again
+    assert backend.texts == ["Jeanne Martin, directrice de projet confirmée"]
+    assert job['progress']['manifest_hits'] == len(sent_first) - 1
+
+    # A corrupted manifest is ignored, not fatal
+    third = client.post('/upload', data={'file': (io.BytesIO(edited), 'JM_FR.docx'), 'manifest': 'garbage'})
+    assert wait_for_job(client, third.get_json()['status_url'])['status'] == 'done'
+
+
+def test_identical_uploads_share_one_job(app_module, client, monkeypatch):
+    backend = CountingBackend()
+    backend.latency = 0.2
+    monkeypatch.setattr(app_module, 'translation_backend', backend)
+    monkeypatch.setattr(app_module, 'segment_cache', None)
+    data = resume("Paul Durand, ingénieur logiciel depuis douze ans")
+
+    first = client.post('/upload', data={'file': (io.BytesIO(data), 'PD_FR.docx')}).get_json()
+    # A double-click while the job runs joins it
+    second = client.post('/upload', data={'file': (io.BytesIO(data), 'PD_FR.docx')}).get_json()
+    assert second['job_id'] == first['job_id'] and second['duplicate']
+    job = wait_for_job(client, first['status_url'])
+    assert job['status'] == 'done', job
+
+    # A retry after completion gets the finished result at once
+    third = client.post('/upload', data={'file': (io.BytesIO(data), 'PD_FR.docx')}).get_json()
+    assert third['job_id'] == first['job_id']
+    assert client.get(job['result']['download_url']).status_code == 200
+    assert backend.texts.count("Paul Durand, ingénieur logiciel depuis douze ans") == 1
+
+    # Other bytes under the same name run their own job
+    other = client.post('/upload', data={'file': (io.BytesIO(resume("Paul Durand, architecte")), 'PD_FR.docx')})
+    assert other.get_json()['job_id'] != first['job_id'] and not other.get_json()['duplicate']
+    wait_for_job(client, other.get_json()['status_url'])
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'resume_translator_result_cache_lookups_total{result="in_flight"}' in text
+    assert 'resume_translator_result_cache_lookups_total{result="completed"}' in text
+
+
+def test_upload_with_a_manifest_is_never_shared(app_module, client, monkeypatch):
+    from manifest import Manifest, fingerprint
+    backend = CountingBackend()
+    backend.latency = 0.2
+    monkeypatch.setattr(app_module, 'translation_backend', backend)
+    monkeypatch.setattr(app_module, 'segment_cache', None)
+    data = resume("Claire Petit, analyste métier")
+    crafted = Manifest()
+    crafted.entries = {fingerprint("Claire Petit, analyste métier", 'fr', 'en'): "Injected translation"}
+
+    first = client.post('/upload', data={'file': (io.BytesIO(data), 'CP_FR.docx'), 'manifest': crafted.encode()})
+    # The same bytes without a manifest do not join the job holding the client's translations
+    second = client.post('/upload', data={'file': (io.BytesIO(data), 'CP_FR.docx')}).get_json()
+    assert second['job_id'] != first.get_json()['job_id'] and not second['duplicate']
+    assert wait_for_job(client, first.get_json()['status_url'])['status'] == 'done'
+    job = wait_for_job(client, second['status_url'])
+    with zipfile.ZipFile(io.BytesIO(client.get(job['result']['download_url']).data)) as z:
+        assert b'Injected translation' not in z.read('word/document.xml')
+
+
+class RejectingBackend(CountingBackend):
+    """Rejects any batch holding one particular segment"""
+
+    def _translate(self, texts, source, target):
+        if "Animation des ateliers" in texts:
+            raise RuntimeError("400 bad request")
+        return super()._translate(texts, source, target)
+
+
+def test_failing_segment_falls_back_alone_and_is_reported(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'translation_backend', RejectingBackend())
+    monkeypatch.setattr(app_module, 'segment_cache', None)
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_BACKOFF', 0)
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_RATE_LIMIT', 0)
+    data = resume("Lucie Bernard, analyste fonctionnelle senior")
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'LB_FR.docx')})
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done', job
+    assert job['result']['untranslated_count'] == 1
+    # The segments quote the resume: served behind the result token, never persisted
+    assert 'untranslated' not in job['result']
+    with open(app_module.job_manager.state_path(job['id']), encoding='utf-8') as f:
+        assert "Animation des ateliers" not in f.read()
+    assert client.get(job['result']['details_url']).get_json()['untranslated'] == ["Animation des ateliers"]
+    assert job['progress']['untranslated'] == 1
+
+    with zipfile.ZipFile(io.BytesIO(client.get(job['result']['download_url']).data)) as z:
+        xml = z.read('word/document.xml').decode('utf-8')
+    # The rest of the batch is still translated
+    assert '[en] Lucie Bernard, analyste fonctionnelle senior' in xml
+    assert '>Animation des ateliers<' in xml
+
+
+def test_bulk_reports_untranslated_segments_per_document_behind_the_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'translation_backend', RejectingBackend())
+    monkeypatch.setattr(app_module, 'segment_cache', None)
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_BACKOFF', 0)
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_RATE_LIMIT', 0)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as z:
+        z.writestr('Lea_Roux_FR.docx', resume("Léa Roux, consultante fonctionnelle"))
+        z.writestr('Tom_Blanc_FR.docx', resume("Tom Blanc, chef de projet technique"))
+    archive.seek(0)
+
+    response = client.post('/upload/bulk', data={'file': (archive, 'failing.zip')})
+    job = wait_for_job(client, response.get_json()['status_url'])
+    assert job['status'] == 'done', job
+    assert job['result']['untranslated_count'] == 1
+    assert 'untranslated' not in job['result']
+    with open(app_module.job_manager.state_path(job['id']), encoding='utf-8') as f:
+        assert "Animation des ateliers" not in f.read()
+    details = client.get(job['result']['details_url']).get_json()
+    assert details['untranslated'] == {'Lea_Roux_EN.docx': ["Animation des ateliers"],
+                                       'Tom_Blanc_EN.docx': ["Animation des ateliers"]}
+
+
+def test_ready_after_warmup_and_first_upload_is_measured(app_module, client):
+    deadline = time.time() + 10
+    response = client.get('/ready')
+    while response.status_code == 503 and time.time() < deadline:
+        time.sleep(0.02)
+        response = client.get('/ready')
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body['ready'] is True and body['pid'] == os.getpid()
+    assert body['warmup_seconds'] >= 0
+
+    job = wait_for_job(client, upload(client, 'CV_Ready_FR.docx').get_json()['status_url'])
+    assert job['status'] == 'done', job
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'resume_translator_startup_seconds_count{event="ready"} 1' in text
+    assert 'resume_translator_startup_seconds_count{event="first_upload"} 1' in text
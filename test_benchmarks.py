@@ -0,0 +1,74 @@
+import io
+import zipfile
+
+import pytest
+
+import docx_engine
+from benchmarks import bench_pipeline
+from benchmarks.corpus import build_resume
+from language_detection import detect_language
+
+LIBRARY = {"Compétences": "Skills", "Langues": "Languages", "Formation": "Education"}
+
+
+def test_corpus_shape_is_controlled_and_deterministic():
+    source = build_resume(paragraphs=40, tables=2, table_rows=2, media_kb=8, library=LIBRARY,
+                          library_hit_ratio=0.5, seed=3)
+    assert source == build_resume(paragraphs=40, tables=2, table_rows=2, media_kb=8, library=LIBRARY,
+                                  library_hit_ratio=0.5, seed=3)
+    with zipfile.ZipFile(io.BytesIO(source)) as z:
+        names = z.namelist()
+        assert z.read('word/document.xml').decode('utf-8').count('<w:tbl>') == 2
+    assert {'word/header1.xml', 'word/footer1.xml', 'word/media/image1.png'} <= set(names)
+
+    segments = docx_engine.extract_segments(io.BytesIO(source))
+    assert set(LIBRARY) & set(segments)
+    assert detect_language(segments).lang == 'fr'
+    en = build_resume(paragraphs=40, lang='en', library=LIBRARY, library_hit_ratio=0.0)
+    assert detect_language(docx_engine.extract_segments(io.BytesIO(en))).lang == 'en'
+
+
+def test_benchmark_reports_every_stage_and_flags_regressions():
+    current = bench_pipeline.run_benchmark(['small'], repeat=1)
+    stages = current['results']['small']
+    assert set(bench_pipeline.STAGES) <= set(stages)
+    assert stages['segments'] > stages['missing'] > 0
+
+    slower = {'results': {'small': {stage: stages[stage] * 2 + 5 for stage in bench_pipeline.STAGES}}}
+    assert bench_pipeline.compare(current, current, 0.25) == []
+    assert len(bench_pipeline.compare(slower, current, 0.25)) == len(bench_pipeline.STAGES)
+
+
+def test_startup_benchmark_reaches_a_first_upload():
+    pytest.importorskip('gunicorn')
+    from benchmarks import bench_startup
+    current = bench_startup.run_benchmark(['preload'], workers=1, repeat=1, paragraphs=20)
+    times = current['results']['preload']
+    assert 0 < times['ready'] <= times['first_upload']
+
+
+def test_library_load_benchmark_compares_every_mode():
+    from benchmarks import bench_library_load
+    current = bench_library_load.run_benchmark(300)
+    assert current['meta']['terms'] > 300
+    assert set(current['results']) == set(bench_library_load.MODES)
+    assert all(r['load_ms'] > 0 for r in current['results'].values())
+
+
+def test_load_test_reports_throughput_latency_and_saturation():
+    pytest.importorskip('gunicorn')
+    from benchmarks import load_test
+    from benchmarks.server import GunicornServer
+    mix = load_test.parse_mix('small')
+    documents = load_test.build_documents(mix, per_profile=2)
+    with GunicornServer(workers=1) as server:
+        server.wait_ready()
+        current = load_test.run_load_test(server.url, documents, mix, concurrency=2, requests=4, capacity=2)
+    results = current['results']
+    assert results['statuses'] == {'ok': 4} and results['error_rate'] == 0
+    assert results['throughput'] > 0
+    assert 0 < results['latency']['p50'] <= results['latency']['p99']
+
+    slower = {'results': dict(results, throughput=results['throughput'] * 2)}
+    assert load_test.compare(current, current, 0.2) == []
+    assert [metric for metric, _, _ in load_test.compare(current, slower, 0.2)] == ['throughput']
@@ -0,0 +1,194 @@
+import io
+import re
+import time
+import zipfile
+
+import pytest
+
+from docx_engine import extract_segments, iter_paragraphs, load_document, parse_part, translate_docx
+
+W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document {W_NS}><w:body>'
+    '<w:p w:rsidR="00A1"><w:pPr><w:pStyle w:val="Titre1"/></w:pPr>'
+    '<w:r><w:t>Expérience</w:t></w:r><w:r><w:t xml:space="preserve"> professionnelle :</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>R&amp;D &lt;Cloud&gt;</w:t></w:r><w:r><w:tab/></w:r></w:p>'
+    '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Compétences</w:t></w:r></w:p></w:tc>'
+    '<w:tc><w:p><w:r><w:t>  Gestion de projet  </w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    '<w:p><w:r><w:t>Expérience</w:t></w:r><w:r><w:t xml:space="preserve"> professionnelle :</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Avant</w:t></w:r><w:r><w:pict><w:txbxContent>'
+    '<w:p><w:r><w:t>Zone de texte</w:t></w:r></w:p>'
+    '</w:txbxContent></w:pict></w:r><w:r><w:t>Après</w:t></w:r></w:p>'
+    '<w:p/><w:p><w:r><w:t></w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Août 2024 – aujourd\'hui</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+HEADER_XML = (
+    f'<w:hdr {W_NS}><w:p><w:r><w:t>Curriculum vitae</w:t></w:r></w:p></w:hdr>'
+)
+
+
+def build_docx(parts):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', '<Types/>')
+        for name, xml in parts.items():
+            z.writestr(name, xml)
+    buf.seek(0)
+    return buf
+
+
+def legacy_extract(source_docx):
+    """Reference implementation: the regex path used before docx_engine"""
+    target_pattern = re.compile(r'word/(document|header|footer)\d*\.xml')
+    unique_strings = []
+    with zipfile.ZipFile(source_docx, 'r') as z:
+        for info in z.infolist():
+            if target_pattern.match(info.filename):
+                content = z.read(info.filename).decode('utf-8')
+                paragraphs = re.findall(r'<w:p\b[^>]*>.*?</w:p>', content, flags=re.DOTALL)
+                for para in paragraphs:
+                    t_contents = re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para)
+                    para_text = "".join(t_contents).strip()
+                    if para_text and para_text not in unique_strings:
+                        unique_strings.append(para_text)
+    return unique_strings
+
+
+def legacy_sub_xml(xml_str, trans_map):
+    """Reference implementation: the regex rewrite used before docx_engine"""
+    def replace_para(match):
+        para_xml = match.group(0)
+        para_text = "".join(re.findall(r'<w:t[^>]*>([^<]*)</w:t>', para_xml))
+        translation = trans_map.get(para_text) or trans_map.get(para_text.strip())
+        if translation and isinstance(translation, str) and translation.strip() != "":
+            state = {'first': True}
+            def sub_t(t_match):
+                tag_start = t_match.group(1)
+                if state['first']:
+                    state['first'] = False
+                    safe = translation.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&apos;')
+                    return f'<w:t{tag_start}>{safe}</w:t>'
+                return f'<w:t{tag_start}></w:t>'
+            return re.sub(r'<w:t([^>]*)>([^<]*)</w:t>', sub_t, para_xml)
+        return para_xml
+    return re.sub(r'<w:p\b[^>]*>.*?</w:p>', replace_para, xml_str, flags=re.DOTALL)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 65536])
+def test_iter_paragraphs_matches_regex(chunk_size):
+    expected = re.findall(r'<w:p\b[^>]*>.*?</w:p>', DOCUMENT_XML, flags=re.DOTALL)
+    stream = io.BytesIO(DOCUMENT_XML.encode('utf-8'))
+    assert list(iter_paragraphs(stream, chunk_size=chunk_size)) == expected
+
+
+def test_extract_segments_matches_legacy_regex_path():
+    parts = {
+        'word/document.xml': DOCUMENT_XML,
+        'word/header1.xml': HEADER_XML,
+        'word/styles.xml': f'<w:styles {W_NS}><w:p><w:r><w:t>ignored</w:t></w:r></w:p></w:styles>',
+    }
+    segments = extract_segments(build_docx(parts))
+    assert segments == legacy_extract(build_docx(parts))
+    assert 'R&amp;D &lt;Cloud&gt;' in segments
+    assert segments.count('Expérience professionnelle :') == 1
+    assert 'ignored' not in segments
+
+
+def test_document_model_segments_match_streaming_extraction():
+    parts = {'word/document.xml': DOCUMENT_XML, 'word/header1.xml': HEADER_XML}
+    document = load_document(build_docx(parts))
+    assert document.segments() == extract_segments(build_docx(parts))
+
+
+def test_translate_docx_splice_matches_legacy_rewrite():
+    parts = {'word/document.xml': DOCUMENT_XML, 'word/header1.xml': HEADER_XML}
+    trans_map = {
+        'Expérience professionnelle :': 'Professional Experience:',
+        'R&amp;D &lt;Cloud&gt;': 'R&D <Cloud>',
+        'Gestion de projet': 'Project Management',
+        'Curriculum vitae': "Résumé 'CV'",
+        'Avant': '',
+    }
+    source = build_docx(parts)
+    document = load_document(source)
+    output = io.BytesIO()
+    translate_docx(source, trans_map, output, document=document)
+
+    with zipfile.ZipFile(output) as z:
+        assert z.namelist() == ['[Content_Types].xml', 'word/document.xml', 'word/header1.xml']
+        for name, xml in parts.items():
+            assert z.read(name).decode('utf-8') == legacy_sub_xml(xml, trans_map)
+        assert '<w:t>R&amp;D &lt;Cloud&gt;</w:t>' in z.read('word/document.xml').decode('utf-8')
+
+
+def test_translate_docx_copies_untouched_entries_raw():
+    media = bytes(range(256)) * 400
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('[Content_Types].xml', '<Types/>', compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr('word/document.xml', DOCUMENT_XML, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr('word/media/image1.png', media, compress_type=zipfile.ZIP_STORED)
+        z.writestr('word/styles.xml', '<w:styles/>' * 500, compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+    output = io.BytesIO()
+    translate_docx(buf, {'Compétences': 'Skills'}, output, compresslevel=9)
+
+    def raw_bytes(zip_bytes, name):
+        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as z:
+            info = z.getinfo(name)
+            return info.compress_type, info.CRC, info.compress_size
+
+    with zipfile.ZipFile(output) as z:
+        assert z.testzip() is None
+        assert z.namelist() == ['[Content_Types].xml', 'word/document.xml', 'word/media/image1.png', 'word/styles.xml']
+        assert z.read('word/media/image1.png') == media
+        assert '<w:t>Skills</w:t>' in z.read('word/document.xml').decode('utf-8')
+    for name in ['word/media/image1.png', 'word/styles.xml']:
+        assert raw_bytes(output.getvalue(), name) == raw_bytes(buf.getvalue(), name)
+
+
+def test_translate_docx_falls_back_to_public_zipfile_api(monkeypatch):
+    import docx_engine
+    media = bytes(range(256)) * 400
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('word/document.xml', DOCUMENT_XML, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr('word/media/image1.png', media, compress_type=zipfile.ZIP_STORED)
+        z.writestr('word/styles.xml', '<w:styles/>' * 500, compress_type=zipfile.ZIP_DEFLATED)
+    # As if a Python release renamed one of the internals
+    monkeypatch.setattr(docx_engine, 'RAW_COPY_ZIPFILE_ATTRS', docx_engine.RAW_COPY_ZIPFILE_ATTRS + ('_renamed',))
+    assert not docx_engine.raw_copy_supported(zipfile.ZipFile(buf), zipfile.ZipFile(io.BytesIO(), 'w'))
+    output = io.BytesIO()
+    translate_docx(buf, {'Compétences': 'Skills'}, output)
+
+    with zipfile.ZipFile(output) as z:
+        assert z.testzip() is None
+        assert z.namelist() == ['word/document.xml', 'word/media/image1.png', 'word/styles.xml']
+        assert z.read('word/media/image1.png') == media
+        assert z.getinfo('word/media/image1.png').compress_type == zipfile.ZIP_STORED
+        assert z.read('word/styles.xml') == b'<w:styles/>' * 500
+        assert '<w:t>Skills</w:t>' in z.read('word/document.xml').decode('utf-8')
+
+
+def test_parse_part_scales_linearly_on_multi_megabyte_parts():
+    paragraph = '<w:p w:rsidR="00A1"><w:r><w:t>Mission de conseil numéro {} pour le client</w:t></w:r></w:p>'
+
+    def parse_time(count):
+        xml = f'<w:document {W_NS}><w:body>' + ''.join(paragraph.format(i) for i in range(count)) + '</w:body></w:document>'
+        best = float('inf')
+        for _ in range(5):
+            started = time.perf_counter()
+            part = parse_part('word/document.xml', xml)
+            best = min(best, time.perf_counter() - started)
+        assert len(part.paragraphs) == count
+        return len(xml), best
+
+    small_size, small = parse_time(12000)
+    large_size, large = parse_time(48000)
+    assert large_size > 4 * 1024 * 1024
+    # Four times the text: about four times the time (re-slicing the rest of the part after
+    # every paragraph made it sixteen and more)
+    assert large < 10 * small
@@ -74,7 +74,7 @@ def run_test():
             files = {'file': f}
             response = requests.post(UPLOAD_URL, files=files)
         
-        if response.status_code != 200:
+        if response.status_code != 202:
             print(f"❌ Upload failed with status {response.status_code}")
             print(f"Response: {response.text}")
             return False
@@ -82,11 +82,27 @@ def run_test():
         data = response.json()
         print(f"Response JSON: {json.dumps(data, indent=2)}")
         
-        # 4. Validate Response Structure
-        if not data.get('success'):
-            print("❌ API reported failure")
+        # 4. Poll the job until the translation is done
+        status_url = data.get('status_url')
+        if not status_url:
+            print("❌ No status_url in response")
             return False
-            
+
+        job = {}
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            job = requests.get(f"{SERVER_URL}{status_url}").json()
+            if job.get('status') in ('done', 'error'):
+                break
+            print(f"  ⏳ {job.get('stage')} {job.get('progress')}")
+            time.sleep(0.5)
+
+        # 5. Validate Job Result
+        if job.get('status') != 'done':
+            print(f"❌ Job did not complete: {job}")
+            return False
+
+        data = job['result']
         download_url = data.get('download_url')
         filename = data.get('filename')
         
@@ -100,7 +116,7 @@ def run_test():
             
         print(f"✅ Upload successful. Download URL: {download_url}")
         
-        # 5. Download Result
+        # 6. Download Result
         full_download_url = f"{SERVER_URL}{download_url}"
         print(f"Downloading from {full_download_url}...")
         download_response = requests.get(full_download_url)
@@ -109,7 +125,7 @@ def run_test():
             print(f"❌ Download failed with status {download_response.status_code}")
             return False
             
-        # 6. Save and Verify Content
+        # 7. Save and Verify Content
         with open(DOWNLOAD_PATH, 'wb') as f:
             f.write(download_response.content)
             
@@ -0,0 +1,39 @@
+from fuzzy_match import MAX_CANDIDATES, ApproximateIndex
+
+FILLERS = ["analytiques", "financiers", "industriels", "logistiques", "marketing", "immobiliers",
+           "bancaires", "medicaux", "juridiques", "culturels", "sportifs", "agricoles"]
+TABLE = {
+    "Assistance aux usagers": "User assistance",
+    "Disponible": "Available",
+    "Ingénieur logiciel": "Software engineer",
+    "Analyste fonctionnel": "Functional analyst",
+    "Livrables conformes aux exigences": "Deliverables compliant with requirements",
+}
+
+
+def test_synonyms_and_typos_are_near_duplicates():
+    index = ApproximateIndex(TABLE, threshold=0.9)
+    assert index.match("Assistance aux utilisateurs ;")[:2] == ("User assistance", 'fuzzy')
+    assert index.match("Ingénieur logicel")[:2] == ("Software engineer", 'fuzzy')
+
+
+def test_negations_and_inflections_are_never_near_duplicates():
+    index = ApproximateIndex(TABLE, threshold=0.9)
+    for text in ["Indisponible", "Ingénieure logiciel", "Ingénieurs logiciels", "Analyste fonctionnelle",
+                 "Analystes fonctionnels", "Livrables non conformes aux exigences"]:
+        assert index.match(text)[:2] == (None, None), text
+
+
+def test_near_duplicates_are_off_by_default():
+    assert ApproximateIndex(TABLE).match("Assistance aux utilisateurs")[:2] == (None, None)
+    assert ApproximateIndex(TABLE).match("assistance aux usagers")[:2] == ("User assistance", 'folded')
+
+
+def test_long_keys_sharing_more_trigrams_do_not_crowd_out_a_short_match():
+    table = {"Gestion de projets": "Project management"}
+    # Each long key holds every trigram of the query, but is far too long to be similar
+    table.update({f"Gestion de projets et programmes {word} transverses": f"Programs {word}"
+                  for word in FILLERS})
+    assert len(table) > MAX_CANDIDATES + 1
+    index = ApproximateIndex(table, threshold=0.9)
+    assert index.match("Gestion de porjets")[:2] == ("Project management", 'fuzzy')
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+from janitor import Janitor
+from jobs import JobManager
+
+
+def test_tracked_paths_are_removed_when_they_expire(tmp_path):
+    janitor = Janitor(str(tmp_path), retention=60)
+    workspace = tmp_path / 'abc123'
+    workspace.mkdir()
+    (workspace / 'CV_FR.docx').write_bytes(b'docx')
+    state = tmp_path / 'abc123.job.json'
+    state.write_text('{}')
+
+    now = time.time()
+    janitor.track(str(workspace), expires_at=now + 60)
+    janitor.track(str(state), expires_at=now + 5)
+    assert janitor.run_pending(now) == 0
+    assert janitor.run_pending(now + 10) == 1
+    assert not state.exists() and workspace.exists()
+    assert janitor.run_pending(now + 61) == 1
+    assert not workspace.exists()
+    assert janitor.pending() == 0
+
+
+def test_sweep_removes_orphans_but_not_held_workspaces(tmp_path):
+    janitor = Janitor(str(tmp_path), retention=60)
+    old = time.time() - 3600
+    orphan = tmp_path / 'orphan'
+    orphan.mkdir()
+    running = tmp_path / 'running'
+    running.mkdir()
+    fresh = tmp_path / 'fresh.job.json'
+    fresh.write_text('{}')
+    for path in (orphan, running):
+        os.utime(path, (old, old))
+
+    janitor.hold(str(running))
+    assert janitor.sweep() == 1
+    assert not orphan.exists() and running.exists() and fresh.exists()
+    # Held workspaces are touched, so other workers' sweeps leave them alone too
+    assert Janitor(str(tmp_path), retention=60).sweep() == 0
+    assert running.exists()
+
+
+def test_state_files_of_queued_and_running_jobs_are_held(tmp_path):
+    janitor = Janitor(str(tmp_path), retention=60)
+    manager = JobManager(str(tmp_path), max_workers=1, on_submitted=janitor.hold, on_finished=janitor.track)
+    release = threading.Event()
+    running = manager.submit('A_FR.docx', lambda job: release.wait(10) and {})
+    queued = manager.submit('B_FR.docx', lambda job: {})
+    old = time.time() - 3600
+    for job in (running, queued):
+        os.utime(manager.state_path(job.id), (old, old))
+
+    # The owner's sweep touches them, so another worker's sweep keeps them too
+    assert janitor.sweep() == 0
+    assert Janitor(str(tmp_path), retention=60).sweep() == 0
+    assert JobManager(str(tmp_path)).get(queued.id)['status'] == 'queued'
+
+    release.set()
+    deadline = time.time() + 10
+    while janitor.pending() < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert janitor.run_pending(time.time() + 61) == 2
+    assert manager.get(queued.id) is None
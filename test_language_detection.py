@@ -0,0 +1,40 @@
+from language_detection import SIGNALS, compile_signals, detect_language
+
+
+def test_detects_french_and_english_with_confidence():
+    fr = detect_language(["Expérience professionnelle", "Gestion de projet et animation des ateliers", "Janvier 2020 - aujourd'hui"])
+    en = detect_language(["Professional experience", "Project management and workshops", "January 2020 - present"])
+    assert (fr.lang, en.lang) == ('fr', 'en')
+    assert fr.confidence > 0.8 and en.confidence > 0.8
+    assert not fr.low_confidence
+
+
+def test_tokens_not_substrings():
+    # "information" contains "formation" and "maintenance" contains "mai"
+    detection = detect_language(["Information systems maintenance and support for the team"])
+    assert detection.lang == 'en'
+    assert detection.scores['fr'] == 0
+
+
+def test_keeps_reading_when_the_sample_is_not_conclusive():
+    neutral = ["AWS, AZURE DEVOPS, KANBAN, SCRUM, ORACLE"] * 60  # > 2000 chars, no signal
+    detection = detect_language(neutral + ["Summary of skills", "Education and languages"])
+    assert detection.lang == 'en'
+    assert detection.chars_scored > 2000
+
+    # Nothing to go on: reported as such instead of a confident default
+    unknown = detect_language(neutral)
+    assert unknown.confidence == 0 and unknown.low_confidence
+
+
+def test_short_french_resume_with_words_shared_with_english():
+    detection = detect_language(["Paul Durand", "Développeur Java", "On a migré vers Azure à Lyon en un an"])
+    assert detection.lang == 'fr'
+    assert detection.scores['en'] == 0
+    assert detect_language(["Marie Curie", "On a un an à Paris", "Java, SQL"]).lang == 'fr'
+
+
+def test_signal_table_is_extensible():
+    table = compile_signals(dict(SIGNALS, de={'strong': ["berufserfahrung", "kenntnisse"], 'weak': ["und"]}))
+    detection = detect_language(["Berufserfahrung", "Kenntnisse und Sprachen"], table=table)
+    assert detection.lang == 'de'
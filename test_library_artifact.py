@@ -0,0 +1,117 @@
+import os
+
+import library_artifact
+from library_store import LibraryIndex, LibraryStore
+
+TERMS = {
+    "Compétences :": "Skills:",
+    "Aptitudes": "Skills",
+    "Compétences": "Skills",
+    "Langues": "Languages",
+    "Analyse, conception et architecture": "Analysis, design and architecture",
+    "Assistance aux usagers": "User assistance",
+    "Niveau 2": "Level 2",
+    "Mois": "Months",
+    "Disponible": "Available",
+    "Gestion de projet (équipe de 5 personnes)": "Project management (team of 5)",
+}
+QUERIES = [
+    ("Langues", 'fr'), (" Compétences : ", 'fr'), ("Compétences ;", 'fr'), ("Languages;", 'en'),
+    ("Inconnu", 'fr'), ("ANALYSE, Conception et Architecture", 'fr'), ("Assistance aux utilisateurs ;", 'fr'),
+    ("Design and architecture", 'en'), ("Niveau 3", 'fr'), ("Moi", 'fr'), ("user assistance", 'en'),
+    ("Gestion de porjet (equipe de 5 personnes)", 'fr'), ("Indisponible", 'fr'), ("", 'fr'),
+]
+
+
+def test_compiled_index_answers_like_the_in_memory_index(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms(TERMS)
+    memory = LibraryIndex(store, 0.9)
+    memory.refresh()
+    compiled = LibraryIndex(store, 0.9, artifact_path=str(tmp_path / 'lib.idx'))
+    assert compiled.refresh() is True
+    assert compiled.artifact is not None
+
+    for text, lang in QUERIES:
+        assert compiled.match(text, lang) == memory.match(text, lang), text
+    assert dict(compiled.forward) == memory.forward
+    assert dict(compiled.reverse) == memory.reverse
+    assert compiled.collisions == memory.collisions == {"Skills": ["Aptitudes", "Compétences"]}
+
+
+def test_artifact_is_shared_and_recompiled_when_the_store_changes(tmp_path):
+    path = str(tmp_path / 'lib.idx')
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Formation": "Education"})
+    first = LibraryIndex(store, artifact_path=path)
+    first.refresh()
+    compiled_at = os.stat(path).st_mtime_ns
+
+    # A second worker maps the same file instead of compiling it again
+    second = LibraryIndex(LibraryStore(str(tmp_path / 'lib.db'), json_path=None), artifact_path=path)
+    second.refresh()
+    assert os.stat(path).st_mtime_ns == compiled_at
+    assert second.lookup("Education", 'en') == "Formation"
+    assert first.refresh() is False
+
+    # A learned term is served from memory at once; the compile waits for compile_pending()
+    store.add_terms({"Loisirs": "Hobbies"})
+    assert first.refresh() is True
+    assert first.lookup("Hobbies", 'en') == "Loisirs"
+    assert os.stat(path).st_mtime_ns == compiled_at
+    assert first.compile_pending() is True
+    assert first.artifact.identity == store.identity()
+    assert first.compile_pending() is False
+
+    # The other worker maps the new artifact instead of compiling it again
+    compiled_at = os.stat(path).st_mtime_ns
+    assert second.refresh() is True
+    assert second.lookup("Hobbies", 'en') == "Loisirs"
+    assert second.compile_pending() is True
+    assert second.artifact.identity == store.identity()
+    assert os.stat(path).st_mtime_ns == compiled_at
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == '.tmp'] == []
+
+
+def test_terms_learned_on_top_of_an_artifact_answer_like_a_rebuild(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms(TERMS)
+    compiled = LibraryIndex(store, 0.9, artifact_path=str(tmp_path / 'lib.idx'))
+    compiled.refresh()
+    store.add_terms({"Compétences": "Competencies", "Assistance aux usagers": "User support",
+                     "Gestion des risques et des incidents": "Risk and incident management"})
+    compiled.refresh()
+    memory = LibraryIndex(store, 0.9)
+    memory.refresh()
+
+    queries = QUERIES + [("Competencies;", 'en'), ("Gestion des risques et des incidnets", 'fr'),
+                         ("user support", 'en')]
+    for text, lang in queries:
+        assert compiled.match(text, lang) == memory.match(text, lang), text
+    assert dict(compiled.forward) == memory.forward
+    assert dict(compiled.reverse) == memory.reverse
+    assert compiled.collisions == memory.collisions == {}
+    assert len(compiled.forward) == len(memory.forward)
+
+
+def test_stale_or_damaged_artifacts_are_rejected(tmp_path):
+    path = str(tmp_path / 'lib.idx')
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Formation": "Education"})
+    LibraryIndex(store, artifact_path=path).refresh()
+
+    # A database recreated from scratch reaches the same version with other terms
+    other = LibraryStore(str(tmp_path / 'other.db'), json_path=None)
+    other.add_terms({"Loisirs": "Hobbies"})
+    assert other.version() == store.version()
+    assert library_artifact.open_artifact(path, other.identity()) is None
+    index = LibraryIndex(other, artifact_path=path)
+    index.refresh()
+    assert index.lookup("Loisirs", 'fr') == "Hobbies" and index.lookup("Formation", 'fr') is None
+
+    with open(path, 'r+b') as f:
+        f.truncate(40)
+    assert library_artifact.open_artifact(path) is None
+    index = LibraryIndex(other, artifact_path=path)
+    index.refresh()
+    assert index.lookup("Loisirs", 'fr') == "Hobbies"
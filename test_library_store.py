@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+
+import pytest
+
+from library_store import LibraryIndex, LibraryStore
+
+
+def _learn(db_path, worker):
+    store = LibraryStore(db_path, json_path=None)
+    for i in range(20):
+        store.add_terms({f"Terme {worker}-{i}": f"Term {worker}-{i}"})
+
+
+def test_seeds_from_json_and_learns_incrementally(tmp_path):
+    json_path = tmp_path / 'master_library.json'
+    json_path.write_text(json.dumps({"Compétences": "Skills", "Vide": " "}), encoding='utf-8')
+    store = LibraryStore(str(tmp_path / 'lib.db'), str(json_path))
+    assert store.load() == {"Compétences": "Skills"}
+
+    version = store.version()
+    assert store.add_terms({"Langues": "Languages", "Compétences": "Skills & Abilities"}) == 2
+    assert store.version() == version + 1
+    assert store.load() == {"Compétences": "Skills & Abilities", "Langues": "Languages"}
+
+    # Reopening does not re-seed over learned terms
+    assert LibraryStore(str(tmp_path / 'lib.db'), str(json_path)).load()["Compétences"] == "Skills & Abilities"
+
+
+def test_concurrent_processes_do_not_lose_terms(tmp_path):
+    db_path = str(tmp_path / 'lib.db')
+    LibraryStore(db_path, json_path=None)
+    procs = [multiprocessing.Process(target=_learn, args=(db_path, w)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert len(LibraryStore(db_path, json_path=None).load()) == 60
+
+
+def test_export_json(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Formation": "Education"})
+    out = tmp_path / 'export.json'
+    assert store.export_json(str(out)) == 1
+    assert json.loads(out.read_text(encoding='utf-8')) == {"Formation": "Education"}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == '.tmp'] == []
+
+
+def test_index_lookups_and_reverse_collisions(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Compétences :": "Skills:", "Aptitudes": "Skills", "Compétences": "Skills", "Langues": "Languages"})
+    index = LibraryIndex(store)
+    assert index.refresh() is True
+    assert index.lookup("Langues", 'fr') == "Languages"
+    assert index.lookup(" Compétences : ", 'fr') == "Skills:"
+    assert index.lookup("Compétences\u00a0;", 'fr') == "Skills"
+    assert index.lookup("Languages;", 'en') == "Langues"
+    assert index.lookup("Inconnu", 'fr') is None
+    assert index.collisions == {"Skills": ["Aptitudes", "Compétences"]}
+
+
+def test_index_refreshes_only_when_store_changes(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Formation": "Education"})
+    index = LibraryIndex(store)
+    index.refresh()
+    assert index.refresh() is False
+
+    # Another worker learns a term
+    LibraryStore(str(tmp_path / 'lib.db'), json_path=None).add_terms({"Loisirs": "Hobbies"})
+    assert index.refresh() is True
+    assert index.lookup("Hobbies", 'en') == "Loisirs"
+
+
+def test_index_applies_only_changed_terms_like_a_rebuild(tmp_path, monkeypatch):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({"Aptitudes": "Skills", "Compétences": "Skills", "Langues": "Languages",
+                     "Assistance aux usagers": "User support"})
+    index = LibraryIndex(store, fuzzy_threshold=0.9)
+    index.refresh()
+
+    # Learned terms are applied to the existing lookups, never rebuilt
+    monkeypatch.setattr(LibraryIndex, '_build', lambda self, terms: pytest.fail("full rebuild"))
+    store.add_terms({"Compétences": "Competencies", "Loisirs": "Hobbies", "Langues": "Spoken languages",
+                     "Assistance aux usagers": "User assistance"})
+    assert index.refresh() is True
+    monkeypatch.undo()
+    rebuilt = LibraryIndex(store, fuzzy_threshold=0.9)
+    rebuilt.refresh()
+
+    assert index.forward == rebuilt.forward and index.reverse == rebuilt.reverse
+    assert index.normalized == rebuilt.normalized
+    assert index.collisions == rebuilt.collisions == {}
+    for text, lang in [("Competencies;", 'en'), ("Languages", 'en'), ("spoken LANGUAGES", 'en'),
+                       ("Assistance aux utilisateurs", 'fr'), ("user support", 'en'), ("Loisirs :", 'fr')]:
+        assert index.match(text, lang) == rebuilt.match(text, lang), text
+    assert index.match("Languages", 'en') == (None, None)
+
+
+def test_index_approximate_matches_report_match_type(tmp_path):
+    store = LibraryStore(str(tmp_path / 'lib.db'), json_path=None)
+    store.add_terms({
+        "Analyse, conception et architecture": "Analysis, design and architecture",
+        "Assistance aux usagers": "User assistance",
+        "Niveau 2": "Level 2",
+        "Mois": "Months",
+    })
+    index = LibraryIndex(store, fuzzy_threshold=0.9)
+    index.refresh()
+    assert index.match("Assistance aux usagers", 'fr') == ("User assistance", 'exact')
+    assert index.match("Assistance aux usagers :", 'fr') == ("User assistance", 'normalized')
+    assert index.match("ANALYSE, Conception et Architecture", 'fr') == ("Analysis, design and architecture", 'folded')
+    assert index.match("Assistance aux utilisateurs ;", 'fr') == ("User assistance", 'fuzzy')
+    assert index.match("Assistance aux usagres", 'fr') == ("User assistance", 'fuzzy')
+    assert index.match("Design and architecture", 'en') == (None, None)
+    # Different numbers and very short strings are never near-duplicates
+    assert index.match("Niveau 3", 'fr') == (None, None)
+    assert index.match("Moi", 'fr') == (None, None)
+
+    # Near-duplicates are off by default
+    strict = LibraryIndex(store)
+    strict.refresh()
+    assert strict.match("Assistance aux utilisateurs ;", 'fr') == (None, None)
+    assert strict.match("assistance  aux usagers", 'fr') == ("User assistance", 'folded')
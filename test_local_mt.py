@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+from local_mt import DynamicBatcher, plan_batches
+from pipeline import translate_missing
+from translation_backends import create_backend
+
+
+class WordEngine:
+    """Tiny stand-in model: one token per word, uppercases text"""
+
+    def __init__(self, path='words', fail_on=None):
+        self.path = path
+        self.fail_on = fail_on
+        self.batches = []
+
+    def token_lengths(self, texts):
+        return [len(t.split()) + 1 for t in texts]
+
+    def translate(self, texts):
+        self.batches.append(list(texts))
+        if self.fail_on and self.fail_on in texts:
+            raise RuntimeError("inference failed")
+        return [t.upper() for t in texts]
+
+
+def test_plan_batches_groups_by_length_under_token_budget():
+    lengths = [30, 2, 3, 29, 2, 31]
+    batches = plan_batches(lengths, max_batch_tokens=64, max_batch_size=8)
+    assert sorted(i for batch in batches for i in batch) == list(range(6))
+    # Short segments are batched together, long ones are not padded with them
+    assert batches[0] == [1, 4, 2]
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 64 or len(batch) == 1
+    assert all(len(b) <= 2 for b in plan_batches([1] * 5, 100, 2))
+
+
+def test_concurrent_calls_share_inference_batches():
+    engine = WordEngine()
+    reports = []
+    batcher = DynamicBatcher(engine, max_batch_tokens=1000, max_wait=0.05,
+                             on_batch=lambda *report: reports.append(report), name='fr-en')
+    results = {}
+
+    def call(n):
+        results[n] = batcher.translate([f"segment {n} a", f"segment {n} b c"])
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {n: [f"SEGMENT {n} A", f"SEGMENT {n} B C"] for n in range(6)}
+    assert len(engine.batches) < 6
+    assert sum(segments for _, segments, _, _ in reports) == 12
+    assert all(name == 'fr-en' and seconds >= 0 for name, _, _, seconds in reports)
+
+
+def test_local_backend_feeds_the_learning_path_without_rate_limit():
+    engines = {}
+
+    def factory(path):
+        engines[path] = WordEngine(path)
+        return engines[path]
+
+    backend = create_backend('local', model='models/opus-mt-{source}-{target}', engine_factory=factory, max_wait=0)
+    backend.warmup()
+    assert sorted(engines) == ['models/opus-mt-en-fr', 'models/opus-mt-fr-en']
+
+    mapping = {}
+    started = time.perf_counter()
+    # A remote backend would need about 10 seconds at 0.5 request/s
+    new_knowledge, stats = translate_missing(["Gestion de projet", "Pilotage budgétaire", "Tests"], 'fr', 'en',
+                                             backend, mapping, batch_size=1, rate_limit=0.5)
+    assert time.perf_counter() - started < 2
+    assert mapping == {"Gestion de projet": "GESTION DE PROJET", "Pilotage budgétaire": "PILOTAGE BUDGÉTAIRE",
+                       "Tests": "TESTS"}
+    assert new_knowledge == mapping
+    assert stats['batches'] == 3 and stats['failed_batches'] == 0
+
+
+def test_inference_errors_fail_the_callers_batch():
+    backend = create_backend('local', engine_factory=lambda path: WordEngine(path, fail_on="boom"), max_wait=0)
+    mapping = {}
+    _, stats = translate_missing(["boom", "fine text"], 'fr', 'en', backend, mapping, batch_size=1, rate_limit=0,
+                                 backoff=0)
+    assert stats['failed_batches'] == 1
+    assert mapping == {"boom": "boom", "fine text": "FINE TEXT"}
+
+
+@pytest.mark.skipif(not os.environ.get('LOCAL_MT_TEST_MODEL'),
+                    reason="set LOCAL_MT_TEST_MODEL to a small local model directory ({source}/{target} placeholders allowed)")
+def test_real_model_translates_offline():
+    pytest.importorskip('transformers')
+    pytest.importorskip('torch')
+    backend = create_backend('local', model=os.environ['LOCAL_MT_TEST_MODEL'], threads=1)
+    result = backend.translate_batch(["Gestion de projet", "Expérience professionnelle"], 'fr', 'en')
+    assert len(result.translations) == 2 and all(result.translations)
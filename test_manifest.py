@@ -0,0 +1,55 @@
+import pytest
+
+from manifest import Manifest, ManifestError, fingerprint
+
+
+class DictCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.puts = {}
+
+    def get_many(self, texts, source, target):
+        return {t: self.entries[t] for t in texts if t in self.entries}
+
+    def put_many(self, translations, source, target):
+        self.puts.update(translations)
+
+
+def test_manifest_answers_unchanged_paragraphs_and_records_new_ones():
+    first = Manifest()
+    first.put_many({"Gestion de projet agile": "Agile project management"}, 'fr', 'en')
+    token = first.encode()
+
+    cache = DictCache({"Animation des ateliers": "Workshop facilitation"})
+    second = Manifest.decode(token, cache=cache)
+    found = second.get_many(["Gestion de projet agile", "Animation des ateliers", "Nouveau paragraphe"], 'fr', 'en')
+    assert found == {"Gestion de projet agile": "Agile project management", "Animation des ateliers": "Workshop facilitation"}
+    assert second.hits == 1
+    second.put_many({"Nouveau paragraphe": "New paragraph"}, 'fr', 'en')
+    # Client-supplied translations never reach the shared cache
+    assert cache.puts == {"Nouveau paragraphe": "New paragraph"}
+
+    # The next manifest covers this document's paragraphs only, keyed by direction
+    entries = Manifest.decode(second.encode()).previous
+    assert len(entries) == 3
+    assert fingerprint("Nouveau paragraphe", 'fr', 'en') in entries
+    assert fingerprint("Nouveau paragraphe", 'en', 'fr') not in entries
+
+
+def test_invalid_manifests_are_rejected():
+    for token in ['not base64!', 'eJzLSM3JyQcABiwCFQ==', Manifest().encode()[:-4]]:
+        with pytest.raises(ManifestError):
+            Manifest.decode(token)
+
+
+def test_encrypted_manifest_needs_the_server_key():
+    pytest.importorskip('cryptography')
+    manifest = Manifest()
+    manifest.put_many({"Expérience professionnelle": "Professional experience"}, 'fr', 'en')
+    token = manifest.encode('server secret')
+    assert 'Professional' not in token
+    assert Manifest.decode(token, 'server secret').previous == manifest.entries
+    with pytest.raises(ManifestError):
+        Manifest.decode(token, 'another key')
+    with pytest.raises(ManifestError):
+        Manifest.decode(manifest.encode(), 'server secret')
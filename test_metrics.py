@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+
+from metrics import MetricsRegistry
+
+
+def test_collect_sums_workers_and_drops_gauges_of_exited_ones(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.inc('translation_chars_sent_total', 100)
+    registry.gauge_add('jobs_running', 1, kind='single')
+    registry.observe('stage_seconds', 0.2, kind='single', stage='translate')
+
+    # Metrics left behind by a worker process that has exited
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    other = {
+        'counter': {'translation_chars_sent_total': {'': 50}},
+        'gauge': {'jobs_running': {'kind="single"': 3}},
+        'histogram': {},
+    }
+    (tmp_path / f'metrics-{exited.pid}.json').write_text(json.dumps({'pid': exited.pid, 'metrics': other}))
+
+    total = registry.collect()
+    assert total['counter']['translation_chars_sent_total'][''] == 150
+    assert total['gauge']['jobs_running']['kind="single"'] == 1
+
+    text = registry.render()
+    assert 'resume_translator_translation_chars_sent_total 150' in text
+    assert 'resume_translator_stage_seconds_bucket{kind="single",stage="translate",le="0.25"} 1' in text
+    assert 'resume_translator_stage_seconds_bucket{kind="single",stage="translate",le="0.1"} 0' in text
+    assert 'resume_translator_stage_seconds_count{kind="single",stage="translate"} 1' in text
@@ -0,0 +1,234 @@
+import random
+import threading
+import time
+
+import pytest
+
+from pipeline import TokenBucket, is_safe_to_save, translate_missing
+from translation_backends import FakeBackend, TranslationBackend, create_backend
+
+
+class SlowUpperBackend(TranslationBackend):
+    """Uppercases text after a random delay; fails on batches containing 'BOOM'"""
+    name = 'upper'
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _translate(self, batch, source, target):
+        cls = SlowUpperBackend
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(random.uniform(0, 0.01))
+            if 'BOOM' in batch:
+                raise RuntimeError("service unavailable")
+            return [s.upper() for s in batch]
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+def test_translate_missing_keeps_order_and_learning():
+    missing = [f"terme {i}" if i % 2 else f"Terme numéro {'x' * i}" for i in range(40)] + ['BOOM']
+    mapping = {}
+    done = []
+    learned, stats = translate_missing(missing, 'fr', 'en', SlowUpperBackend(), mapping,
+                                batch_size=3, max_in_flight=4, rate_limit=0, backoff=0,
+                                on_batch=lambda d, t, e: done.append((d, t)))
+
+    assert list(mapping) == missing
+    assert mapping['BOOM'] == 'BOOM'
+    assert mapping['terme 1'] == 'TERME 1'
+    # Only the failing string falls back, not the rest of its batch
+    assert mapping['terme 39'] == 'TERME 39'
+    assert stats['untranslated'] == ['BOOM']
+    assert learned == {s: s.upper() for s in missing[:-1] if is_safe_to_save(s)}
+    assert sorted(d for d, _ in done) == list(range(1, 15))
+    assert SlowUpperBackend.peak <= 4
+    assert stats['batches'] == 14 and stats['failed_batches'] == 1
+    assert stats['chars_sent'] == sum(len(s) for s in missing[:-1])
+
+
+def test_batches_are_packed_by_character_budget():
+    from pipeline import make_batches
+    items = ['a' * 10, 'b' * 10, 'c' * 30, 'd' * 5, 'e' * 60, 'f']
+    assert make_batches(items, batch_size=50, max_chars=40) == [items[:2], items[2:4], [items[4]], [items[5]]]
+    assert make_batches(items, batch_size=2, max_chars=1000) == [items[:2], items[2:4], items[4:]]
+
+
+class FlakyBackend(TranslationBackend):
+    """Fails the first call of every batch, and always fails on batches longer than max_items"""
+    name = 'flaky'
+
+    def __init__(self, max_items=100):
+        self.calls = []
+        self.seen = set()
+        self.max_items = max_items
+
+    def _translate(self, batch, source, target):
+        self.calls.append(list(batch))
+        key = tuple(batch)
+        if key not in self.seen:
+            self.seen.add(key)
+            raise RuntimeError("503 transient")
+        if len(batch) > self.max_items:
+            raise RuntimeError("413 payload too large")
+        return [s.upper() for s in batch]
+
+
+def test_transient_failures_are_retried_and_persistent_ones_bisected():
+    backend = FlakyBackend()
+    mapping = {}
+    _, stats = translate_missing([f"ligne {i}" for i in range(4)], 'fr', 'en', backend, mapping,
+                                 batch_size=4, rate_limit=0, backoff=0)
+    assert mapping == {f"ligne {i}": f"LIGNE {i}" for i in range(4)}
+    assert stats['retries'] == 1 and stats['failed_batches'] == 0 and stats['untranslated'] == []
+
+    backend = FlakyBackend(max_items=1)
+    mapping = {}
+    _, stats = translate_missing([f"ligne {i}" for i in range(4)], 'fr', 'en', backend, mapping,
+                                 batch_size=4, rate_limit=0, backoff=0, retries=1)
+    assert mapping == {f"ligne {i}": f"LIGNE {i}" for i in range(4)}
+    assert stats['failed_batches'] == 0 and stats['fallbacks'] == 0
+
+
+class DownBackend(TranslationBackend):
+    """Every request fails, as when the service is down"""
+    name = 'down'
+
+    def __init__(self):
+        self.calls = 0
+
+    def _translate(self, batch, source, target):
+        self.calls += 1
+        raise RuntimeError("503 service unavailable")
+
+
+def test_backend_down_sends_a_bounded_number_of_requests():
+    backend = DownBackend()
+    missing = [f"Paragraphe numéro {i} du CV" for i in range(200)]
+    mapping = {}
+    _, stats = translate_missing(missing, 'fr', 'en', backend, mapping, rate_limit=0, backoff=0, max_in_flight=4)
+    # Without the breaker, bisecting every batch down to single strings took 804 requests
+    assert backend.calls == stats['requests'] <= 8 + 4
+    assert mapping == {s: s for s in missing} and len(stats['untranslated']) == 200
+
+    # The request budget also bounds a call that never fails twice in a row
+    backend = FlakyBackend(max_items=1)
+    _, stats = translate_missing(missing[:40], 'fr', 'en', backend, {}, batch_size=40, rate_limit=0, backoff=0,
+                                 max_failures=0, max_requests_per_batch=10)
+    assert len(backend.calls) == stats['requests'] == 10
+
+
+def test_reverse_direction_learns_french_keys():
+    learned, _ = translate_missing(['Skills'], 'en', 'fr', SlowUpperBackend(), {}, rate_limit=0)
+    assert learned == {'SKILLS': 'Skills'}
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # First token is immediate, the next five wait 1/50 s each
+    assert time.monotonic() - start >= 0.09
+
+
+def test_fake_backend_is_deterministic():
+    backend = create_backend('fake', latency=0, failure_rate=0.5, seed=7)
+    assert isinstance(backend, FakeBackend)
+    outcomes = []
+    for i in range(20):
+        try:
+            result = backend.translate_batch([f"Ligne {i}"], 'fr', 'en')
+            assert result.translations == [f"[en] Ligne {i}"]
+            assert result.chars_sent == len(f"Ligne {i}") and result.backend == 'fake'
+            outcomes.append(True)
+        except RuntimeError:
+            outcomes.append(False)
+    assert 0 < outcomes.count(False) < 20
+    assert translate_missing(['Skills'], 'en', 'fr', FakeBackend(), {}, rate_limit=0)[0] == {}
+
+    again = []
+    for i in range(20):
+        try:
+            backend.translate_batch([f"Ligne {i}"], 'fr', 'en')
+            again.append(True)
+        except RuntimeError:
+            again.append(False)
+    assert again == outcomes
+
+
+def test_cli_translates_directory_in_process_pool(tmp_path, monkeypatch):
+    import run_translation_pipeline as cli
+    from test_docx_engine import DOCUMENT_XML, build_docx
+
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY_DB', str(tmp_path / 'lib.db'))
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY', str(tmp_path / 'missing.json'))
+    (tmp_path / 'cvs' / 'sub').mkdir(parents=True)
+    for name in ['cvs/A_FR.docx', 'cvs/B_FR.docx', 'cvs/sub/C_FR.docx', 'cvs/~$A_FR.docx']:
+        (tmp_path / name).write_bytes(build_docx({'word/document.xml': DOCUMENT_XML}).getvalue())
+
+    sources = cli.expand_sources([str(tmp_path / 'cvs')])
+    assert [s.rsplit('/', 1)[1] for s in sources] == ['A_FR.docx', 'B_FR.docx', 'C_FR.docx']
+
+    results = cli.run(sources, 'fake', workers=2, rate_limit=0)
+    assert sorted(r['output'].rsplit('/', 1)[1] for r in results) == ['A_EN.docx', 'B_EN.docx', 'C_EN.docx']
+    assert all(r['error'] is None and r['segments'] == 6 for r in results)
+    assert (tmp_path / 'cvs' / 'sub' / 'C_EN.docx').exists()
+
+
+def test_cli_skips_earlier_outputs_and_keeps_existing_files(tmp_path, monkeypatch):
+    import run_translation_pipeline as cli
+    from test_docx_engine import DOCUMENT_XML, build_docx
+
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY_DB', str(tmp_path / 'lib.db'))
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY', str(tmp_path / 'missing.json'))
+    folder = tmp_path / 'cvs'
+    folder.mkdir()
+    for name in ['A_FR.docx', 'B.docx']:
+        (folder / name).write_bytes(build_docx({'word/document.xml': DOCUMENT_XML}).getvalue())
+    first = cli.run(cli.expand_sources([str(folder)]), 'fake', rate_limit=0, verbose=False)
+    assert sorted(r['output'].rsplit('/', 1)[1] for r in first) == ['A_EN.docx', 'B_EN.docx']
+
+    # A second run over the folder does not translate its own outputs back onto the originals
+    original = (folder / 'A_FR.docx').read_bytes()
+    sources = cli.expand_sources([str(folder)])
+    assert [s.rsplit('/', 1)[1] for s in sources] == ['A_FR.docx', 'B.docx']
+
+    # Existing outputs are only replaced on request
+    again = cli.run(sources, 'fake', rate_limit=0, verbose=False)
+    assert all('already exists' in r['error'] for r in again)
+    assert cli.run(sources, 'fake', rate_limit=0, overwrite=True, verbose=False)[0]['error'] is None
+    assert (folder / 'A_FR.docx').read_bytes() == original
+
+
+def test_cli_manifest_reuses_unchanged_paragraphs(tmp_path, monkeypatch):
+    import run_translation_pipeline as cli
+    from test_app import resume
+
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY_DB', str(tmp_path / 'lib.db'))
+    monkeypatch.setattr(cli, 'MASTER_LIBRARY', str(tmp_path / 'missing.json'))
+    source = tmp_path / 'CV_FR.docx'
+    manifests = str(tmp_path / 'manifests')
+    options = dict(rate_limit=0, manifest_dir=manifests, overwrite=True, verbose=False)
+
+    source.write_bytes(resume("Jeanne Martin, cheffe de projet confirmée"))
+    first = cli.run([str(source)], 'fake', **options)[0]
+    assert first['manifest_hits'] == 0 and first['translated'] > 1
+    assert (tmp_path / 'manifests' / 'CV_FR.docx.manifest').exists()
+
+    source.write_bytes(resume("Jeanne Martin, directrice de projet confirmée"))
+    second = cli.run([str(source)], 'fake', **options)[0]
+    assert second['translated'] == 1
+    assert second['manifest_hits'] == first['translated'] - 1
+
+
+def test_google_backend_imports_its_client_on_first_use():
+    pytest.importorskip('deep_translator')
+    backend = create_backend('google')
+    assert backend._translator_class is None
+    backend.warmup()
+    assert backend._translator_class is not None
@@ -0,0 +1,19 @@
+from result_cache import ResultCache, upload_key
+
+
+def test_claim_record_and_release(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = upload_key('ab' * 32, 'single', 'CV_FR.docx', ('fake', False))
+    assert key != upload_key('ab' * 32, 'single', 'CV_EN.docx', ('fake', False))
+    assert key != upload_key('ab' * 32, 'single', 'CV_FR.docx', ('google', False))
+
+    assert cache.claim(key)
+    assert not cache.claim(key)
+    # Claimed but not recorded yet: readers give up after the wait
+    assert cache.read(key, wait=0.05) is None
+    cache.record(key, 'job1', 7)
+    assert cache.read(key) == {'job_id': 'job1', 'library_version': 7}
+
+    cache.release(key)
+    assert cache.read(key) is None
+    assert cache.claim(key)
@@ -0,0 +1,36 @@
+import io
+
+from result_store import ResultStore
+
+
+def test_memory_store_round_trip_and_expiry():
+    store = ResultStore(ttl=60)
+    token = store.put(io.BytesIO(b'docx bytes'), 'CV_EN.docx')
+    assert store.get(token) == ('CV_EN.docx', b'docx bytes')
+    # Served more than once within the TTL
+    assert store.get(token) == ('CV_EN.docx', b'docx bytes')
+    assert store.get('0' * 32) is None
+    assert store.get('../etc/passwd') is None
+
+    store.ttl = 0
+    expired = store.put(io.BytesIO(b'old'), 'old.docx')
+    assert store.get(expired) is None
+    # Expired results are purged on the next put
+    store.ttl = 60
+    store.put(io.BytesIO(b'new'), 'new.docx')
+    assert expired not in store._results
+    assert store.get(token) is not None
+
+
+def test_folder_store_is_shared_between_instances(tmp_path):
+    writer = ResultStore(str(tmp_path), ttl=60)
+    reader = ResultStore(str(tmp_path), ttl=60)
+    token = writer.put(io.BytesIO(b'zip bytes'), 'cvs_translated.zip')
+    assert reader.get(token) == ('cvs_translated.zip', b'zip bytes')
+    assert not [p for p in tmp_path.iterdir() if p.suffix == '.tmp']
+
+    reader.ttl = -1
+    expired = reader.put(io.BytesIO(b'old'), 'old.zip')
+    assert reader.get(expired) is None
+    # put() purged the expired result's files
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([token, f"{token}.json"])
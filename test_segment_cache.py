@@ -0,0 +1,82 @@
+import os
+import sqlite3
+
+from pipeline import translate_missing
+from segment_cache import SegmentCache
+from translation_backends import FakeBackend
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def _translate(self, texts, source, target):
+        self.texts.extend(texts)
+        return super()._translate(texts, source, target)
+
+
+def test_cache_hits_skip_backend(tmp_path):
+    cache = SegmentCache(str(tmp_path / 'cache.db'))
+    strings = ["Gestion de projet transverse avec les équipes métier", "Animation des ateliers"]
+
+    first = CountingBackend()
+    mapping = {}
+    translate_missing(strings, 'fr', 'en', first, mapping, rate_limit=0, cache=cache)
+    assert first.texts == strings
+
+    again = CountingBackend()
+    cached_mapping = {}
+    _, stats = translate_missing(strings, 'fr', 'en', again, cached_mapping, rate_limit=0, cache=cache)
+    assert again.texts == [] and stats['cache_hits'] == 2 and stats['batches'] == 0
+    assert cached_mapping == mapping
+    # The language pair is part of the key
+    assert cache.get_many(strings, 'en', 'fr') == {}
+
+
+def test_cache_stores_hashes_not_source_text(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SegmentCache(path).put_many({"Jean Dupont, 12 rue de la Paix": "[en] x"}, 'fr', 'en')
+    conn = sqlite3.connect(path)
+    keys = [row[0] for row in conn.execute('SELECT key FROM segments')]
+    conn.close()
+    assert len(keys) == 1 and 'Dupont' not in keys[0] and len(keys[0]) == 64
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('segment_cache.time.time', lambda: clock[0])
+    cache = SegmentCache(str(tmp_path / 'cache.db'), ttl=60)
+    cache.put_many({"Bonjour": "Hello"}, 'fr', 'en')
+    clock[0] += 59
+    assert cache.get_many(["Bonjour"], 'fr', 'en') == {"Bonjour": "Hello"}
+    clock[0] += 2
+    assert cache.get_many(["Bonjour"], 'fr', 'en') == {}
+    assert cache.purge() == 1
+
+
+def test_purge_leaves_no_expired_translation_on_disk(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('segment_cache.time.time', lambda: clock[0])
+    path = str(tmp_path / 'cache.db')
+    cache = SegmentCache(path, ttl=60)
+    cache.put_many({"Jean Dupont": "Jean Dupont, Paris"}, 'fr', 'en')
+    clock[0] += 61
+    assert cache.purge() == 1
+    assert not os.path.exists(path + '-wal') or os.path.getsize(path + '-wal') == 0
+    with open(path, 'rb') as f:
+        assert b'Jean Dupont' not in f.read()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('segment_cache.time.time', lambda: clock[0])
+    cache = SegmentCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.put_many({"a": "A"}, 'fr', 'en')
+    clock[0] += 1
+    cache.put_many({"b": "B"}, 'fr', 'en')
+    clock[0] += 1
+    cache.get_many(["a"], 'fr', 'en')  # "a" is now more recent than "b"
+    clock[0] += 1
+    cache.put_many({"c": "C"}, 'fr', 'en')
+    assert cache.get_many(["a", "b", "c"], 'fr', 'en') == {"a": "A", "c": "C"}
@@ -0,0 +1,67 @@
+from library_store import normalize_key
+from pipeline import translate_missing
+from segmentation import assemble, plan_segment, segment_missing
+from translation_backends import FakeBackend
+
+LIBRARY = {
+    "Environnement technologique": "Technology environment",
+    "Période :": "Period:",
+    "Gestion de projet": "Project management",
+    "Kanban": "Kanban",
+    "Azure Data Factory": "AZURE DATA FACTORY",
+}
+
+
+NORMALIZED = {normalize_key(k): v for k, v in LIBRARY.items()}
+
+
+def lookup(text):
+    return NORMALIZED.get(normalize_key(text))
+
+
+def test_label_and_list_pieces_come_from_the_library():
+    text = "Environnement technologique : Azure Data Factory, Kanban, CI/CD"
+    parts, resolved, unresolved = plan_segment(text, lookup)
+    # "CI/CD" is unknown, so the list is kept whole
+    assert unresolved == ["Azure Data Factory, Kanban, CI/CD"]
+    assert assemble(parts, resolved, {"Azure Data Factory, Kanban, CI/CD": "X"}, 'en') == "Technology environment: X"
+
+    parts, resolved, unresolved = plan_segment("Environnement technologique : Azure Data Factory, Kanban", lookup)
+    assert unresolved == []
+    # Names keep their case; the library colon is not doubled
+    assert assemble(parts, resolved, {}, 'en') == "Technology environment: Azure Data Factory, Kanban"
+    parts, resolved, _ = plan_segment("Période : 2019 - 2021", lookup)
+    assert assemble(parts, resolved, {}, 'en') == "Period: 2019 - 2021"
+
+
+def test_separators_are_respaced_for_the_target_language():
+    reverse = {"Technology environment": "Environnement technologique", "Project management": "Gestion de projet"}
+    parts, resolved, _ = plan_segment("Project management; Technology environment: Kanban", reverse.get)
+    assert assemble(parts, resolved, {}, 'fr') == "Gestion de projet ; Environnement technologique : Kanban"
+    parts, resolved, _ = plan_segment("Gestion de projet\u00a0; pilotage : Kanban", lookup)
+    assert assemble(parts, resolved, {"pilotage": "steering"}, 'en') == "Project management; steering: Kanban"
+
+
+def test_unknown_paragraphs_are_sent_whole():
+    assert plan_segment("Animation des ateliers avec les équipes métier", lookup) is None
+    assert plan_segment("Animation des ateliers. Suivi des équipes.", lookup) is None
+
+
+def test_segmentation_reduces_characters_sent():
+    missing = [
+        "Gestion de projet ; pilotage des prestataires externes",
+        "Environnement technologique : Azure Data Factory, Kanban",
+        "Animation des ateliers avec les équipes métier",
+    ]
+    _, whole = translate_missing(missing, 'fr', 'en', FakeBackend(), {}, rate_limit=0)
+
+    to_translate, plans = segment_missing(missing, lookup)
+    mapping = {}
+    _, split = translate_missing(to_translate, 'fr', 'en', FakeBackend(), mapping, rate_limit=0)
+    for s, (parts, resolved, _) in plans.items():
+        mapping[s] = assemble(parts, resolved, mapping, 'en')
+
+    assert split['chars_sent'] < whole['chars_sent']
+    assert mapping[missing[0]] == "Project management; [en] pilotage des prestataires externes"
+    assert mapping[missing[1]] == "Technology environment: Azure Data Factory, Kanban"
+    assert mapping[missing[2]] == "[en] Animation des ateliers avec les équipes métier"
@@ -0,0 +1,209 @@
+"""
+Pluggable translation backends.
+
+Every backend exposes translate_batch(texts, source, target) and returns a
+BatchResult carrying the translations plus latency and character counts.
+The backend is picked by name ('google', 'local' or 'fake'), usually from
+the TRANSLATION_BACKEND environment variable.
+
+The local backend translates on CPU with Hugging Face models loaded once
+per worker (see local_mt.py); it has no API rate limit.
+
+The fake backend is local and deterministic, with configurable latency,
+failure rate and throughput, so the pipeline can be benchmarked and load
+tested without network access.
+"""
+import importlib.util
+import os
+import threading
+import time
+import zlib
+
+
+class BatchResult:
+    """Translations of one batch plus request metadata"""
+    __slots__ = ('translations', 'latency', 'chars_sent', 'chars_received', 'backend')
+
+    def __init__(self, translations, latency, chars_sent, chars_received, backend):
+        self.translations = translations
+        self.latency = latency
+        self.chars_sent = chars_sent
+        self.chars_received = chars_received
+        self.backend = backend
+
+
+class TranslationBackend:
+    """Base class: subclasses implement _translate(texts, source, target) -> list"""
+    name = None
+    # Whether translations may be learned into the master library
+    learns = True
+    # Whether the pipeline's request rate limit applies (remote APIs)
+    rate_limited = True
+
+    def translate_batch(self, texts, source, target):
+        start = time.perf_counter()
+        translations = self._translate(texts, source, target)
+        return BatchResult(
+            translations,
+            time.perf_counter() - start,
+            sum(len(t) for t in texts),
+            sum(len(t) for t in translations if t),
+            self.name,
+        )
+
+    def _translate(self, texts, source, target):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep_translator (network)"""
+    name = 'google'
+
+    def __init__(self):
+        # Fail early with ImportError if deep-translator is not installed, but
+        # import it on first use: it pulls in requests and BeautifulSoup
+        if importlib.util.find_spec('deep_translator') is None:
+            raise ImportError("No module named 'deep_translator' (pip install deep-translator)")
+        self._translator_class = None
+
+    def _client_class(self):
+        if self._translator_class is None:
+            from deep_translator import GoogleTranslator
+            self._translator_class = GoogleTranslator
+        return self._translator_class
+
+    def warmup(self, pairs=()):
+        """Import the client ahead of the first batch"""
+        self._client_class()
+
+    def _translate(self, texts, source, target):
+        # GoogleTranslator keeps per-request state: one client per batch keeps
+        # concurrent batches independent
+        return self._client_class()(source=source, target=target).translate_batch(texts)
+
+
+class LocalBackend(TranslationBackend):
+    """
+    Hugging Face translation models on CPU (see local_mt.py).
+
+    model is a hub name or a local directory, with {source} and {target}
+    placeholders. Each direction's model is loaded on first use (or by
+    warmup()) and kept for the life of the worker; concurrent batches share
+    dynamically sized inference batches.
+    """
+    name = 'local'
+    rate_limited = False
+
+    def __init__(self, model=None, threads=0, num_beams=1, max_batch_tokens=None, max_batch_size=None,
+                 max_wait=None, engine_factory=None, on_batch=None):
+        import local_mt
+        if engine_factory is None:
+            # Fail early with ImportError if transformers or torch is not installed
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+            engine_factory = lambda path: local_mt.MarianEngine(path, threads, num_beams)
+        self.model = model or local_mt.DEFAULT_MODEL
+        self.engine_factory = engine_factory
+        self.on_batch = on_batch
+        self._batcher_options = {
+            'max_batch_tokens': max_batch_tokens or local_mt.DEFAULT_MAX_BATCH_TOKENS,
+            'max_batch_size': max_batch_size or local_mt.DEFAULT_MAX_BATCH_SIZE,
+            'max_wait': local_mt.DEFAULT_MAX_WAIT if max_wait is None else max_wait,
+        }
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def _batcher(self, source, target):
+        key = (source, target)
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            import local_mt
+            with self._lock:
+                batcher = self._batchers.get(key)
+                if batcher is None:
+                    engine = self.engine_factory(self.model.format(source=source, target=target))
+                    batcher = local_mt.DynamicBatcher(engine, on_batch=self._report, name=f"{source}-{target}",
+                                                      **self._batcher_options)
+                    self._batchers[key] = batcher
+        return batcher
+
+    def _report(self, name, segments, tokens, seconds):
+        if self.on_batch is not None:
+            self.on_batch(name, segments, tokens, seconds)
+
+    def warmup(self, pairs=(('fr', 'en'), ('en', 'fr'))):
+        """Load the models and run one tiny translation per direction"""
+        for source, target in pairs:
+            self._batcher(source, target).translate(["Bonjour" if source == 'fr' else "Hello"])
+
+    def _translate(self, texts, source, target):
+        return self._batcher(source, target).translate(texts)
+
+
+class FakeBackend(TranslationBackend):
+    """
+    Offline deterministic stand-in.
+
+    Each text becomes "[target] text". latency is a fixed delay per batch,
+    throughput (characters per second, 0 = unlimited) adds a delay
+    proportional to the batch size, and failure_rate fails that fraction of
+    batches, chosen from a hash of the batch so runs are reproducible.
+    """
+    name = 'fake'
+    # Never teach the master library placeholder translations
+    learns = False
+
+    def __init__(self, latency=0.0, failure_rate=0.0, throughput=0.0, seed=0):
+        self.latency = float(latency)
+        self.failure_rate = float(failure_rate)
+        self.throughput = float(throughput)
+        self.seed = seed
+
+    def _translate(self, texts, source, target):
+        chars = sum(len(t) for t in texts)
+        delay = self.latency + (chars / self.throughput if self.throughput > 0 else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate > 0:
+            digest = zlib.crc32("\x00".join(texts).encode('utf-8'), self.seed)
+            if digest / 0xFFFFFFFF < self.failure_rate:
+                raise RuntimeError(f"Fake backend failure ({len(texts)} texts)")
+        return [f"[{target}] {t}" for t in texts]
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'local': LocalBackend,
+    'fake': FakeBackend,
+}
+
+
+def backend_options_from_env(name, environ=os.environ):
+    """Constructor options for a backend read from environment variables"""
+    if name == 'fake':
+        return {
+            'latency': float(environ.get('FAKE_TRANSLATOR_LATENCY', 0)),
+            'failure_rate': float(environ.get('FAKE_TRANSLATOR_FAILURE_RATE', 0)),
+            'throughput': float(environ.get('FAKE_TRANSLATOR_THROUGHPUT', 0)),
+            'seed': int(environ.get('FAKE_TRANSLATOR_SEED', 0)),
+        }
+    if name == 'local':
+        return {
+            'model': environ.get('LOCAL_MT_MODEL') or None,
+            'threads': int(environ.get('LOCAL_MT_THREADS', 0)),
+            'num_beams': int(environ.get('LOCAL_MT_BEAMS', 1)),
+            'max_batch_tokens': int(environ.get('LOCAL_MT_MAX_BATCH_TOKENS', 0)) or None,
+            'max_batch_size': int(environ.get('LOCAL_MT_MAX_BATCH_SIZE', 0)) or None,
+            'max_wait': float(environ['LOCAL_MT_MAX_WAIT_MS']) / 1000 if environ.get('LOCAL_MT_MAX_WAIT_MS') else None,
+        }
+    return {}
+
+
+def create_backend(name=None, **options):
+    """Instantiate a backend by name (default: TRANSLATION_BACKEND or 'google')"""
+    name = (name or os.environ.get('TRANSLATION_BACKEND') or 'google').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend '{name}' (choose from {', '.join(BACKENDS)})")
+    if not options:
+        options = backend_options_from_env(name)
+    return BACKENDS[name](**options)